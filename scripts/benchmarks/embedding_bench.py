@@ -0,0 +1,46 @@
+import argparse
+
+import numpy as np
+
+from src.agent.corpus_store import CorpusStore
+from src.agent.embedding_backend import BACKENDS, benchmark_encoder, load_embedding_model, parity_report
+from src.agent.resources import resolve_index_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query embedding backends: parity with torch, latency and QPS")
+    parser.add_argument("--corpus-dir", default="Data/processed/big")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    model_path = f"{args.corpus_dir}/sentence_transformer_model"
+    index_dir = resolve_index_dir(args.corpus_dir)
+    texts = CorpusStore(index_dir)
+    live_ids = [i for i in range(len(texts)) if texts[i] is not None]
+    sample = np.random.default_rng(0).choice(live_ids, size=min(args.queries, len(live_ids)), replace=False)
+    # Queries are short, like user questions: the first words of sampled passages
+    queries = [" ".join(texts[i]["processed_text"].split()[:12]) for i in sample]
+    corpus_embeddings = np.load(f"{index_dir}/embeddings.npy", mmap_mode="r")[live_ids]
+
+    reference = load_embedding_model(model_path, "torch")
+    print(f"{'backend':<12}{'cosine':>8}{'min cos':>9}{'recall@' + str(args.k):>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'1-q QPS':>9}{'batch QPS':>11}")
+    for backend in args.backends:
+        try:
+            model = reference if backend == "torch" else load_embedding_model(model_path, backend)
+        except (FileNotFoundError, ImportError, ValueError) as e:
+            print(f"{backend:<12}skipped: {e}")
+            continue
+        parity = parity_report(reference, model, queries, args.k, corpus_embeddings)
+        speed = benchmark_encoder(model, queries, args.batch_size)
+        print(f"{backend:<12}{parity['mean_cosine']:>8.4f}{parity['min_cosine']:>9.4f}"
+              f"{parity[f'recall@{args.k}']:>11.3f}{speed['single_p50_ms']:>9.2f}{speed['single_p95_ms']:>9.2f}"
+              f"{speed['single_qps']:>9.0f}{speed['batch_qps']:>11.0f}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.embedding_bench
+if __name__ == "__main__":
+    main()
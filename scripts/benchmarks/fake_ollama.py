@@ -0,0 +1,69 @@
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+# Фейковий сервер Ollama: стрімить NDJSON-частини з фіксованою затримкою між токенами.
+# max_parallel імітує OLLAMA_NUM_PARALLEL: решта запитів чекає на вільну генерацію
+def create_fake_ollama_app(num_tokens=50, token_delay=0.01, status_code=200, max_parallel=None):
+    app = FastAPI()
+    app.state.requests_served = 0
+    app.state.request_ids = []
+    app.state.healthy = True
+    parallel = asyncio.Semaphore(max_parallel) if max_parallel else None
+
+    @app.get("/api/tags")
+    async def tags():
+        if not app.state.healthy:
+            return StreamingResponse(iter(["unhealthy"]), status_code=503, media_type="text/plain")
+        return {"models": [{"name": "phi4"}]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        app.state.requests_served += 1
+        app.state.request_ids.append(request.headers.get("x-request-id"))
+
+        if status_code != 200:
+            return StreamingResponse(iter(["fake error"]), status_code=status_code, media_type="text/plain")
+
+        async def stream():
+            if parallel is not None:
+                await parallel.acquire()
+            try:
+                for i in range(num_tokens):
+                    await asyncio.sleep(token_delay)
+                    yield json.dumps({"model": body.get("model"), "response": f"tok{i} ", "done": False}) + "\n"
+                yield json.dumps({"model": body.get("model"), "response": "", "done": True}) + "\n"
+            finally:
+                if parallel is not None:
+                    parallel.release()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+# Запуск фейкового сервера у фоновому потоці (для тестів і бенчмарків)
+class FakeOllamaServer:
+    def __init__(self, host="127.0.0.1", port=11500, **app_options):
+        self.app = create_fake_ollama_app(**app_options)
+        self.url = f"http://{host}:{port}/api/generate"
+        config = uvicorn.Config(self.app, host=host, port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
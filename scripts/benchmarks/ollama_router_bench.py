@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import contextlib
+import time
+
+from scripts.benchmarks.fake_ollama import FakeOllamaServer
+from src.agent.ollama_router import OllamaRouter
+
+
+async def run_requests(router, requests, clients):
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(f"prompt {i}")
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            prompt = queue.get_nowait()
+            start = time.perf_counter()
+            await router.generate("phi4", prompt)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await router.aclose()
+    latencies.sort()
+    return elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generation throughput through the Ollama router with 1, 2 and 4 fake backends")
+    parser.add_argument("--backends", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--max-parallel", type=int, default=2, help="generations one fake backend runs at once")
+    parser.add_argument("--port", type=int, default=11520)
+    args = parser.parse_args()
+
+    print(f"{'backends':>8}{'wall s':>10}{'req/s':>10}{'tok/s':>10}{'p50 s':>10}{'p95 s':>10}")
+    for count in args.backends:
+        with contextlib.ExitStack() as stack:
+            servers = [stack.enter_context(FakeOllamaServer(port=args.port + i, num_tokens=args.tokens,
+                                                            token_delay=args.token_delay,
+                                                            max_parallel=args.max_parallel))
+                       for i in range(count)]
+            router = OllamaRouter([server.url for server in servers], max_concurrency=args.clients)
+            elapsed, latencies = asyncio.run(run_requests(router, args.requests, args.clients))
+        print(f"{count:>8}{elapsed:>10.2f}{args.requests / elapsed:>10.1f}{args.requests * args.tokens / elapsed:>10.0f}"
+              f"{latencies[len(latencies) // 2]:>10.2f}{latencies[int(len(latencies) * 0.95)]:>10.2f}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.ollama_router_bench
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+import time
+
+import requests
+
+from scripts.benchmarks.fake_ollama import FakeOllamaServer
+from src.agent.ollama_client import OllamaClient
+
+
+# Old behaviour: blocking requests inside an async generator (stalls the event loop)
+async def blocking_stream(url, prompt):
+    with requests.post(url, json={"model": "phi4", "prompt": prompt}, stream=True) as response:
+        for chunk in response.iter_lines(decode_unicode=True):
+            if chunk:
+                chunk_data = json.loads(chunk)
+                if "response" in chunk_data:
+                    yield chunk_data["response"]
+
+
+# Run one stream and record time-to-first-token (from the common start) and token count
+async def run_stream(stream, start):
+    first_token = None
+    tokens = 0
+    async for _ in stream:
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        tokens += 1
+    return first_token, tokens
+
+
+async def run_clients(mode, url, clients):
+    client = OllamaClient(api_url=url, max_concurrency=clients)
+    if mode == "async":
+        streams = [client.stream("phi4", f"prompt {i}") for i in range(clients)]
+    else:
+        streams = [blocking_stream(url, f"prompt {i}") for i in range(clients)]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_stream(s, start) for s in streams))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+
+    ttfts = sorted(r[0] for r in results)
+    tokens = sum(r[1] for r in results)
+    return {
+        "mode": mode,
+        "clients": clients,
+        "wall_s": elapsed,
+        "tokens_per_s": tokens / elapsed,
+        "ttft_p50_ms": ttfts[len(ttfts) // 2] * 1000,
+        "ttft_max_ms": ttfts[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel Ollama streams against a fake local server")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--modes", nargs="+", default=["blocking", "async"], choices=["blocking", "async"])
+    parser.add_argument("--port", type=int, default=11500)
+    args = parser.parse_args()
+
+    with FakeOllamaServer(port=args.port, num_tokens=args.tokens, token_delay=args.token_delay) as server:
+        print(f"{'mode':<10}{'clients':>8}{'wall s':>10}{'tok/s':>10}{'ttft p50 ms':>14}{'ttft max ms':>14}")
+        for mode in args.modes:
+            for clients in args.clients:
+                r = asyncio.run(run_clients(mode, server.url, clients))
+                print(f"{r['mode']:<10}{r['clients']:>8}{r['wall_s']:>10.2f}{r['tokens_per_s']:>10.0f}"
+                      f"{r['ttft_p50_ms']:>14.1f}{r['ttft_max_ms']:>14.1f}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.ollama_stream_bench
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import html
+import time
+
+from src.web.stream_renderer import IncrementalRenderer, render_history
+
+
+# Stand-in for a Streamlit element: every update serialises the whole element body
+# (as Streamlit does when it builds the ForwardMsg), so the cost is proportional to the text sent
+class Element:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def markdown(self, text, unsafe_allow_html=False):
+        self.stats["updates"] += 1
+        self.stats["bytes"] += len(text.encode("utf-8"))
+
+    write = markdown
+
+
+class Page(Element):
+    def empty(self):
+        return Element(self.stats)
+
+    def container(self):
+        return self
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_tokens(count):
+    # ~4 characters per token and a paragraph break every 80 tokens, like a long phi4 answer
+    return [f"сл{i % 97} " + ("\n\n" if i % 80 == 79 else "") for i in range(count)]
+
+
+def make_history(turns, answer_chars):
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Запитання {turn} про вступ до ВНТУ?"})
+        messages.append({"role": "agent", "content": "відповідь " * (answer_chars // 10)})
+    return messages
+
+
+def message_html(message):
+    return (f"<div style='text-align: right; background: #0078d7; color: white; padding: 10px; "
+            f"border-radius: 5px; margin: 10px 5px;'>{html.escape(message['content'])}</div>")
+
+
+# The old loop: the history is rendered twice per rerun, one element per message, and every token
+# joins the whole answer twice (length check and placeholder.write)
+def legacy(page, tokens, history, clock, tokens_per_second):
+    for _ in range(2):
+        for message in history:
+            page.markdown(f"<div style='text-align: right; background: #0078d7; color: white; padding: 10px; "
+                          f"border-radius: 5px; margin: 10px 5px;'>{message['content']}</div>", unsafe_allow_html=True)
+    placeholder = page.empty()
+    agent_response = []
+    for token in tokens:
+        clock.now += 1 / tokens_per_second
+        if len("".join(agent_response)) < 10 ** 9:
+            agent_response.append(token)
+            placeholder.write("".join(agent_response))
+    return "".join(agent_response)
+
+
+def incremental(page, tokens, history, clock, tokens_per_second, fps):
+    render_history(page, history, message_html)
+    renderer = IncrementalRenderer(page.container(), fps=fps, clock=clock)
+    for token in tokens:
+        clock.now += 1 / tokens_per_second
+        renderer.append(token)
+    renderer.flush()
+    return renderer.text
+
+
+def measure(run, repeats):
+    best = None
+    for _ in range(repeats):
+        stats = {"updates": 0, "bytes": 0}
+        start = time.process_time()
+        run(Page(stats), Clock())
+        cpu = time.process_time() - start
+        if best is None or cpu < best[0]:
+            best = (cpu, stats)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI-server CPU per session for one streamed answer")
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--history-turns", type=int, nargs="+", default=[0, 20])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    print(f"{'renderer':<14}{'history':>8}{'CPU ms':>10}{'updates':>10}{'MB sent':>10}")
+    for turns in args.history_turns:
+        runs = {
+            "legacy": lambda page, clock: legacy(page, tokens, make_history(turns, 2000), clock,
+                                                 args.tokens_per_second),
+            "incremental": lambda page, clock: incremental(page, tokens, make_history(turns, 2000), clock,
+                                                           args.tokens_per_second, args.fps),
+        }
+        for name, run in runs.items():
+            cpu, stats = measure(run, args.repeats)
+            print(f"{name:<14}{turns:>8}{cpu * 1000:>10.1f}{stats['updates']:>10}{stats['bytes'] / 2 ** 20:>10.2f}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.render_bench
+if __name__ == "__main__":
+    main()
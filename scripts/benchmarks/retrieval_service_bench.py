@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+
+from src.agent import retrieval_service
+from src.agent.text_normalization import LemmaCache
+
+
+# Cheap deterministic encoder, so the numbers show transport and serialisation cost rather than the model
+class HashingModel:
+    def __init__(self, dim):
+        self.dim = dim
+
+    def encode(self, texts):
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(self.dim) for t in texts], dtype="float32")
+
+
+# Synthetic corpus in the legacy layout: a flat FAISS index and the compact text store
+def build_corpus(corpus_dir, documents, dim):
+    import faiss
+
+    from src.agent.corpus_store import write_corpus
+
+    texts = [f"document {i} " + " ".join(f"word{(i * 7 + j) % 997}" for j in range(60)) for i in range(documents)]
+    index = faiss.IndexFlatL2(dim)
+    index.add(HashingModel(dim).encode(texts))
+    faiss.write_index(index, f"{corpus_dir}/vector_index.faiss")
+    write_corpus([{"url": f"https://vntu.edu.ua/{i}", "processed_text": text} for i, text in enumerate(texts)],
+                 corpus_dir)
+
+
+def use_synthetic_corpus(documents, dim):
+    from src.agent.multi_corpus import load_corpus_set
+
+    corpus_dir = tempfile.mkdtemp(prefix="retrieval-bench-")
+    build_corpus(corpus_dir, documents, dim)
+    retrieval_service.load_model = lambda: HashingModel(dim)
+    retrieval_service.load_index = lambda: load_corpus_set(f"bench={corpus_dir}")
+    retrieval_service.load_normalization = lambda: (set(), LemmaCache(lemmas={}))
+
+
+def percentiles_ms(latencies):
+    latencies = sorted(latencies)
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+# Baseline: the same search called in-process, without HTTP and JSON
+async def in_process(queries, k):
+    await retrieval_service.load_components()
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await retrieval_service.search_one(query, k, None)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def sequential_http(http, queries, k):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        http.post("/search", json={"query": query, "k": k}).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def concurrent_http(url, queries, k, clients):
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+
+    async with httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=clients)) as http:
+        async def client():
+            while not queue.empty():
+                (await http.post("/search", json={"query": queue.get_nowait(), "k": k})).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return time.perf_counter() - start
+
+
+def batch_http(http, queries, k, batch_size, format):
+    start = time.perf_counter()
+    size = 0
+    for first in range(0, len(queries), batch_size):
+        response = http.post("/search/batch", json={"queries": queries[first:first + batch_size], "k": k,
+                                                    "format": format})
+        response.raise_for_status()
+        size += len(response.content)
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request/response overhead of the retrieval service")
+    parser.add_argument("--corpora", default="", help="name=dir,... of real corpora (default: synthetic corpus)")
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    if args.corpora:
+        retrieval_service.CORPORA = args.corpora
+    else:
+        use_synthetic_corpus(args.documents, args.dim)
+    queries = [f"query {i} word{i % 997} word{(i * 13) % 997}" for i in range(args.queries)]
+
+    local = asyncio.run(in_process(queries, args.k))
+
+    server = uvicorn.Server(uvicorn.Config(retrieval_service.app, port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{args.port}"
+    with httpx.Client(base_url=url, timeout=60) as http:
+        while not server.started or http.get("/readyz").status_code != 200:
+            time.sleep(0.05)
+        # Unique queries per run, so the retrieval cache does not hide the search
+        remote = sequential_http(http, [f"{q} http" for q in queries], args.k)
+        concurrent_seconds = asyncio.run(concurrent_http(url, [f"{q} concurrent" for q in queries], args.k,
+                                                         args.clients))
+        batches = {format: batch_http(http, [f"{q} {format}" for q in queries], args.k, args.batch_size, format)
+                   for format in ("json", "npz")}
+    server.should_exit = True
+    thread.join()
+
+    print(f"{'mode':<28}{'p50 ms':>10}{'p95 ms':>10}{'q/s':>10}{'KB/query':>10}")
+    for name, latencies in (("in-process", local), ("HTTP /search, 1 client", remote)):
+        p50, p95 = percentiles_ms(latencies)
+        print(f"{name:<28}{p50:>10.2f}{p95:>10.2f}{len(latencies) / sum(latencies):>10.0f}{'':>10}")
+    print(f"{f'HTTP /search, {args.clients} clients':<28}{'':>10}{'':>10}{args.queries / concurrent_seconds:>10.0f}")
+    for format, (seconds, size) in batches.items():
+        print(f"{f'/search/batch {args.batch_size}, {format}':<28}{'':>10}{'':>10}{args.queries / seconds:>10.0f}"
+              f"{size / args.queries / 1024:>10.2f}")
+    overhead = statistics.median(remote) - statistics.median(local)
+    print(f"HTTP + JSON overhead per /search: {overhead * 1000:.2f} ms (median)")
+
+
+# Run from the repository root: python -m scripts.benchmarks.retrieval_service_bench
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+
+# Resident and proportional set size of the current process (PSS splits shared pages between processes)
+def memory_usage_mb():
+    usage = {"rss": 0.0, "pss": 0.0}
+    with open("/proc/self/smaps_rollup", "r") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+            if name.lower() in usage:
+                usage[name.lower()] = int(value.split()[0]) / 1024
+    return usage
+
+
+def load_legacy(index_dir, legacy_json):
+    import faiss
+
+    index = faiss.read_index(f"{index_dir}/vector_index.faiss")
+    with open(legacy_json, "r", encoding="utf-8") as file:
+        texts = json.load(file)
+    return index, texts
+
+
+def load_mmap(index_dir, legacy_json):
+    from src.agent.resources import load_corpus, load_faiss_index
+
+    return load_faiss_index(f"{index_dir}/vector_index.faiss"), load_corpus(index_dir)
+
+
+def worker(mode, index_dir, legacy_json, lookups, barrier, results):
+    start = time.perf_counter()
+    index, texts = (load_legacy if mode == "legacy" else load_mmap)(index_dir, legacy_json)
+    load_time = time.perf_counter() - start
+
+    # Touch the data the way requests do: a few searches and text lookups
+    rng = np.random.default_rng(os.getpid())
+    queries = rng.random((lookups, index.d), dtype="float32")
+    _, indices = index.search(queries, 5)
+    for idx in indices.ravel():
+        if idx >= 0:
+            texts[idx]
+
+    barrier.wait()  # all workers are alive at once, so shared pages are counted once
+    results.put({"load_s": load_time, **memory_usage_mb()})
+    barrier.wait()
+
+
+def run(mode, workers, index_dir, legacy_json, lookups):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, index_dir, legacy_json, lookups, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker startup time and memory for legacy vs mmap loading")
+    parser.add_argument("--index-dir", default="Data/processed/big")
+    parser.add_argument("--legacy-json", default="Data/processed/big_processed_results.json")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--lookups", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'workers':>8}{'load s':>10}{'RSS MB':>10}{'PSS MB':>10}{'total PSS MB':>14}")
+    for mode in ("legacy", "mmap"):
+        for workers in args.workers:
+            stats = run(mode, workers, args.index_dir, args.legacy_json, args.lookups)
+            mean = {key: sum(s[key] for s in stats) / len(stats) for key in stats[0]}
+            print(f"{mode:<8}{workers:>8}{mean['load_s']:>10.2f}{mean['rss']:>10.1f}{mean['pss']:>10.1f}"
+                  f"{sum(s['pss'] for s in stats):>14.1f}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.startup_bench
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+from collections import Counter
+from itertools import islice
+
+import stanza
+
+from scripts.data_processing.data_proc import tokenize_text, tokenize_texts
+from src.agent.corpus_store import read_records
+from src.agent.text_normalization import clean_text, fast_tokenize
+
+
+# Token-level F1 against the reference tokenization, summed over the corpus
+def token_agreement(reference, candidate):
+    common = predicted = expected = exact = 0
+    for ref_tokens, tokens in zip(reference, candidate):
+        common += sum((Counter(ref_tokens) & Counter(tokens)).values())
+        expected += len(ref_tokens)
+        predicted += len(tokens)
+        exact += ref_tokens == tokens
+    precision = common / predicted if predicted else 1.0
+    recall = common / expected if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return f1, exact / len(reference)
+
+
+def timed(function, texts):
+    start = time.perf_counter()
+    tokens = function(texts)
+    return tokens, len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-document stanza, batched stanza and the fast tokenizer")
+    parser.add_argument("--input", default="Data/raw/big_results.jsonl")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    records = islice(read_records(args.input), args.docs)
+    texts = [clean_text(record["cleaned_main_text"]) for record in records
+             if isinstance(record.get("cleaned_main_text"), str)]
+    nlp = stanza.Pipeline("uk", processors="tokenize", verbose=False)
+
+    reference, reference_rate = timed(lambda docs: [tokenize_text(text, nlp) for text in docs], texts)
+    rows = [("stanza per-doc", reference_rate, reference)]
+    for batch_size in args.batch_sizes:
+        tokens, rate = timed(lambda docs: tokenize_texts(docs, nlp, batch_size), texts)
+        rows.append((f"stanza batch={batch_size}", rate, tokens))
+    tokens, rate = timed(lambda docs: [fast_tokenize(text) for text in docs], texts)
+    rows.append(("fast regex", rate, tokens))
+
+    print(f"{len(texts)} documents")
+    print(f"{'tokenizer':<22}{'docs/s':>10}{'token F1':>10}{'exact docs':>12}")
+    for name, rate, tokens in rows:
+        f1, exact = token_agreement(reference, tokens)
+        print(f"{name:<22}{rate:>10.1f}{f1:>10.4f}{exact:>12.1%}")
+
+
+# Run from the repository root: python -m scripts.benchmarks.tokenizer_bench
+if __name__ == "__main__":
+    main()
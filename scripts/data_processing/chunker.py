@@ -0,0 +1,33 @@
+import argparse
+import json
+
+from src.agent.chunking import CHUNK_OVERLAP, CHUNK_TOKENS, chunk_records
+from src.agent.corpus_store import read_records
+
+# Етап між data_proc.py і vectorizer.py: сторінки з processed_text розбиваються на пасажі
+# з перекриттям, і кожен пасаж стає окремим вектором в індексі
+
+
+def chunk_jsonl(input_file, output_file, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    pages = passages = 0
+    with open(output_file, 'w', encoding='utf-8') as out:
+        for record in read_records(input_file):
+            pages += 1
+            for chunk in chunk_records([record], max_tokens, overlap):
+                out.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+                passages += 1
+    print(f"Сторінок: {pages}, пасажів: {passages}. Результат збережено у файл {output_file}")
+    return pages, passages
+
+
+# Запуск з кореня репозиторію: python -m scripts.data_processing.chunker,
+# далі python -m scripts.data_processing.vectorizer --data-path Data/processed/big_chunks.jsonl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Розбиття оброблених текстів на пасажі для векторизації")
+    parser.add_argument('--input', default='Data/processed/big_processed_results.jsonl')
+    parser.add_argument('--output', default='Data/processed/big_chunks.jsonl')
+    parser.add_argument('--max-tokens', type=int, default=CHUNK_TOKENS, help="слів у пасажі")
+    parser.add_argument('--overlap', type=int, default=CHUNK_OVERLAP, help="спільних слів сусідніх пасажів")
+    args = parser.parse_args()
+
+    chunk_jsonl(args.input, args.output, args.max_tokens, args.overlap)
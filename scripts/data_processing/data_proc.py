@@ -1,21 +1,22 @@
+import argparse
 import json
-import re
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import pandas as pd
 import stanza
 import pymorphy2
 
+from src.agent.corpus_store import read_records
+from src.agent.text_normalization import (
+    LEMMA_CACHE_PATH, LemmaCache, clean_text, extract_identifiers, fast_tokenize, load_stopwords, remove_stopwords,
+)
 
-# Завантаженн стоп
-def load_stopwords(filepath):
-    with open(filepath, 'r', encoding='utf-8') as file:
-        return set(word.strip() for word in file.readlines())
-
-
-# Очищення тексту
-def clean_text(text):
-    text = text.lower()
-    text = re.sub(r'[^а-яєґіїї\s]', '', text)  # Залишаємо тільки літери та пробіли
-    return text
+# Режими токенізації: stanza на кожен документ, stanza пакетами, швидкий regex
+TOKENIZERS = ('stanza', 'batch', 'fast')
 
 
 # Токенізація
@@ -24,13 +25,21 @@ def tokenize_text(text, nlp):
     return [word.text for sentence in doc.sentences for word in sentence.words]
 
 
-# Видалення стоп-слів
-def remove_stopwords(tokens, stopwords):
-    return [token for token in tokens if token not in stopwords]
+# Пакетна токенізація: stanza обробляє одразу batch_size документів, результати розбиваються назад
+def tokenize_texts(texts, nlp, batch_size=64):
+    tokens = [[] for _ in texts]
+    non_empty = [i for i, text in enumerate(texts) if text.strip()]
+    for batch in batched(non_empty, batch_size):
+        docs = nlp([stanza.Document([], text=texts[i]) for i in batch])
+        for i, doc in zip(batch, docs):
+            tokens[i] = [word.text for sentence in doc.sentences for word in sentence.words]
+    return tokens
 
 
-# Лематизація
+# Лематизація (через кеш лем, якщо його передано замість MorphAnalyzer)
 def lemmatize_tokens(tokens, morph):
+    if isinstance(morph, LemmaCache):
+        return morph.lemmatize_tokens(tokens)
     return [morph.parse(token)[0].normal_form for token in tokens]
 
 
@@ -43,6 +52,18 @@ def process_text(text, nlp, morph, stopwords):
     return ' '.join(lemmatized_text)
 
 
+# Обробка списку текстів з вибраним режимом токенізації
+def process_texts(texts, nlp, morph, stopwords, tokenizer='batch', batch_size=64):
+    cleaned_texts = [clean_text(text) for text in texts]
+    if tokenizer == 'fast':
+        token_lists = [fast_tokenize(text) for text in cleaned_texts]
+    elif tokenizer == 'batch':
+        token_lists = tokenize_texts(cleaned_texts, nlp, batch_size)
+    else:
+        token_lists = [tokenize_text(text, nlp) for text in cleaned_texts]
+    return [' '.join(lemmatize_tokens(remove_stopwords(tokens, stopwords), morph)) for tokens in token_lists]
+
+
 # Обробка DataFrame
 def process_dataframe(df, nlp, morph, stopwords):
     df['processed_text'] = df['cleaned_main_text'].apply(
@@ -52,26 +73,148 @@ def process_dataframe(df, nlp, morph, stopwords):
 
 
 # Завантаження JSON, обробка та збереження результату
-def process_json(input_file, output_file, stopwords_file):
+def process_json(input_file, output_file, stopwords_file, lemma_cache_path=LEMMA_CACHE_PATH):
     with open(input_file, 'r', encoding='utf-8') as file:
         data = json.load(file)
 
     df = pd.DataFrame(data)
     stopwords = load_stopwords(stopwords_file)
     nlp = stanza.Pipeline('uk', processors='tokenize')
-    morph = pymorphy2.MorphAnalyzer(lang='uk')
+    morph = LemmaCache.load(lemma_cache_path, morph=pymorphy2.MorphAnalyzer(lang='uk'))
 
     processed_df = process_dataframe(df, nlp, morph, stopwords)
 
     processed_df.to_json(output_file, orient='records', force_ascii=False, indent=4)
+    report_lemma_cache(morph, lemma_cache_path)
     print("Обробка завершена. Результат збережено у файл", output_file)
 
-if __name__ == "__main__":
-    # Завантаження даних
-    input_json = 'Data/raw/big_results.json'
-    output_json = 'Data/processed/big_processed_results.json'
-    stopwords_file = 'Data/stopwords_ua.txt'
 
-    process_json(input_json, output_json, stopwords_file)
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Збереження кешу лем і звіт про частку влучань
+def report_lemma_cache(lemmas, lemma_cache_path):
+    stats = lemmas.stats()
+    print(f"Кеш лем: влучань {stats['hits']}, промахів {stats['misses']}, "
+          f"частка влучань {stats['hit_rate']:.1%}, словоформ {stats['size']}")
+    if lemma_cache_path:
+        lemmas.save(lemma_cache_path)
+
+
+# Стан процесу-воркера: власні екземпляри stanza та pymorphy2 (з кешем лем)
+_worker = {}
+
+
+def init_worker(stopwords_file, lemma_cache_path=None, tokenizer='batch', batch_size=64):
+    _worker['stopwords'] = load_stopwords(stopwords_file)
+    _worker['morph'] = LemmaCache.load(lemma_cache_path, morph=pymorphy2.MorphAnalyzer(lang='uk'))
+    _worker['tokenizer'] = tokenizer
+    _worker['batch_size'] = batch_size
+    _worker['nlp'] = None
+    if tokenizer != 'fast':
+        import torch
+
+        # Кожен воркер займає одне ядро, без конкуренції потоків torch
+        torch.set_num_threads(1)
+        _worker['nlp'] = stanza.Pipeline('uk', processors='tokenize', verbose=False)
+
+
+# Повертає оброблені тексти та нові леми воркера, щоб зібрати спільний кеш у головному процесі
+def process_batch(texts):
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str)]
+    processed = [''] * len(texts)
+    results = process_texts([texts[i] for i in valid], _worker['nlp'], _worker['morph'], _worker['stopwords'],
+                            tokenizer=_worker['tokenizer'], batch_size=_worker['batch_size'])
+    for i, text in zip(valid, results):
+        processed[i] = text
+    return processed, _worker['morph'].drain()
+
+
+# Звіт про прогрес і пропускну здатність
+class ProgressReport:
+    def __init__(self, every=1000):
+        self.every = every
+        self.start = time.perf_counter()
+        self.read = 0
+        self.written = 0
+        self._next_report = every
+
+    def update(self, read, written):
+        self.read += read
+        self.written += written
+        if self.read >= self._next_report:
+            self._next_report += self.every
+            self.print()
+
+    def print(self):
+        elapsed = time.perf_counter() - self.start
+        print(f"Оброблено документів: {self.read}, збережено: {self.written}, "
+              f"{self.read / elapsed:.1f} док/с, {elapsed:.0f} с")
+
+
+# Потокова паралельна обробка: документи розподіляються між процесами пакетами,
+# результати записуються у вихідний JSON Lines у вихідному порядку.
+# Кількість пакетів в обробці обмежена, тому пам'ять не залежить від розміру краулу
+def process_jsonl(input_file, output_file, stopwords_file, workers=None, chunk_size=64, max_pending=None,
+                  report_every=1000, lemma_cache_path=LEMMA_CACHE_PATH, tokenizer='batch'):
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or workers * 4
+    progress = ProgressReport(report_every)
+    lemmas = LemmaCache.load(lemma_cache_path)
+    pending = deque()
+
+    def write_result(item, out):
+        urls, identifiers, future = item
+        texts, (new_lemmas, hits, misses) = future.result()
+        lemmas.merge(new_lemmas, hits, misses)
+        # URL сторінки потрібен vectorizer.py для інкрементальної переіндексації,
+        # ідентифікатори (латиниця, цифри) — лексичному індексу
+        processed = []
+        for url, ids, text in zip(urls, identifiers, texts):
+            if text.strip() == '':
+                continue
+            record = {'url': url, 'processed_text': text} if url else {'processed_text': text}
+            if ids:
+                record['identifiers'] = ids
+            processed.append(record)
+        for record in processed:
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        progress.update(len(texts), len(processed))
+
+    initargs = (stopwords_file, lemma_cache_path, tokenizer, chunk_size)
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs) as pool, \
+            open(output_file, 'w', encoding='utf-8') as out:
+        for chunk in batched(read_records(input_file), chunk_size):
+            pending.append(([record.get('url') for record in chunk],
+                            [extract_identifiers(record.get('cleaned_main_text') or '') for record in chunk],
+                            pool.submit(process_batch, [record.get('cleaned_main_text') for record in chunk])))
+            if len(pending) >= max_pending:
+                write_result(pending.popleft(), out)
+        while pending:
+            write_result(pending.popleft(), out)
+
+    progress.print()
+    report_lemma_cache(lemmas, lemma_cache_path)
+    print("Обробка завершена. Результат збережено у файл", output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обробка текстів краулу для векторизації")
+    parser.add_argument('--input', default='Data/raw/big_results.jsonl')
+    parser.add_argument('--output', default='Data/processed/big_processed_results.jsonl')
+    parser.add_argument('--stopwords', default='Data/stopwords_ua.txt')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=64,
+                        help="документів у пакеті для воркера (і для пакетної stanza)")
+    parser.add_argument('--tokenizer', default='batch', choices=TOKENIZERS)
+    parser.add_argument('--lemma-cache', default=LEMMA_CACHE_PATH,
+                        help="файл кешу лем між запусками (порожній рядок — не зберігати)")
+    args = parser.parse_args()
+
+    process_jsonl(args.input, args.output, args.stopwords, workers=args.workers, chunk_size=args.chunk_size,
+                  lemma_cache_path=args.lemma_cache, tokenizer=args.tokenizer)
 
     print("Обробка завершена. Результат збережено!")
@@ -1,22 +1,41 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import faiss  # For efficientvecto search
+import argparse
+import hashlib
 import json
 import os
+import shutil
+import time
 
+from src.agent.corpus_store import CorpusStore, read_records, write_corpus
+from src.agent.embedding_backend import PARITY_MIN_COSINE, export_onnx, load_embedding_model, parity_report
+from src.agent.lexical_index import build_lexical_index
+from src.agent.resources import (
+    INDEX_CONFIG_FILE, VERSIONS_DIR, current_version, load_faiss_index, publish_version, resolve_index_dir,
+)
+
+MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+# Per-version document table: document key -> FAISS id and content hash
+MANIFEST_FILE = "manifest.json"
+
+# Supported index types and their default build/search parameters
+INDEX_DEFAULTS = {
+    "flat": {},
+    "hnsw": {"M": 32, "efConstruction": 200, "efSearch": 64},
+    "ivf_flat": {"nlist": 256, "nprobe": 16},
+    "ivf_pq": {"nlist": 256, "nprobe": 16, "pq_m": 16, "pq_bits": 8},
+}
 
 
 # Load and processdata
 def load_data(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        data = json.load(file)
-
     # Extract texts from the dataset
-    return [item['processed_text'] for item in data]
+    return [item['processed_text'] for item in read_records(file_path)]
 
 
 # Generate text embeddings
-def generate_embeddings(texts, model_name='sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'):
+def generate_embeddings(texts, model_name=MODEL_NAME):
     print(f"Loading model: {model_name}")
     model = SentenceTransformer(model_name)
     print("Model loaded. Generating embeddings...")
@@ -24,52 +43,267 @@ def generate_embeddings(texts, model_name='sentence-transformers/paraphrase-mult
     return embeddings, model
 
 
+# Merge user overrides with defaults and clamp them to what the data can support
+def resolve_index_params(index_type, num_vectors, overrides=None):
+    params = dict(INDEX_DEFAULTS[index_type])
+    params.update({key: value for key, value in (overrides or {}).items() if key in params})
+    if "nlist" in params:
+        # FAISS wants roughly 39 training points per centroid
+        params["nlist"] = max(1, min(params["nlist"], num_vectors // 39))
+        params["nprobe"] = min(params["nprobe"], params["nlist"])
+    if "pq_bits" in params:
+        # Each PQ codebook has 2**pq_bits centroids and needs at least that many training points
+        max_bits = max(1, num_vectors.bit_length() - 1)
+        if params["pq_bits"] > max_bits:
+            print(f"Only {num_vectors} vectors: reducing pq_bits from {params['pq_bits']} to {max_bits}")
+            params["pq_bits"] = max_bits
+    return params
+
+
+# Create (and train, if needed) an empty FAISS index
+def new_faiss_index(embeddings, index_type="flat", params=None):
+    embeddings = np.asarray(embeddings, dtype="float32")
+    dim = embeddings.shape[1]
+    params = params if params is not None else resolve_index_params(index_type, len(embeddings))
+
+    if index_type == "flat":
+        # IndexFlatL2 uses Euclidean distance (exact search)
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["efConstruction"]
+        index.hnsw.efSearch = params["efSearch"]
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, params["nlist"])
+        index.train(embeddings)
+        index.nprobe = params["nprobe"]
+    elif index_type == "ivf_pq":
+        # Product quantization compresses each vector to pq_m * pq_bits bits
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["pq_m"], params["pq_bits"])
+        index.train(embeddings)
+        index.nprobe = params["nprobe"]
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    return index
+
+
 # Create a FAISS index
-def create_faiss_index(embeddings):
-    # IndexFlatL2 uses Euclidean distance
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(embeddings)
+def create_faiss_index(embeddings, index_type="flat", params=None):
+    index = new_faiss_index(embeddings, index_type, params)
+    index.add(np.asarray(embeddings, dtype="float32"))
     return index
 
 
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Stable document identity: the page URL, or the text itself for records without one.
+# Passages from chunker.py are keyed by their parent page and position in it
+def document_key(record):
+    if "chunk" in record and record.get("parent"):
+        return f"{record['parent']}#{record['chunk']}"
+    return record.get("url") or "sha1:" + content_hash(record["processed_text"])
+
+
+def load_manifest(version_dir):
+    path = os.path.join(version_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Compare the new records with the previous version: added, modified and removed document keys
+def plan_changes(records, manifest):
+    previous = manifest["documents"] if manifest else {}
+    current = {}
+    for record in records:
+        text = record.get("processed_text") or ""
+        if text.strip():
+            current[document_key(record)] = (record, content_hash(text))
+
+    added = [key for key in current if key not in previous]
+    modified = [key for key, (_, digest) in current.items() if key in previous and previous[key]["hash"] != digest]
+    removed = [key for key in previous if key not in current]
+    return current, added, modified, removed
+
+
+def load_or_create_model(corpus_dir, model_name=MODEL_NAME):
+    model_path = f"{corpus_dir}/sentence_transformer_model"
+    if os.path.exists(model_path):
+        return SentenceTransformer(model_path)
+    model = SentenceTransformer(model_name)
+    model.save(model_path)
+    return model
+
+
+# Keep the newest versions; older ones are only needed by agents that have not reloaded yet
+def prune_versions(corpus_dir, keep=3):
+    versions_dir = os.path.join(corpus_dir, VERSIONS_DIR)
+    active = current_version(corpus_dir)
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+    for name in versions[:-keep]:
+        if name != active:
+            shutil.rmtree(os.path.join(versions_dir, name))
+
+
+# Incremental re-indexing: encode only added or modified documents, drop removed ones,
+# and atomically publish the result as a new version of the corpus directory
+def update_index(records, corpus_dir, index_type="flat", overrides=None, full=False, model_name=MODEL_NAME,
+                 keep_versions=3):
+    previous_dir = resolve_index_dir(corpus_dir)
+    manifest = None if full else load_manifest(previous_dir)
+    if manifest and (manifest["model"] != model_name or manifest["index_type"] != index_type):
+        print("Model or index type changed, rebuilding from scratch.")
+        manifest = None
+
+    current, added, modified, removed = plan_changes(records, manifest)
+    print(f"Documents: {len(current)} (added {len(added)}, modified {len(modified)}, removed {len(removed)})")
+    if manifest and not (added or modified or removed):
+        print("No changes, keeping the current version.")
+        return previous_dir
+
+    documents = {key: dict(value) for key, value in manifest["documents"].items()} if manifest else {}
+    next_id = manifest["next_id"] if manifest else 0
+    stale_ids = [documents.pop(key)["id"] for key in removed] + [documents[key]["id"] for key in modified]
+    for key in added:
+        documents[key] = {"id": next_id}
+        next_id += 1
+    for key in added + modified:
+        documents[key]["hash"] = current[key][1]
+
+    to_encode = added + modified
+    new_ids = np.array([documents[key]["id"] for key in to_encode], dtype="int64")
+    model = load_or_create_model(corpus_dir, model_name)
+    print(f"Encoding {len(to_encode)} documents...")
+    new_vectors = np.asarray(model.encode([current[key][0]["processed_text"] for key in to_encode],
+                                          show_progress_bar=True), dtype="float32")
+    dim = model.get_sentence_embedding_dimension()
+
+    # Embedding rows are addressed by document id; rows of removed documents are zeroed
+    embeddings = np.zeros((next_id, dim), dtype="float32")
+    if manifest:
+        previous_embeddings = np.load(f"{previous_dir}/embeddings.npy", mmap_mode="r")
+        embeddings[:len(previous_embeddings)] = previous_embeddings
+        embeddings[stale_ids] = 0
+    if len(new_ids):
+        embeddings[new_ids] = new_vectors
+    live_ids = np.array(sorted(doc["id"] for doc in documents.values()), dtype="int64")
+
+    if manifest and (index_type != "hnsw" or not stale_ids):
+        # Update the previous index in place (HNSW cannot remove vectors, so it is rebuilt instead)
+        params = manifest["params"]
+        index = faiss.read_index(f"{previous_dir}/vector_index.faiss")
+        if stale_ids:
+            index.remove_ids(np.array(stale_ids, dtype="int64"))
+        if len(new_ids):
+            index.add_with_ids(new_vectors, new_ids)
+    else:
+        params = resolve_index_params(index_type, len(live_ids), overrides)
+        index = faiss.IndexIDMap2(new_faiss_index(embeddings[live_ids], index_type, params))
+        index.add_with_ids(embeddings[live_ids], live_ids)
+
+    # Corpus records are stored at their id; removed documents leave a null slot
+    corpus = [None] * next_id
+    for key, (record, _) in current.items():
+        corpus[documents[key]["id"]] = record
+
+    version = time.strftime("%Y%m%d-%H%M%S")
+    while os.path.exists(os.path.join(corpus_dir, VERSIONS_DIR, version)):
+        version += "a"
+    build_dir = os.path.join(corpus_dir, VERSIONS_DIR, f".{version}.tmp")
+    os.makedirs(build_dir)
+
+    print(f"Saving version {version}...")
+    faiss.write_index(index, f"{build_dir}/vector_index.faiss")
+    with open(f"{build_dir}/{INDEX_CONFIG_FILE}", "w", encoding="utf-8") as file:
+        json.dump({"index_type": index_type, "params": params}, file, indent=4)
+    np.save(f"{build_dir}/embeddings.npy", embeddings)
+    write_corpus(corpus, build_dir)
+    # BM25 inverted index over the same ids; cheap to rebuild, so it is rebuilt for every version
+    build_lexical_index(corpus, build_dir)
+    with open(f"{build_dir}/{MANIFEST_FILE}", "w", encoding="utf-8") as file:
+        json.dump({"version": version, "model": model_name, "index_type": index_type, "params": params,
+                   "next_id": next_id, "documents": documents}, file, ensure_ascii=False)
+
+    version_dir = publish_version(corpus_dir, build_dir, version)
+    prune_versions(corpus_dir, keep_versions)
+    print(f"Published version {version}.")
+    return version_dir
+
+
+# Export the saved model to ONNX (and int8 ONNX) for the agents' EMBEDDING_BACKEND,
+# then check every fast backend against the original PyTorch model on a corpus sample
+def export_query_model(corpus_dir, quantization_config="avx512_vnni", sample_size=500, k=10, seed=0):
+    model_path = f"{corpus_dir}/sentence_transformer_model"
+    print(f"Exporting {model_path} to ONNX...")
+    export_onnx(model_path, quantization_config)
+
+    index_dir = resolve_index_dir(corpus_dir)
+    texts = CorpusStore(index_dir)
+    live_ids = [i for i in range(len(texts)) if texts[i] is not None]
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(live_ids, size=min(sample_size, len(live_ids)), replace=False)
+    sample_texts = [texts[i]["processed_text"] for i in sample]
+    corpus_embeddings = np.load(f"{index_dir}/embeddings.npy", mmap_mode="r")[live_ids]
+
+    reference = load_embedding_model(model_path, "torch")
+    backends = ["torch-int8", "onnx"] + (["onnx-int8"] if quantization_config else [])
+    reports = {}
+    for backend in backends:
+        report = parity_report(reference, load_embedding_model(model_path, backend), sample_texts, k,
+                               corpus_embeddings)
+        reports[backend] = report
+        status = "ok" if report["mean_cosine"] >= PARITY_MIN_COSINE else "BELOW THRESHOLD"
+        print(f"{backend:<12} mean cosine {report['mean_cosine']:.4f}, min {report['min_cosine']:.4f}, "
+              f"recall@{k} {report[f'recall@{k}']:.3f}  {status}")
+    return reports
+
+
 # Perform semantic search
 def find_similar_texts(query, model, index, texts, k=5):
     query_vector = model.encode([query])
     distances, indices = index.search(query_vector, k)
-    return [(texts[i], distances[0][idx]) for idx, i in enumerate(indices[0])]
+    # FAISS pads with -1 when it finds fewer than k vectors
+    return [(texts[i]["processed_text"], distances[0][idx]) for idx, i in enumerate(indices[0]) if i >= 0]
 
 # Save embeddings and index
-def save_vector_data(embeddings, texts, index, model, output_dir="Data/processed"):
+def save_vector_data(embeddings, texts, index, model, output_dir="Data/processed", index_config=None):
     os.makedirs(output_dir, exist_ok=True)
 
     print("Saving FAISS index...")
     faiss.write_index(index, f"{output_dir}/vector_index.faiss")
+    with open(f"{output_dir}/{INDEX_CONFIG_FILE}", "w", encoding="utf-8") as file:
+        json.dump(index_config or {"index_type": "flat", "params": {}}, file, indent=4)
 
     print("Saving embeddings...")
     np.save(f"{output_dir}/embeddings.npy", embeddings)
 
+    # Records keep the shape of *_processed_results.json, so the agents can read them by id
     print("Saving texts...")
-    with open(f"{output_dir}/texts.json", "w", encoding="utf-8") as file:
-        json.dump(texts, file, ensure_ascii=False, indent=4)
+    write_corpus(({"processed_text": text} if isinstance(text, str) else text for text in texts), output_dir)
 
     print("Saving model...")
     model.save(f"{output_dir}/sentence_transformer_model")
 
     print("All data saved successfully.")
 
-# Load model, texts, and FAISS index
+# Load model, texts, and FAISS index (of the current version, if the directory is versioned)
 def load_vector_data(output_dir="Data/processed"):
     print("Loading data...")
+    index_dir = resolve_index_dir(output_dir)
 
     print("Loading FAISS index...")
-    index = faiss.read_index(f"{output_dir}/vector_index.faiss")
+    index = load_faiss_index(f"{index_dir}/vector_index.faiss")
 
     print("Loading embeddings...")
-    embeddings = np.load(f"{output_dir}/embeddings.npy")
+    embeddings = np.load(f"{index_dir}/embeddings.npy", mmap_mode="r")
 
     print("Loading texts...")
-    with open(f"{output_dir}/texts.json", "r", encoding="utf-8") as file:
-        texts = json.load(file)
+    texts = CorpusStore(index_dir)
 
     print("Loading model...")
     model = SentenceTransformer(f"{output_dir}/sentence_transformer_model")
@@ -88,26 +322,104 @@ def evaluate_vectorizer(query, model, index, texts, k=5):
         print(f"Distance: {distance}")
 
 
-# Main execution
+# Compare index types against the exact flat index: recall@k, build time, size and QPS
+def benchmark_indexes(embeddings, index_types, k=10, num_queries=1000, overrides=None, seed=0):
+    embeddings = np.asarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+    # Perturb sampled corpus vectors so queries do not trivially match themselves
+    queries = embeddings[sample] + rng.normal(0, 0.01, size=(len(sample), embeddings.shape[1])).astype("float32")
+
+    ground_truth = None
+    results = []
+    for index_type in ["flat"] + [t for t in index_types if t != "flat"]:
+        params = resolve_index_params(index_type, len(embeddings), overrides)
+        start = time.perf_counter()
+        index = create_faiss_index(embeddings, index_type, params)
+        build_time = time.perf_counter() - start
+
+        # QPS for one query at a time, like the agents search
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query[None, :], k)
+        qps = len(queries) / (time.perf_counter() - start)
+        _, found = index.search(queries, k)
+
+        if ground_truth is None:
+            ground_truth = found
+        recall = np.mean([len(set(f) & set(g)) / k for f, g in zip(found, ground_truth)])
+        results.append({
+            "index_type": index_type,
+            "params": params,
+            f"recall@{k}": float(recall),
+            "build_s": build_time,
+            "size_mb": faiss.serialize_index(index).nbytes / 2 ** 20,
+            "qps": qps,
+        })
+    return results
+
+
+def print_benchmark(results, k):
+    print(f"{'index':<10}{'recall@' + str(k):>10}{'build s':>10}{'size MB':>10}{'QPS':>10}  params")
+    for r in results:
+        print(f"{r['index_type']:<10}{r[f'recall@{k}']:>10.3f}{r['build_s']:>10.2f}{r['size_mb']:>10.1f}"
+              f"{r['qps']:>10.0f}  {r['params']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the FAISS vector index for processed texts")
+    parser.add_argument("--data-path", default="Data/processed/big_processed_results.jsonl")
+    parser.add_argument("--output-dir", default="Data/processed/big")
+    parser.add_argument("--index-type", default="flat", choices=sorted(INDEX_DEFAULTS))
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--nprobe", type=int)
+    parser.add_argument("--M", type=int)
+    parser.add_argument("--ef-search", dest="efSearch", type=int)
+    parser.add_argument("--pq-m", dest="pq_m", type=int)
+    parser.add_argument("--full", action="store_true", help="re-encode everything instead of only changed documents")
+    parser.add_argument("--keep-versions", type=int, default=3)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="benchmark all index types on the saved embeddings instead of building")
+    parser.add_argument("--export-onnx", action="store_true",
+                        help="export the saved model to ONNX / int8 ONNX and run the parity check")
+    parser.add_argument("--quantization", default="avx512_vnni",
+                        help="ONNX dynamic quantization config (avx2, avx512, avx512_vnni, arm64; empty to skip)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    return parser.parse_args()
+
+
+# Main execution (from the repository root: python -m scripts.data_processing.vectorizer)
 if __name__ == "__main__":
+    args = parse_args()
+    overrides = {key: value for key, value in vars(args).items()
+                 if key in ("nlist", "nprobe", "M", "efSearch", "pq_m") and value is not None}
+
+    if args.benchmark:
+        index_dir = resolve_index_dir(args.output_dir)
+        embeddings = np.load(f"{index_dir}/embeddings.npy", mmap_mode="r")
+        manifest = load_manifest(index_dir)
+        if manifest:
+            # Skip the zeroed rows of removed documents
+            embeddings = embeddings[sorted(doc["id"] for doc in manifest["documents"].values())]
+        print_benchmark(benchmark_indexes(embeddings, list(INDEX_DEFAULTS), args.k, args.queries, overrides), args.k)
+        raise SystemExit
+
+    if args.export_onnx:
+        export_query_model(args.output_dir, args.quantization, k=args.k)
+        raise SystemExit
+
     # Paths and settings
-    data_path = "Data/processed/big_processed_results.json"
-    output_dir = "Data/processed/big"
+    data_path = args.data_path
+    output_dir = args.output_dir
 
     # Load dataset
     print("Loading dataset...")
-    texts = load_data(data_path)
-    print("Dataset loaded successfully. Number of texts:", len(texts))
-
-    # Generate embeddings using multilingual model
-    embeddings, model = generate_embeddings(texts,
-                                            model_name='sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-
-    # Create vector index
-    index = create_faiss_index(embeddings)
+    records = list(read_records(data_path))
+    print("Dataset loaded successfully. Number of texts:", len(records))
 
-    # Save vectorizer data
-    save_vector_data(embeddings, texts, index, model, output_dir=output_dir)
+    # Encode new or changed documents and publish a new index version
+    update_index(records, output_dir, args.index_type, overrides, full=args.full, keep_versions=args.keep_versions)
 
     # Load vectorizer data (for testing)
     embeddings, texts, index, model = load_vector_data(output_dir=output_dir)
@@ -0,0 +1,167 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from src.agent.metrics import Counter, Gauge, Histogram
+
+# Ліміти за замовчуванням: одночасних генерацій, місць у черзі та найдовше очікування (с)
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get("ADMISSION_MAX_CONCURRENCY", "4"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", "20"))
+# Ліміти для окремих моделей: "phi4=2/16/30,llama3=4/32/20" (одночасно/черга/очікування)
+ADMISSION_MODEL_LIMITS = os.environ.get("ADMISSION_MODEL_LIMITS", "")
+
+QUEUE_DEPTH = Gauge("agent_admission_queue_depth", "Requests waiting for a generation slot", ("model",))
+ACTIVE = Gauge("agent_admission_active", "Generations holding a slot", ("model",))
+WAIT_SECONDS = Histogram("agent_admission_wait_seconds", "Time spent queueing for a generation slot", ("model",))
+REJECTIONS = Counter("agent_admission_rejections_total", "Requests rejected by admission control",
+                     ("model", "reason"))
+
+
+def parse_model_limits(spec):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, values = item.partition("=")
+        concurrency, queue, wait = values.split("/")
+        limits[model.strip()] = (int(concurrency), int(queue), float(wait))
+    return limits
+
+
+# Відмова в обслуговуванні: 429 — черга заповнена, 503 — слот не звільниться вчасно
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# Слот генерації; release можна викликати кілька разів (з генератора і з фонового завдання)
+class AdmissionSlot:
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release(time.monotonic() - self._acquired_at)
+
+
+# Обмежувач одночасних генерацій однієї моделі з чергою FIFO: запити отримують слот
+# у порядку надходження, а надлишок відхиляється одразу, а не чекає до тайм-ауту
+class AdmissionLimiter:
+    def __init__(self, model, max_concurrency=ADMISSION_MAX_CONCURRENCY, max_queue=ADMISSION_MAX_QUEUE,
+                 max_wait=ADMISSION_MAX_WAIT):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters = deque()
+        # Ковзне середнє тривалості генерації для оцінки очікування і Retry-After
+        self.mean_service = None
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "overloaded": 0, "timeout": 0}
+        self.total_wait = 0.0
+
+    # Оцінка очікування для позиції position у черзі (None, поки немає жодної завершеної генерації)
+    def estimated_wait(self, position):
+        if self.mean_service is None:
+            return None
+        return (position // self.max_concurrency + 1) * self.mean_service
+
+    def _retry_after(self):
+        estimate = self.estimated_wait(len(self._waiters))
+        return max(1, math.ceil(estimate if estimate is not None else self.max_wait))
+
+    def _reject(self, status_code, reason):
+        self.rejected[reason] += 1
+        REJECTIONS.inc(model=self.model, reason=reason)
+        raise AdmissionRejected(status_code, reason, self._retry_after())
+
+    async def acquire(self):
+        start = time.monotonic()
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self._reject(429, "queue_full")
+            estimate = self.estimated_wait(len(self._waiters))
+            if estimate is not None and estimate > self.max_wait:
+                self._reject(503, "overloaded")
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            QUEUE_DEPTH.inc(model=self.model)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+            except asyncio.TimeoutError:
+                # Слот міг звільнитися в ту саму мить, коли сплив час очікування
+                if not waiter.done():
+                    self._waiters.remove(waiter)
+                    self._reject(503, "timeout")
+            except asyncio.CancelledError:
+                # Клієнт пішов з черги; якщо слот уже передано, повертаємо його
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done():
+                    self._release(None)
+                raise
+            finally:
+                QUEUE_DEPTH.dec(model=self.model)
+
+        wait = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += wait
+        WAIT_SECONDS.observe(wait, model=self.model)
+        ACTIVE.inc(model=self.model)
+        return AdmissionSlot(self)
+
+    def _release(self, service_seconds):
+        if service_seconds is not None:
+            self.mean_service = service_seconds if self.mean_service is None else \
+                0.8 * self.mean_service + 0.2 * service_seconds
+            ACTIVE.dec(model=self.model)
+        # Слот переходить першому в черзі, лічильник active не змінюється
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self):
+        return {
+            "model": self.model,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "mean_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            "mean_generation_seconds": self.mean_service,
+        }
+
+
+# Обмежувачі для кожної моделі Ollama (створюються при першому запиті до моделі)
+class AdmissionControl:
+    def __init__(self, model_limits=ADMISSION_MODEL_LIMITS):
+        self.model_limits = parse_model_limits(model_limits) if isinstance(model_limits, str) else model_limits
+        self._limiters = {}
+
+    def limiter(self, model):
+        if model not in self._limiters:
+            self._limiters[model] = AdmissionLimiter(model, *self.model_limits.get(model, ()))
+        return self._limiters[model]
+
+    async def acquire(self, model):
+        return await self.limiter(model).acquire()
+
+    def stats(self):
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
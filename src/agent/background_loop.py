@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+
+# Один event loop у фоновому потоці на весь процес (для Streamlit, де кожен перезапуск скрипта
+# інакше викликав би asyncio.run з новим циклом). Асинхронні клієнти, що працюють у ньому,
+# зберігають пул з'єднань між запитами і сесіями, а потоки скриптів чекають результатів синхронно
+class BackgroundLoop:
+    def __init__(self, name="background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    # Виконати корутину в циклі і дочекатися результату
+    def run(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    # Запустити корутину в циклі без очікування; помилка лише записується в лог
+    def submit(self, coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(self._report)
+        return future
+
+    @staticmethod
+    def _report(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Background task failed: {future.exception()}")
+
+    # Синхронний ітератор над асинхронним генератором (наприклад, стрімом Ollama).
+    # Якщо споживач зупинився раніше, генератор закривається в циклі — стрім до Ollama теж
+    def iterate(self, generator):
+        try:
+            while True:
+                try:
+                    yield self.run(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(generator.aclose())
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
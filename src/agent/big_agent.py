@@ -1,59 +1,170 @@
 import asyncio
-import json
-import requests
+import html
 import streamlit as st
 import os
 
 # Підключення до зовнішнього FAISS-індексу та моделі SentenceTransform
-from sentence_transformers import SentenceTransformer
-import faiss
-
-
-OLLAMA_API_URL = "http://127.0.0.1:11434/api/generate"  # Ендпоінт Ollama
-FAISS_INDEX_PATH = "Data/processed/big/vector_index.faiss"
-MODEL_PATH = "Data/processed/big/sentence_transformer_model"
+from src.agent.ollama_client import OllamaError
+from src.agent.ollama_router import create_ollama_client
+from src.agent.background_loop import BackgroundLoop
+from src.agent.cache import create_retrieval_cache
+from src.agent.context_packer import ContextPacker
+from src.agent.conversation import ConversationMemory, create_summarizer
+from src.agent.embedding_backend import load_embedding_model
+from src.agent.hybrid import dense_k, fuse_results, lexical_candidates, query_terms
+from src.agent.multi_corpus import AGENT_CORPORA, load_corpus_set, merge_results, shared_model_path
+from src.agent.reranker import RERANK_CANDIDATES, create_reranker
+from src.agent.retrieval_client import RETRIEVAL_SERVICE_URL, RetrievalServiceClient
+from src.agent.startup import Startup
+from src.agent.text_normalization import LemmaCache, load_stopwords, normalize_for_search
+from src.web.stream_renderer import IncrementalRenderer, render_history
+
+
+# Корпуси для пошуку (AGENT_CORPORA, напр. "big=Data/processed/big,wiki=Data/processed/wiki")
+CORPORA = AGENT_CORPORA or "big=Data/processed/big"
+MODEL_PATH = shared_model_path(CORPORA)
 
 os.environ["STREAMLIT_WATCH_FILE"] = "false"
 
 
-# Завантаження моделі та FAISS індексу
+# Завантаження моделі та FAISS індексів корпусів паралельно, з часом кожного компонента в лозі
+# (індекси і тексти перезавантажуються у фоні з новою версією)
 @st.cache_resource
 def load_resources():
-    print("Loading model and index...")
-    model = SentenceTransformer(MODEL_PATH)
-    index = faiss.read_index(FAISS_INDEX_PATH)
-    with open("Data/processed/big_processed_results.json", "r", encoding="utf-8") as f:
-        texts = json.load(f)
-    return model, index, texts
+    print("Loading model and indexes...")
+    startup = Startup()
+    loaded = asyncio.run(startup.load(
+        model=lambda: load_embedding_model(MODEL_PATH),  # Бекенд задає EMBEDDING_BACKEND
+        index=lambda: load_corpus_set(CORPORA),
+    ))
+    corpora = loaded["index"]
+    corpora.start_watching()
+    startup.mark_ready()
+    return loaded["model"], corpora
+
+
+# Спільний event loop для всіх сесій: клієнт Ollama працює лише в ньому, тож пул з'єднань
+# переживає перезапуски скрипта, а сесії не підміняють одна одній пул і семафор
+@st.cache_resource
+def get_event_loop():
+    return BackgroundLoop(name="ollama-loop")
+
+
+# Клієнт Ollama зберігається між перезапусками скрипта Streamlit
+@st.cache_resource
+def get_ollama_client():
+    return create_ollama_client()  # Маршрутизатор, якщо в OLLAMA_API_URLS кілька хостів
+
+
+# Кеш результатів пошуку спільний для всіх сесій Streamlit
+@st.cache_resource
+def get_retrieval_cache(_corpora):
+    return create_retrieval_cache(fingerprint=_corpora.version)
+
+
+# Стоп-слова та кеш лем для нормалізації запитів так само, як оброблявся корпус
+@st.cache_resource
+def get_query_normalization():
+    return load_stopwords("Data/stopwords_ua.txt"), LemmaCache.load(preload_morph=True)
 
 
-model, index, texts = load_resources()
+# Пакувальник контексту спільний для всіх сесій (разом зі статистикою токенів)
+@st.cache_resource
+def get_context_packer():
+    return ContextPacker()
+
+
+# Переранжувальник (якщо задано RERANKER_MODEL) спільний для всіх сесій
+@st.cache_resource
+def get_reranker():
+    return create_reranker()
 
 
-# *** Допоміжна функція: Запит до FAISS ***
-def find_similar_texts(query, k=5):
-    query_embedding = model.encode([query])
-    distances, indices = index.search(query_embedding, k)
-    # Повертаємо найближчі сусіди
-    results = [{"text": texts[idx], "distance": float(distance)} for idx, distance in zip(indices[0], distances[0])]
+# Клієнт окремого сервісу пошуку (RETRIEVAL_SERVICE_URL) спільний для всіх сесій
+@st.cache_resource
+def get_search_client():
+    return RetrievalServiceClient()
+
+
+# Список корпусів сервісу пошуку, кешований на хвилину, а не HTTP-запит на кожен перезапуск скрипта
+@st.cache_data(ttl=60)
+def get_remote_corpora():
+    return get_search_client().corpora()
+
+
+if RETRIEVAL_SERVICE_URL:
+    # Модель та індекси живуть в окремому теплому сервісі пошуку, а не в кожному процесі Streamlit
+    search_client = get_search_client()
+    try:
+        available_corpora = get_remote_corpora()
+    except Exception as e:
+        # Сервіс недоступний або ще стартує (503): сторінка працює, пошук іде в усіх корпусах сервісу
+        st.error(f"Сервіс пошуку недоступний: {e}")
+        available_corpora = []
+else:
+    search_client = None
+    model, corpora = load_resources()
+    retrieval_cache = get_retrieval_cache(corpora)
+    stopwords, lemma_cache = get_query_normalization()
+    available_corpora = corpora.names
+event_loop = get_event_loop()
+ollama_client = get_ollama_client()
+context_packer = get_context_packer()
+reranker = get_reranker()
+
+
+# *** Допоміжна функція: Запит до FAISS у вибраних корпусах у цьому процесі ***
+def search_local(query, candidates_k, corpus_names=None):
+    search_query = normalize_for_search(query, lemma_cache, stopwords) or query
+    snapshot = corpora.snapshot()  # Одна версія кожного індексу на весь запит
+    version = corpora.version(snapshot)
+    terms = query_terms(query, search_query)
+    lexical_ids, searches, found = {}, {}, {}
+    for name in corpora.select(corpus_names):
+        # Лексичні кандидати BM25; якщо їх достатньо, з FAISS беремо менше
+        lexical_ids[name] = lexical_candidates(snapshot[name].lexical, terms)
+        vector_k = dense_k(candidates_k, len(lexical_ids[name]))
+        cached = retrieval_cache.get(f"{name}:{search_query}", vector_k, version)
+        if cached is None:
+            searches[name] = (snapshot[name], vector_k)
+        else:
+            found[name] = cached
+    if searches:
+        # Запит кодується один раз, а корпуси шукаються паралельно
+        query_embedding = next(iter(found.values()))[0] if found else model.encode([search_query])[0]
+        for name, (distances, indices) in corpora.search(query_embedding, searches).items():
+            found[name] = (query_embedding, distances, indices)
+            retrieval_cache.set(f"{name}:{search_query}", searches[name][1], found[name], version)
+    # Повертаємо найближчі сусіди (злиття векторного і лексичного ранжувань у кожному корпусі,
+    # потім злиття корпусів за нормованою оцінкою)
+    return merge_results({name: fuse_results(snapshot[name].texts, found[name][2], found[name][1],
+                                             lexical_ids[name], candidates_k)
+                          for name in lexical_ids}, candidates_k)
+
+
+# *** Допоміжна функція: Пошук схожих текстів (у сервісі пошуку або локально) ***
+def find_similar_texts(query, k=5, corpus_names=None):
+    # Для переранжування беремо ширший набір кандидатів, а залишаємо k найкращих
+    candidates_k = max(k, RERANK_CANDIDATES) if reranker else k
+    if search_client is not None:
+        # Сервіс повертає повні записи документів (include_text) для пакування контексту
+        results = search_client.search(query, candidates_k, corpus_names, include_text=True)
+    else:
+        results = search_local(query, candidates_k, corpus_names)
+    if reranker is not None:
+        # Жорсткий бюджет часу; якщо не встигли — залишається порядок гібридного пошуку
+        # (час і перевищення бюджету накопичуються в reranker.stats())
+        results = reranker.rerank(query, results, k).results
     return results
 
 
 # *** Допоміжна функція: Стрімінг відповідей від Ollama ***
 async def call_ollama(prompt):
-    data = {"model": "phi4", "prompt": prompt}
-    with requests.post(OLLAMA_API_URL, json=data, stream=True) as response:
-        if response.status_code == 200:
-            for chunk in response.iter_lines(decode_unicode=True):
-                if chunk:
-                    try:
-                        chunk_data = json.loads(chunk)
-                        if "response" in chunk_data:
-                            yield chunk_data["response"]
-                    except json.JSONDecodeError:
-                        continue
-        else:
-            yield f"Error: {response.status_code} {response.text}"
+    try:
+        async for part in ollama_client.stream("phi4", prompt):
+            yield part
+    except OllamaError as e:
+        yield f"Error: {e.status_code} {e.text}"
 
 
 # *** Веб-інтерфейс на основі Streamlit ***
@@ -62,71 +173,90 @@ st.title("🎓 Дружній AI-помічник ВНТУ")
 # Для збереження історії чату
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# Пам'ять розмови для моделі: останні репліки дослівно, старіші — у підсумку, в межах MEMORY_TOKEN_BUDGET
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory(summarize=create_summarizer(ollama_client.generate))
+
 
+# HTML повідомлення чату (готується один раз на повідомлення, див. render_history)
+def message_html(message):
+    return (f"<div style='text-align: right; background: #0078d7; color: white; padding: 10px; "
+            f"border-radius: 5px; margin: 10px 5px;'>{html.escape(message['content'])}</div>")
 
-# Основна функція пошуку
-async def handle_user_input(user_input):
+
+# Нове повідомлення: додаємо в історію і показуємо лише його, без перемальовування всього чату
+def add_message(role, content):
+    message = {"role": role, "content": content}
+    message["html"] = message_html(message)
+    st.session_state.messages.append(message)
+    st.markdown(message["html"], unsafe_allow_html=True)
+
+
+# Основна функція пошуку (Streamlit-частина — у потоці скрипта, запити до Ollama — у спільному event loop)
+def handle_user_input(user_input):
     # Додаємо повідомлення користувача
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    add_message("user", user_input)
 
-    # Шукаємо релевантні відповіді у FAISS
-    similar_texts = find_similar_texts(user_input)
+    # Шукаємо релевантні відповіді у FAISS у вибраних корпусах; уточнювальне запитання
+    # ("а скільки це коштує?") доповнюється попереднім запитом
+    memory = st.session_state.memory
+    search_query = memory.rewrite_query(user_input)
+    similar_texts = find_similar_texts(search_query, corpus_names=selected_corpora)
 
     # Якщо текстів не знайдено
     if not similar_texts:
-        st.session_state.messages.append({"role": "agent",
-                                          "content": "На жаль, я поки що не можу знайти інформацію про це. Але можу спробувати допомогти іншим способом!"})
+        add_message("agent", "На жаль, я поки що не можу знайти інформацію про це. Але можу спробувати допомогти іншим способом!")
         return
 
-    # Формуємо обмежений контекст для Ollama
-    MAX_LENGTH = 5000  # Максимальна кількість символів для контексту
-    context = "\n\n".join(
-        [
-            f"Context {i + 1}: {result['text']['processed_text'][:500]}"
-            for i, result in enumerate(similar_texts)
-        ][:5]  # Беремо максимум 5 релевантних частин
-    )[:MAX_LENGTH]  # Обрізаємо контекст, якщо він перевищує максимально допустиму довжину
+    # Формуємо обмежений контекст для Ollama: без дублікатів і в межах бюджету токенів
+    # (токени і відкинуті дублікати накопичуються в context_packer.stats())
+    context = context_packer.pack(similar_texts).text
 
+    # Історія розмови обмежена бюджетом, тож промпт не росте з кожною реплікою
+    history = memory.prompt_context()
+    history_section = f"Попередня розмова:\n{history}\n\n" if history else ""
     friendly_prompt = (
         "Ти — дружній і доброзичливий віртуальний помічник Вінницького національного технічного університету (ВНТУ). "
         "Відповідай коротко і по суті, зосереджуючись лише на підтверджених даних. "
         "Не вигадуй деталей, якщо не маєш точної інформації. "
         "Використовуй наступний контекст для відповіді:\n\n"
-        f"{context}\n\nЗапит: {user_input}\nВідповідь:"
+        f"{context}\n\n{history_section}Запит: {user_input}\nВідповідь:"
     )
 
-    # Ініціюємо стрімінг відповіді
-    response_placeholder = st.empty()  # Вікно для виведення відповіді
-    agent_response = []
+    # Ініціюємо стрімінг відповіді: буфер з поточною довжиною, поточний абзац перемальовується
+    # не частіше за RENDER_FPS, а завершені абзаци лишаються окремими елементами
+    renderer = IncrementalRenderer(st.container())
 
     # Збір часткової відповіді
     MAX_AGENT_RESPONSE_LENGTH = 5000  # Максимальна довжина відповіді у символах
-    async for partial_response in call_ollama(friendly_prompt):
-        if len("".join(agent_response)) < MAX_AGENT_RESPONSE_LENGTH:
-            agent_response.append(partial_response)
-            response_placeholder.write("".join(agent_response))  # Поступове оновлення тексту
-
-    # Записуємо остаточну відповідь в історію
-    st.session_state.messages.append({"role": "agent", "content": "".join(agent_response)})
-
-
-# Рендеринг чату
-def render_chat():
-    for message in st.session_state.messages:
-        st.markdown(f"<div style='text-align: right; background: #0078d7; color: white; padding: 10px; "
-                    f"border-radius: 5px; margin: 10px 5px;'>{message['content']}</div>", unsafe_allow_html=True)
-
-
-
-# Виведення чату
-render_chat()
-
-# Поле для введення запиту
-user_input = st.text_input("Введіть свій запит до помічника ВНТУ:")
+    for partial_response in event_loop.iterate(call_ollama(friendly_prompt)):
+        if renderer.length >= MAX_AGENT_RESPONSE_LENGTH:
+            break  # Далі не читаємо: закриття стріму зупиняє генерацію в Ollama
+        renderer.append(partial_response)
+    renderer.flush()
+
+    # Записуємо остаточну відповідь в історію (у вигляді чату вона з'явиться з наступним перезапуском)
+    message = {"role": "agent", "content": renderer.text}
+    message["html"] = message_html(message)
+    st.session_state.messages.append(message)
+
+    # Репліка йде в пам'ять; старі репліки згортаються в підсумок у спільному циклі, без очікування,
+    # тож наступна репліка не чекає на підсумок (одночасно йде лише одне згортання)
+    memory.add_turn(user_input, renderer.text, search_query)
+    event_loop.submit(memory.compact())
+
+
+# Виведення чату один раз за перезапуск скрипта
+render_history(st, st.session_state.messages, message_html)
+
+# Вибір корпусів для пошуку, якщо їх кілька
+selected_corpora = available_corpora
+if len(available_corpora) > 1:
+    selected_corpora = st.multiselect("Джерела:", available_corpora, default=available_corpora) or available_corpora
+
+# Поле для введення запиту: chat_input повертає повідомлення лише один раз, тож перезапуск
+# (наприклад, після зміни джерел) не надсилає те саме запитання повторно
+user_input = st.chat_input("Введіть свій запит до помічника ВНТУ:")
 if user_input:
-    # Виконання обробки asynchronously
-    asyncio.run(handle_user_input(user_input))
-
-# Перерендер чату
-render_chat()
+    handle_user_input(user_input)
 
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Налаштування кешу пошуку (можна перевизначити через змінні оточення)
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "2048"))
+RETRIEVAL_CACHE_TTL = float(os.environ.get("RETRIEVAL_CACHE_TTL", "3600"))
+# Адреса Redis для спільного кешу між воркерами uvicorn (порожньо — кеш у процесі)
+RETRIEVAL_CACHE_URL = os.environ.get("RETRIEVAL_CACHE_URL", "")
+
+
+# Нормалізація запиту: регістр і зайві пробіли не впливають на ключ кешу
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+# Кеш у пам'яті процесу з витісненням LRU та часом життя записів
+class LRUTTLCache:
+    def __init__(self, max_size=RETRIEVAL_CACHE_SIZE, ttl=RETRIEVAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Серіалізація запису для Redis без pickle (дані з мережі не виконуються як код): JSON-заголовок
+# з dtype і shape кожного масиву, далі сирі байти масивів. Дозволені лише числові dtype
+ARRAY_DTYPE_KINDS = "biuf"
+
+
+def dump_arrays(arrays):
+    import numpy as np
+
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+    header = json.dumps([{"dtype": array.dtype.str, "shape": list(array.shape)} for array in arrays])
+    return header.encode("utf-8") + b"\n" + b"".join(array.tobytes() for array in arrays)
+
+
+def load_arrays(raw):
+    import numpy as np
+
+    header, _, body = raw.partition(b"\n")
+    arrays, offset = [], 0
+    for item in json.loads(header):
+        dtype = np.dtype(item["dtype"])
+        if dtype.kind not in ARRAY_DTYPE_KINDS:
+            raise ValueError(f"Unsupported cached dtype: {dtype}")
+        shape = tuple(int(size) for size in item["shape"])
+        size = dtype.itemsize * int(np.prod(shape))
+        if offset + size > len(body):
+            raise ValueError("Truncated cache entry")
+        arrays.append(np.frombuffer(body, dtype=dtype, count=size // dtype.itemsize, offset=offset).reshape(shape))
+        offset += size
+    if offset != len(body):
+        raise ValueError("Malformed cache entry")
+    return tuple(arrays)
+
+
+# Спільний кеш у Redis: TTL задається для кожного ключа, а LRU-витіснення
+# забезпечує сам Redis (maxmemory-policy allkeys-lru)
+class RedisCache:
+    def __init__(self, url=RETRIEVAL_CACHE_URL, ttl=RETRIEVAL_CACHE_TTL, prefix="vntu:retrieval"):
+        import redis  # Необов'язкова залежність, потрібна лише для спільного кешу
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    # Значення — кортеж масивів (ембеддинг запиту, відстані, індекси); пошкоджений запис вважається промахом
+    def get(self, key):
+        raw = self.client.get(f"{self.prefix}:{key}")
+        if raw is None:
+            return None
+        try:
+            return load_arrays(raw)
+        except (ValueError, TypeError, KeyError) as e:
+            print(f"Ignoring malformed cache entry {key}: {e}")
+            return None
+
+    def set(self, key, value):
+        self.client.set(f"{self.prefix}:{key}", dump_arrays(value), ex=max(1, int(self.ttl)))
+
+    # Видалення всіх записів цього кешу (за префіксом ключа). Під час роботи записи старих версій
+    # індексу не видаляються: версія входить у ключ, тож вони просто не читаються і зникають за TTL
+    def clear(self):
+        keys = []
+        for key in self.client.scan_iter(match=f"{self.prefix}:*", count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return 0
+
+
+# Кеш результатів пошуку (ембеддинг запиту, відстані, індекси) за нормалізованим запитом і k.
+# Версія індексу (або відбиток файлу, який повертає fingerprint) входить у ключ, тож після заміни індексу
+# старі записи не читаються і витісняються LRU/TTL; кеш не очищується, тому корпуси з різними версіями
+# не скидають записи одне одного
+class RetrievalCache:
+    # Скільки останніх версій пам'ятати для лічильника нових версій
+    KNOWN_VERSIONS = 64
+
+    def __init__(self, backend, index_path=None, fingerprint=None):
+        self.backend = backend
+        self.index_path = index_path
+        self.fingerprint = fingerprint or self._index_fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # Нові версії індексу: записи попередніх версій більше не читаються
+        self._lock = threading.Lock()
+        self._versions = OrderedDict.fromkeys([self.fingerprint()])
+
+    def _index_fingerprint(self):
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return "missing"
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    # version — версія індексу, з якої взято результат (інакше поточний відбиток)
+    def _key(self, query, k, version=None):
+        fingerprint = version or self.fingerprint()
+        with self._lock:
+            if fingerprint in self._versions:
+                self._versions.move_to_end(fingerprint)
+            else:
+                self._versions[fingerprint] = None
+                self.invalidations += 1
+                while len(self._versions) > self.KNOWN_VERSIONS:
+                    self._versions.popitem(last=False)
+        return f"{fingerprint}:{k}:{normalize_query(query)}"
+
+    def get(self, query: str, k: int, version=None):
+        value = self.backend.get(self._key(query, k, version))
+        # Лічильники оновлюються з потоків пулу пошуку, тому під блокуванням
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, query: str, k: int, value, version=None):
+        self.backend.set(self._key(query, k, version), value)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.backend),
+            "invalidations": self.invalidations,
+            "backend": type(self.backend).__name__,
+        }
+
+
+# Створення кешу: Redis, якщо задано RETRIEVAL_CACHE_URL, інакше кеш у процесі
+def create_retrieval_cache(index_path=None, url=RETRIEVAL_CACHE_URL, fingerprint=None):
+    backend = RedisCache(url) if url else LRUTTLCache()
+    return RetrievalCache(backend, index_path, fingerprint)
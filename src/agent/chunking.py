@@ -0,0 +1,50 @@
+import os
+import re
+
+# Розмір пасажу в токенах (словах processed_text) і перекриття сусідніх пасажів.
+# Модель MiniLM обрізає вхід до 128 word-piece токенів, тож довші пасажі втрачали б кінець
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "60"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "15"))
+# Скільки символів цілої сторінки брати в контекст, якщо корпус не розбитий на пасажі
+PAGE_PREFIX_CHARS = 500
+
+
+# Розбиття тексту на пасажі з перекриттям: (початок, кінець, текст), зміщення — у символах тексту
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    spans = [match.span() for match in re.finditer(r'\S+', text)]
+    chunks = []
+    step = max_tokens - overlap
+    for first in range(0, len(spans), step):
+        window = spans[first:first + max_tokens]
+        start, end = window[0][0], window[-1][1]
+        chunks.append((start, end, text[start:end]))
+        if first + max_tokens >= len(spans):
+            break
+    return chunks
+
+
+# Пасажі одного запису корпусу: кожен зберігає батьківський документ і зміщення в ньому
+def chunk_record(record, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    text = record.get("processed_text") or ""
+    parent = record.get("url") or record.get("parent")
+    for i, (start, end, passage) in enumerate(chunk_text(text, max_tokens, overlap)):
+        chunk = {"processed_text": passage, "chunk": i, "start": start, "end": end}
+        if parent:
+            chunk["url"] = chunk["parent"] = parent
+        if record.get("identifiers"):
+            # Ідентифікатори відомі лише для всієї сторінки, тож їх успадковує кожен пасаж
+            chunk["identifiers"] = record["identifiers"]
+        yield chunk
+
+
+def chunk_records(records, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    for record in records:
+        yield from chunk_record(record, max_tokens, overlap)
+
+
+# Текст для промпту: пасаж береться цілим, ціла сторінка — лише початок
+def passage_text(record, max_chars=PAGE_PREFIX_CHARS):
+    text = record.get("processed_text") or ""
+    return text if "chunk" in record else text[:max_chars]
@@ -0,0 +1,121 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from src.agent.chunking import passage_text
+
+# Бюджет токенів контексту в промпті та поріг схожості, з якого пасажі вважаються дублікатами
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.environ.get("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+# Наближена оцінка токенів phi4 для українського тексту без завантаження токенізатора
+CHARS_PER_TOKEN = float(os.environ.get("CHARS_PER_TOKEN", "3"))
+# Залишок бюджету, менший за цей, не заповнюємо обрізаним пасажем
+MIN_PASSAGE_TOKENS = 32
+
+
+def estimate_tokens(text):
+    return max(1, round(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+# Множина словесних триграм для порівняння пасажів
+def shingles(text, size=3):
+    words = text.split()
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+# Результат пакування: текст контексту, вибрані результати пошуку і скільки токенів використано
+@dataclass
+class PackedContext:
+    text: str
+    results: list = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+
+
+# Пакувальник контексту: результати йдуть за релевантністю, майже однакові пасажі відкидаються,
+# а бюджет токенів заповнюється доти, доки вміщується наступний пасаж
+class ContextPacker:
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD,
+                 count_tokens=estimate_tokens):
+        self.budget = budget
+        self.duplicate_threshold = duplicate_threshold
+        self.count_tokens = count_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.total_duplicates = 0
+        self.total_over_budget = 0
+
+    # results — відсортовані за відстанню результати пошуку з полем "text" (запис корпусу)
+    def pack(self, results, budget=None):
+        budget = budget or self.budget
+        parts, selected, seen = [], [], []
+        tokens = duplicates = over_budget = 0
+
+        for result in results:
+            passage = passage_text(result["text"]).strip()
+            if not passage:
+                continue
+            passage_shingles = shingles(passage)
+            if any(jaccard(passage_shingles, other) >= self.duplicate_threshold for other in seen):
+                duplicates += 1
+                continue
+
+            part = f"Context {len(parts) + 1}: {passage}"
+            part_tokens = self.count_tokens(part)
+            remaining = budget - tokens
+            if part_tokens > remaining:
+                over_budget += 1
+                if remaining < MIN_PASSAGE_TOKENS:
+                    continue
+                # Найрелевантніший пасаж, що не вміщується, обрізаємо по словах до залишку бюджету
+                part = self._truncate(part, remaining)
+                part_tokens = self.count_tokens(part)
+
+            seen.append(passage_shingles)
+            parts.append(part)
+            selected.append(result)
+            tokens += part_tokens
+
+        packed = PackedContext("\n\n".join(parts), selected, tokens, budget, duplicates, over_budget)
+        self._record(packed)
+        return packed
+
+    def _truncate(self, text, max_tokens):
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:middle])) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
+
+    def _record(self, packed):
+        with self._lock:
+            self.requests += 1
+            self.total_tokens += packed.tokens
+            self.max_tokens = max(self.max_tokens, packed.tokens)
+            self.total_duplicates += packed.duplicates
+            self.total_over_budget += packed.over_budget
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "mean_tokens": self.total_tokens / self.requests if self.requests else 0.0,
+            "max_tokens": self.max_tokens,
+            "budget": self.budget,
+            "duplicates_dropped": self.total_duplicates,
+            "over_budget": self.total_over_budget,
+        }
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from src.agent.context_packer import estimate_tokens
+
+# Пам'ять розмови: останні репліки дослівно, старіші — у стислому підсумку, усе в межах бюджету токенів
+MEMORY_TOKEN_BUDGET = int(os.environ.get("MEMORY_TOKEN_BUDGET", "600"))
+MEMORY_RECENT_TURNS = int(os.environ.get("MEMORY_RECENT_TURNS", "3"))
+MEMORY_SUMMARY_TOKENS = int(os.environ.get("MEMORY_SUMMARY_TOKENS", "200"))
+# Модель Ollama для підсумків старих реплік (порожньо — підсумок без LLM)
+MEMORY_SUMMARY_MODEL = os.environ.get("MEMORY_SUMMARY_MODEL", "")
+# Скільки розмов тримає сервер і скільки секунд розмова живе без нових запитів
+MEMORY_MAX_CONVERSATIONS = int(os.environ.get("MEMORY_MAX_CONVERSATIONS", "1000"))
+MEMORY_TTL = float(os.environ.get("MEMORY_TTL", "3600"))
+
+# Уточнювальні запитання: з займенником чи вказівним словом на початку ("як туди доїхати?") або короткі,
+# що починаються з "а"/"і" чи містять займенник ("а вартість?", "скільки це коштує?").
+# Сполучники й частки ("та", "ще", "також") не є ознакою: вони є і в самостійних запитаннях
+FOLLOW_UP_MAX_WORDS = 4
+FOLLOW_UP_LEAD_WORDS = 3
+FOLLOW_UP_WORDS = {
+    "це", "цей", "ця", "ці", "цього", "цієї", "цьому", "цим", "цих", "його", "її", "їх", "їхній", "він", "вона",
+    "воно", "вони", "ним", "нею", "ними", "нього", "неї", "них", "там", "туди", "звідти", "такий", "така", "таке",
+    "той",
+}
+FOLLOW_UP_STARTS = {"а", "і", "й"}
+# Скільки слів попереднього запиту додається до уточнювального
+FOLLOW_UP_CONTEXT_WORDS = 20
+MIN_TURN_TOKENS = 30
+
+
+def truncate_tokens(text, max_tokens, count_tokens=estimate_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def format_turn(query, answer):
+    return f"Користувач: {query}\nПомічник: {answer}"
+
+
+# Підсумок без LLM: запитання і перше речення кожної відповіді; якщо не вміщується — відкидаються найстаріші
+async def extractive_summary(summary, turns, max_tokens):
+    lines = [summary] if summary else []
+    for query, answer in turns:
+        first_sentence = re.split(r"(?<=[.!?])\s+", answer.strip(), maxsplit=1)[0]
+        lines.append(f"- {query.strip()} — {first_sentence}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_tokens("\n".join(lines), max_tokens)
+
+
+# Підсумок моделлю Ollama; generate(model, prompt) — метод generate клієнта Ollama
+def llm_summarizer(generate, model):
+    async def summarize(summary, turns, max_tokens):
+        dialogue = "\n\n".join(format_turn(query, answer) for query, answer in turns)
+        prompt = (
+            "Стисло підсумуй розмову з помічником ВНТУ: про що питав користувач і які факти він отримав. "
+            f"Не більше {max_tokens * 2 // 3} слів.\n\n"
+            f"Попередній підсумок:\n{summary or '-'}\n\nНові репліки:\n{dialogue}\n\nПідсумок:"
+        )
+        return truncate_tokens((await generate(model, prompt)).strip(), max_tokens)
+
+    return summarize
+
+
+def create_summarizer(generate, model=MEMORY_SUMMARY_MODEL):
+    return llm_summarizer(generate, model) if model else extractive_summary
+
+
+# Пам'ять однієї розмови. Репліки, що випали з вікна останніх recent_turns, згортаються в підсумок
+# (compact викликається після відповіді, не на шляху запиту), тож розмір промпту і затримка
+# не ростуть з довжиною розмови
+class ConversationMemory:
+    def __init__(self, budget=MEMORY_TOKEN_BUDGET, recent_turns=MEMORY_RECENT_TURNS,
+                 summary_tokens=MEMORY_SUMMARY_TOKENS, summarize=extractive_summary, count_tokens=estimate_tokens):
+        self.budget = budget
+        self.recent_turns = recent_turns
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.count_tokens = count_tokens
+        self.turns = []  # (запит, відповідь, запит для пошуку), найстаріші першими
+        self.summary = ""
+        self.summarized_turns = 0
+        self.compacting = False
+
+    def add_turn(self, query, answer, search_query=None):
+        self.turns.append((query, answer, search_query or query))
+
+    def needs_compaction(self):
+        return len(self.turns) > self.recent_turns
+
+    # Згортання старих реплік у підсумок. Одночасно йде лише одне згортання; поки підсумок готується,
+    # старі репліки лишаються в промпті, а підсумок і обрізання реплік застосовуються разом після нього.
+    # Репліки, що надійшли за цей час, згортаються в наступному проході
+    async def compact(self):
+        if self.compacting or not self.needs_compaction():
+            return False
+        self.compacting = True
+        try:
+            while self.needs_compaction():
+                old = self.turns[:-self.recent_turns]
+                turns = [(query, answer) for query, answer, _ in old]
+                try:
+                    summary = await self.summarize(self.summary, turns, self.summary_tokens)
+                except Exception as e:
+                    # Підсумок не вдався — зберігаємо хоча б стислий варіант без LLM
+                    print(f"Conversation summary failed: {e}")
+                    summary = await extractive_summary(self.summary, turns, self.summary_tokens)
+                # Репліки лише додаються в кінець, тож перші len(old) — саме ті, що підсумовано
+                self.summary = summary
+                self.turns = self.turns[len(old):]
+                self.summarized_turns += len(old)
+        finally:
+            self.compacting = False
+        return True
+
+    # Історія для промпту: підсумок і найновіші репліки дослівно, поки вміщуються в бюджет
+    def prompt_context(self):
+        summary = []
+        if self.summary:
+            summary.append("Підсумок попередньої розмови:\n" +
+                           truncate_tokens(self.summary, self.summary_tokens, self.count_tokens))
+
+        recent = []
+        for query, answer, _ in reversed(self.turns):
+            turn = format_turn(query, answer)
+            if self.count_tokens("\n\n".join(summary + [turn] + recent)) > self.budget:
+                # Репліка не вміщується повністю: беремо її початок, якщо лишилося хоч трохи місця
+                remaining = self.budget - self.count_tokens("\n\n".join(summary + ["", *recent])) - 1
+                if remaining >= MIN_TURN_TOKENS:
+                    recent.insert(0, truncate_tokens(turn, remaining, self.count_tokens))
+                break
+            recent.insert(0, turn)
+        return "\n\n".join(summary + recent)
+
+    def tokens(self):
+        return self.count_tokens(self.prompt_context())
+
+    # Запит для пошуку: уточнювальне запитання доповнюється попереднім запитом, щоб пошук знайшов ту саму тему
+    def rewrite_query(self, query):
+        if not self.turns:
+            return query
+        words = re.findall(r"\w+", query.lower())
+        short = len(words) <= FOLLOW_UP_MAX_WORDS
+        follow_up = FOLLOW_UP_WORDS.intersection(words if short else words[:FOLLOW_UP_LEAD_WORDS])
+        if not follow_up and not (short and words and words[0] in FOLLOW_UP_STARTS):
+            return query
+        previous = self.turns[-1][2].split()[-FOLLOW_UP_CONTEXT_WORDS:]
+        return f"{' '.join(previous)} {query}"
+
+    def stats(self):
+        return {
+            "turns": len(self.turns),
+            "summarized_turns": self.summarized_turns,
+            "summary_tokens": self.count_tokens(self.summary) if self.summary else 0,
+            "prompt_tokens": self.tokens(),
+            "budget": self.budget,
+        }
+
+
+# Розмови на сервері за conversation_id: LRU з часом життя; підсумовування — фоновими завданнями
+class ConversationStore:
+    def __init__(self, max_conversations=MEMORY_MAX_CONVERSATIONS, ttl=MEMORY_TTL, summarize=extractive_summary):
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.summarize = summarize
+        self._conversations = OrderedDict()  # id -> (пам'ять, час останнього звернення)
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.compactions = 0
+
+    def get(self, conversation_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._conversations.get(conversation_id)
+            if item is None or now - item[1] > self.ttl:
+                memory = ConversationMemory(summarize=self.summarize)
+            else:
+                memory = item[0]
+            self._conversations[conversation_id] = (memory, now)
+            self._conversations.move_to_end(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        return memory
+
+    # Репліка додається одразу, а згортання старих реплік іде у фоні, не затримуючи відповідь;
+    # якщо згортання вже йде, воно саме підхопить нові репліки
+    def record_turn(self, memory, query, answer, search_query=None):
+        memory.add_turn(query, answer, search_query)
+        if memory.needs_compaction() and not memory.compacting:
+            task = asyncio.get_running_loop().create_task(memory.compact())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self.compactions += 1
+
+    def stats(self):
+        return {
+            "conversations": len(self._conversations),
+            "compactions": self.compactions,
+            "max_conversations": self.max_conversations,
+            "ttl": self.ttl,
+        }
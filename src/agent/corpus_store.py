@@ -0,0 +1,68 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+# Компактний формат корпусу: записи JSON один за одним у corpus.bin
+# і таблиця зміщень (n + 1 чисел uint64) у corpus_offsets.npy
+CORPUS_FILE = "corpus.bin"
+OFFSETS_FILE = "corpus_offsets.npy"
+
+
+# Потокове читання записів конвеєра обробки: JSON Lines по рядку, звичайний JSON-масив — повністю
+def read_records(input_file):
+    with open(input_file, "r", encoding="utf-8") as file:
+        if not input_file.endswith(".jsonl"):
+            yield from json.load(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_corpus(records, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    offsets = [0]
+    with open(os.path.join(output_dir, CORPUS_FILE), "wb") as file:
+        for record in records:
+            data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+            file.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(os.path.join(output_dir, OFFSETS_FILE), np.asarray(offsets, dtype=np.uint64))
+
+
+def corpus_exists(directory):
+    return (os.path.exists(os.path.join(directory, CORPUS_FILE))
+            and os.path.exists(os.path.join(directory, OFFSETS_FILE)))
+
+
+# Доступ до запису за id без розбору всього корпусу. Файли відображаються в пам'ять,
+# тож кілька воркерів uvicorn ділять ті самі сторінки через кеш ОС
+class CorpusStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self._offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        self._file = open(os.path.join(directory, CORPUS_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    # Від'ємні id не загортаються з кінця: -1 у FAISS означає "немає результату", а не останній запис
+    def __getitem__(self, idx):
+        idx = int(idx)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"corpus index out of range: {idx}")
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        return json.loads(self._data[start:end])
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
@@ -0,0 +1,109 @@
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# Бекенд кодування запитів: torch (оригінальна модель), torch-int8 (динамічна квантизація
+# Linear-шарів), onnx або onnx-int8 (файли, експортовані vectorizer.py --export-onnx)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+ONNX_FILE = "onnx/model.onnx"
+# Мінімальна середня косинусна подібність до оригінальних ембеддингів, з якою бекенд придатний
+PARITY_MIN_COSINE = 0.98
+
+
+# Шлях до ONNX-файлу відносно теки моделі (квантизований файл має суфікс конфігурації, напр. qint8_avx2)
+def onnx_file(model_path, quantized=False):
+    if not quantized:
+        return ONNX_FILE
+    files = sorted(glob.glob(os.path.join(model_path, "onnx", "model_qint8_*.onnx")))
+    if not files:
+        raise FileNotFoundError(f"No quantized ONNX model in {model_path}, run vectorizer.py --export-onnx")
+    return os.path.relpath(files[0], model_path)
+
+
+# Завантаження моделі для кодування запитів; усі бекенди мають той самий метод encode
+def load_embedding_model(model_path, backend=EMBEDDING_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}, expected one of {BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_path)
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_path, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    file_name = onnx_file(model_path, quantized=backend == "onnx-int8")
+    return SentenceTransformer(model_path, backend="onnx", model_kwargs={"file_name": file_name})
+
+
+# Експорт збереженої моделі в ONNX і (якщо задано конфігурацію) в int8-квантизований ONNX.
+# Модель зберігається в окрему тимчасову теку, а в теку моделі додаються лише файли onnx/:
+# конфігурація, токенізатор і ваги оригінальної моделі не перезаписуються
+def export_onnx(model_path, quantization_config="avx512_vnni"):
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(model_path, backend="onnx")
+    if not os.path.exists(os.path.join(model_path, ONNX_FILE)):
+        with tempfile.TemporaryDirectory(prefix="onnx-export-") as export_dir:
+            model.save_pretrained(export_dir)
+            shutil.copytree(os.path.join(export_dir, os.path.dirname(ONNX_FILE)),
+                            os.path.join(model_path, os.path.dirname(ONNX_FILE)), dirs_exist_ok=True)
+    if quantization_config:
+        export_dynamic_quantized_onnx_model(model, quantization_config, model_path)
+    return model
+
+
+def _unit_rows(embeddings):
+    embeddings = np.asarray(embeddings, dtype="float32")
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.where(norms == 0, 1, norms)
+
+
+# Перевірка відповідності бекенду оригіналу: косинусна подібність ембеддингів тих самих текстів
+# і recall@k пошуку в корпусі (corpus_embeddings — оригінальні ембеддинги, за замовчуванням самі тексти)
+def parity_report(reference, candidate, texts, k=10, corpus_embeddings=None):
+    import faiss
+
+    reference_embeddings = np.asarray(reference.encode(texts), dtype="float32")
+    candidate_embeddings = np.asarray(candidate.encode(texts), dtype="float32")
+    cosine = np.sum(_unit_rows(reference_embeddings) * _unit_rows(candidate_embeddings), axis=1)
+
+    corpus = np.asarray(corpus_embeddings if corpus_embeddings is not None else reference_embeddings,
+                        dtype="float32")
+    k = min(k, len(corpus))
+    index = faiss.IndexFlatL2(corpus.shape[1])
+    index.add(corpus)
+    _, expected = index.search(reference_embeddings, k)
+    _, found = index.search(candidate_embeddings, k)
+    recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, expected)])
+    return {"mean_cosine": float(cosine.mean()), "min_cosine": float(cosine.min()), f"recall@{k}": float(recall)}
+
+
+# Затримка одиночних запитів (як у агентах без батчингу) і пропускна здатність батчами
+def benchmark_encoder(model, queries, batch_size=32, warmup=5):
+    for query in queries[:warmup]:
+        model.encode([query])
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.encode([query])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for first in range(0, len(queries), batch_size):
+        model.encode(queries[first:first + batch_size])
+    batch_seconds = time.perf_counter() - start
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "single_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "single_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "single_qps": len(queries) / float(np.sum(latencies)),
+        "batch_qps": len(queries) / batch_seconds,
+    }
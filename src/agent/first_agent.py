@@ -1,90 +1,168 @@
-import faiss
-import numpy as np
-import json
-from sentence_transformers import SentenceTransformer
-from fastapi import FastAPI
-from pydantic import BaseModel
-import requests  # Для запитів до Ollama API
-from fastapi.responses import StreamingResponse
-from typing import Callable
 import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
 
-# Ініціалізація FastAPI
-app = FastAPI()
+from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
+
+# Легкі модулі; torch, sentence_transformers, faiss і numpy імпортуються під час завантаження у фоні
+from src.agent.admission import AdmissionControl, AdmissionRejected
+from src.agent.ollama_client import OllamaError
+from src.agent.ollama_router import OllamaRouter, create_ollama_client
+from src.agent.cache import create_retrieval_cache
+from src.agent.context_packer import ContextPacker
+from src.agent.conversation import ConversationStore, create_summarizer
+from src.agent.metrics import (
+    CACHE_LOOKUPS, ERRORS, IN_FLIGHT_STREAMS, REGISTRY, REQUESTS, STAGE_SECONDS, TOKENS_PER_SECOND,
+)
+from src.agent.multi_corpus import AGENT_CORPORA, UnknownCorpus, search_corpora, shared_model_path
+from src.agent.reranker import RERANK_CANDIDATES, create_reranker
+from src.agent.startup import Startup
+from src.agent.stream_protocol import MEDIA_TYPES, encode_frame, negotiate_protocol, source_items
+from src.agent.text_normalization import LemmaCache, load_stopwords, normalize_for_search
+
+# Корпуси для пошуку (AGENT_CORPORA, напр. "wiki=Data/processed/wiki,big=Data/processed/big");
+# усі вони обслуговуються одним процесом з однією моделлю ембеддингів
+CORPORA = AGENT_CORPORA or "wiki=Data/processed/wiki"
+
+# Компоненти, що завантажуються у фоні після старту процесу (див. lifespan)
+model = corpora = retriever = retrieval_cache = response_cache = reranker = None
+stopwords = lemma_cache = None
+
+# Пакування контексту в бюджет токенів промпту
+context_packer = ContextPacker()
+
+# Спільний асинхронний клієнт Ollama (пул з'єднань на весь процес); для кількох хостів
+# з OLLAMA_API_URLS — маршрутизатор з балансуванням за кількістю незавершених запитів
+ollama_client = create_ollama_client()
+
+# Обмеження одночасних генерацій кожної моделі з чергою та швидкою відмовою під перевантаженням
+admission = AdmissionControl()
+
+startup = Startup()
+
+# Пам'ять розмов за conversation_id: останні репліки дослівно, старіші — у підсумку (фоном, після відповіді)
+conversations = ConversationStore(
+    summarize=create_summarizer(lambda model_name, prompt: ollama_client.generate(model_name, prompt)))
+
+
+# Завантаження моделі векторайзера для запитів (бекенд torch, torch-int8, onnx або onnx-int8)
+def load_model():
+    from src.agent.embedding_backend import load_embedding_model
+
+    return load_embedding_model(shared_model_path(CORPORA))
+
+
+# Завантаження FAISS-індексів і текстів активних версій усіх корпусів (з гарячим перезавантаженням)
+def load_index():
+    from src.agent.multi_corpus import load_corpus_set
+
+    return load_corpus_set(CORPORA)
+
+
+# Нормалізація запитів так само, як оброблявся корпус (кеш лем з data_proc.py)
+def load_normalization():
+    return load_stopwords("Data/stopwords_ua.txt"), LemmaCache.load(preload_morph=True)
 
-# Завантаження необхідних компонентів
-print("Loading model, FAISS index, and texts...")
 
-# Завантаження SentenceTransformer моделі
-model = SentenceTransformer("Data/processed/wiki/sentence_transformer_model")  # Ваша модель векторайзера
-print("Model loaded.")
+# Модель, індекс, тексти і кеш лем завантажуються паралельно; після цього агент готовий
+async def load_components():
+    global model, corpora, retriever, retrieval_cache, response_cache, reranker, stopwords, lemma_cache
 
-# Завантаження FAISS-індексу
-index = faiss.read_index("Data/processed/wiki/vector_index.faiss")
-print("FAISS index loaded.")
+    print("Loading model, FAISS index, and texts...")
+    try:
+        loaded = await startup.load(model=load_model, index=load_index, normalization=load_normalization,
+                                    reranker=create_reranker)
+    except Exception:
+        return
+    from src.agent.response_cache import SemanticResponseCache
+    from src.agent.retrieval import BatchingRetriever
+
+    model, corpora, reranker = loaded["model"], loaded["index"], loaded["reranker"]
+    stopwords, lemma_cache = loaded["normalization"]
+
+    # Воркер мікробатчингу для кодування запитів (запит кодується один раз для всіх корпусів)
+    retriever = BatchingRetriever(model, None)
+
+    # Кеш результатів пошуку для повторюваних запитів (скидається з новою версією будь-якого корпусу)
+    retrieval_cache = create_retrieval_cache(fingerprint=corpora.version)
+
+    # Семантичний кеш відповідей LLM для майже однакових запитань
+    response_cache = SemanticResponseCache()
+    corpora.on_swap(lambda new_resources: response_cache.clear())
 
-# Завантаження даних текстів
-with open("Data/processed/wiki_processed_results.json", "r", encoding="utf-8") as file:
-    texts = json.load(file)
-print("Texts loaded.")
+    corpora.start_watching()
+    startup.mark_ready()
+
+
+# Процес одразу приймає з'єднання (/healthz), а компоненти завантажуються у фоні;
+# балансувальник надсилає запити лише після того, як /readyz поверне 200
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loading = asyncio.create_task(load_components())
+    if isinstance(ollama_client, OllamaRouter):
+        ollama_client.start_health_checks()
+    yield
+    loading.cancel()
+    if corpora is not None:
+        corpora.stop_watching()
+    await ollama_client.aclose()
+
+
+# Ініціалізація FastAPI
+app = FastAPI(lifespan=lifespan)
 
-# Налаштування API Ollama
-OLLAMA_API_URL = "http://127.0.0.1:11434/api/generate"  # Локальний ендпоінт Ollama API
 
+# Маршрути, яким потрібні завантажені компоненти, до готовності відповідають 503
+async def require_ready():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail="Agent is starting up")
 
-# Допоміжна функція: Знаходження схожих текстів
-def find_similar_texts(query: str, k: int = 5):
-    # Генерація ембеддингу для запиту
-    query_embedding = model.encode([query])
 
-    # Пошук найближчих сусідів у FAISS
-    distances, indices = index.search(query_embedding, k)
+# Допоміжна функція: Знаходження схожих текстів у вибраних корпусах (повертає ембеддинг запиту,
+# результати та результат переранжування з його часом або None, якщо етап вимкнено)
+async def find_similar_texts(query: str, k: int = 5, corpus_names=None):
+    start = time.perf_counter()
+    # Лематизований запит відповідає формі processed_text у корпусі
+    search_query = normalize_for_search(query, lemma_cache, stopwords) or query
 
-    # Формування результатів
-    results = [{"text": texts[idx], "distance": float(distance)} for idx, distance in zip(indices[0], distances[0])]
-    return results
+    # Для переранжування беремо ширший набір кандидатів, а залишаємо k найкращих
+    candidates_k = max(k, RERANK_CANDIDATES) if reranker else k
+
+    # Гібридний пошук у корпусах; ембеддинг генерується пакетно з іншими запитами, поза event loop
+    query_embedding, results = await search_corpora(corpora, query, search_query, candidates_k,
+                                                    retriever.encode, retrieval_cache, corpus_names)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="retrieval")
+    if reranker is None:
+        return query_embedding, results, None
+
+    # Переранжування з жорстким бюджетом часу; якщо не встигли — порядок гібридного пошуку
+    reranked = await reranker.arerank(query, results, k)
+    STAGE_SECONDS.observe(reranked.seconds, stage="rerank")
+    return query_embedding, reranked.results, reranked
 
 
 # Допоміжна функція: Запит до Ollama
-def query_ollama(model_name: str, prompt: str):
-    # Структура даних для запиту
-    data = {
-        "model": model_name,  # Назва моделі в Ollama
-        "prompt": prompt,
-    }
-
-    # Робимо запит до Ollama API
-    with requests.post(OLLAMA_API_URL, json=data, stream=True) as response:
-        if response.status_code == 200:
-            try:
-                # Ініціалізуємо змінну для збору частин відповіді
-                full_response = ""
-
-                # Перебираємо частини стрімінгової відповіді
-                for chunk in response.iter_lines(decode_unicode=True):
-                    if chunk:  # Перевіряємо, щоб частина не була порожньою
-                        try:
-                            # Декодуємо частину JSON
-                            chunk_data = json.loads(chunk)
-
-                            # Перевіряємо, чи є ключ "response"
-                            if "response" in chunk_data:
-                                full_response += chunk_data["response"]
-                        except json.JSONDecodeError:
-                            # Ігноруємо некоректні фрагменти
-                            continue
-
-                # Якщо після збору відповіді вона порожня, повертаємо помилку
-                if not full_response.strip():
-                    return "No response generated by the model. Check the prompt or context for relevancy."
-
-                return full_response.strip()  # Повертаємо зібрану відповідь
-            except Exception as e:
-                # Якщо сталася будь-яка інша помилка
-                raise Exception(f"Failed to process streaming response from Ollama API: {e}")
-        else:
-            # Якщо статус відповіді не 200, повідомляємо про помилку
-            raise Exception(f"Ollama API error: {response.status_code}, {response.text}")
+async def query_ollama(model_name: str, prompt: str):
+    try:
+        # Збираємо всі частини стрімінгової відповіді
+        full_response = await ollama_client.generate(model_name, prompt)
+    except OllamaError as e:
+        # Якщо статус відповіді не 200, повідомляємо про помилку
+        raise Exception(f"Ollama API error: {e.status_code}, {e.text}")
+    except Exception as e:
+        # Якщо сталася будь-яка інша помилка
+        raise Exception(f"Failed to process streaming response from Ollama API: {e}")
+
+    # Якщо після збору відповіді вона порожня, повертаємо помилку
+    if not full_response.strip():
+        return "No response generated by the model. Check the prompt or context for relevancy."
+
+    return full_response.strip()  # Повертаємо зібрану відповідь
 
 
 
@@ -92,55 +170,270 @@ def query_ollama(model_name: str, prompt: str):
 class QueryRequest(BaseModel):
     query: str
     num_results: int = 5  # Кількість результатів FAISS
+    corpora: Optional[List[str]] = None  # Корпуси для пошуку (за замовчуванням усі)
+    conversation_id: Optional[str] = None  # ID розмови: попередні репліки йдуть у промпт і в пошук
 
-async def generate_response_stream(model_name: str, prompt: str):
-    # Структура запиту до Ollama
-    data = {"model": model_name, "prompt": prompt}
-
-    # Відправляємо запит зі стрімінгом
-    with requests.post(OLLAMA_API_URL, json=data, stream=True) as response:
-        if response.status_code == 200:
-            # Читаємо окремі частини відповіді
-            for chunk in response.iter_lines(decode_unicode=True):
-                if chunk:
-                    try:
-                        chunk_data = json.loads(chunk)
-                        if "response" in chunk_data:
-                            # Повертаємо наступну частину відповіді
-                            yield f"{chunk_data['response']}"
-                    except json.JSONDecodeError:
-                        # Ігноруємо некоректний JSON
-                        continue
-        else:
-            # Якщо сталася помилка, завершуємо стрімінг та повертаємо повідомлення
-            yield f"Error: {response.status_code} {response.text}"
-@app.post("/agent")
-async def agent_endpoint_stream(request: QueryRequest):
+async def generate_response_stream(model_name: str, prompt: str, on_complete: Callable = None,
+                                   request_id: str = None, request_start: float = None, slot=None,
+                                   usage: dict = None):
+    # Відправляємо запит зі стрімінгом через спільний пул з'єднань (з ID запиту для трасування).
+    # usage заповнюється часом і кількістю токенів генерації (або текстом помилки Ollama)
+    parts = []
+    usage = usage if usage is not None else {}
+    request_start = request_start or time.perf_counter()
+    generation_start = time.perf_counter()
+    headers = {"X-Request-ID": request_id} if request_id else None
+    IN_FLIGHT_STREAMS.inc()
+    try:
+        async for part in ollama_client.stream(model_name, prompt, headers=headers):
+            if not parts:
+                # Час до першого токена — від початку обробки запиту
+                ttft = time.perf_counter() - request_start
+                STAGE_SECONDS.observe(ttft, stage="ttft")
+                usage["ttft_ms"] = ttft * 1000
+            parts.append(part)
+            # Повертаємо наступну частину відповіді
+            yield part
+    except OllamaError as e:
+        # Якщо сталася помилка, завершуємо стрімінг та повертаємо повідомлення
+        ERRORS.inc(stage="ollama")
+        usage["error"] = f"{e.status_code} {e.text}"
+        yield f"Error: {e.status_code} {e.text}"
+        return
+    finally:
+        IN_FLIGHT_STREAMS.dec()
+        # Слот генерації звільняється одразу, як Ollama закінчила (або клієнт відключився)
+        if slot is not None:
+            slot.release()
+
+    # Кожна частина стрімінгу Ollama — один токен
+    generation_seconds = time.perf_counter() - generation_start
+    STAGE_SECONDS.observe(generation_seconds, stage="generation")
+    usage["generation_ms"] = generation_seconds * 1000
+    usage["completion_tokens"] = len(parts)
+    if parts and generation_seconds > 0:
+        usage["tokens_per_second"] = len(parts) / generation_seconds
+        TOKENS_PER_SECOND.observe(usage["tokens_per_second"])
+
+    # Повна успішна відповідь (наприклад, для збереження в кеші)
+    if on_complete is not None and parts:
+        on_complete("".join(parts))
+
+
+async def single_part(text):
+    yield text
+
+
+# Кадри відповіді у вибраному протоколі: джерела одразу, ще до запиту в Ollama, потім частини відповіді,
+# наприкінці час етапів і використання токенів (для text/plain — лише текст, як раніше)
+async def agent_event_stream(protocol, request_id, sources, parts, usage, timings, request_start, cached=False):
+    frame = encode_frame(protocol, "sources", {"request_id": request_id, "sources": sources})
+    if frame:
+        yield frame
+    async for part in parts:
+        if "error" in usage:
+            yield encode_frame(protocol, "error", {"message": usage["error"]})
+            return
+        yield encode_frame(protocol, "delta", {"text": part})
+
+    timings = dict(timings, total_ms=(time.perf_counter() - request_start) * 1000)
+    for name in ("ttft_ms", "generation_ms"):
+        if name in usage:
+            timings[name] = usage[name]
+    frame = encode_frame(protocol, "done", {
+        "request_id": request_id,
+        "cached": cached,
+        "timings": {name: round(value, 1) for name, value in timings.items()},
+        "usage": {name: usage[name] for name in ("context_tokens", "history_tokens", "completion_tokens",
+                                                  "tokens_per_second")
+                  if name in usage},
+    })
+    if frame:
+        yield frame
+
+
+@app.post("/agent", dependencies=[Depends(require_ready)])
+async def agent_endpoint_stream(request: QueryRequest, x_request_id: str = Header(None), accept: str = Header(None)):
+    # ID запиту від клієнта або новий; передається в Ollama і повертається у відповіді
+    request_id = x_request_id or uuid.uuid4().hex
+    request_start = time.perf_counter()
+    # NDJSON або SSE з джерелами та статистикою, якщо клієнт їх приймає; інакше text/plain
+    protocol = negotiate_protocol(accept)
+    media_type = MEDIA_TYPES[protocol]
+    REQUESTS.inc()
+    try:
+        corpus_names = corpora.select(request.corpora)
+    except UnknownCorpus as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Уточнювальне запитання розмови доповнюється попереднім запитом для пошуку
+    memory = conversations.get(request.conversation_id) if request.conversation_id else None
+    search_text = memory.rewrite_query(request.query) if memory else request.query
+    history = memory.prompt_context() if memory else ""
     try:
         # Крок 1: Пошук схожих текстів у FAISS
-        similar_texts = find_similar_texts(request.query, request.num_results)
+        query_embedding, similar_texts, reranked = await find_similar_texts(search_text, request.num_results,
+                                                                            corpus_names)
+        retrieval_done = time.perf_counter()
+        timings = {"retrieval_ms": (retrieval_done - request_start) * 1000}
 
         if not similar_texts:
             # Якщо немає релевантного контексту
-            return StreamingResponse(iter([{
-                "response": "Немає релевантного контексту до вашого запиту. Спробуйте уточнити або змінити запит."
-            }]), media_type="application/json")
+            message = "Немає релевантного контексту до вашого запиту. Спробуйте уточнити або змінити запит."
+            if protocol == "text":
+                return JSONResponse({"response": message}, headers={"X-Request-ID": request_id})
+            return StreamingResponse(agent_event_stream(protocol, request_id, [], single_part(message), {}, timings,
+                                                        request_start),
+                                     media_type=media_type, headers={"X-Request-ID": request_id})
+
+        # Майже однакове запитання з тими самими контекстами вже мало відповідь
+        # (лише без історії розмови: з нею відповідь залежить і від попередніх реплік)
+        context_ids = [f"{result['corpus']}:{result['id']}" for result in similar_texts]
+        cached_answer = None
+        if not history:
+            cached_answer = response_cache.lookup(query_embedding, context_ids)
+            CACHE_LOOKUPS.inc(cache="response", result="miss" if cached_answer is None else "hit")
+        if cached_answer is not None:
+            if memory:
+                memory.add_turn(request.query, cached_answer, search_text)
+            return StreamingResponse(agent_event_stream(protocol, request_id, source_items(similar_texts),
+                                                        single_part(cached_answer), {}, timings, request_start,
+                                                        cached=True),
+                                     media_type=media_type, headers={"X-Request-ID": request_id})
+
+        # Формуємо контекст: без дублікатів і в межах бюджету токенів
+        packed = context_packer.pack(similar_texts)
 
-        # Формуємо контекст
-        context = "\n\n".join([
-            f"Context {i + 1}: {result['text']['processed_text'][:500]}"  # Обрізання для уникнення надлишку тексту
-            for i, result in enumerate(similar_texts)
-        ])
+        # Формуємо промпт для Ollama; історія розмови обмежена бюджетом MEMORY_TOKEN_BUDGET
+        history_section = f"Попередня розмова:\n{history}\n\n" if history else ""
+        prompt = (f"Використовуй контекст щоб відповісти на запит:\n\n{packed.text}\n\n{history_section}"
+                  f"Запит: {request.query}\nВідповідь:")
+        prompt_seconds = time.perf_counter() - retrieval_done
+        STAGE_SECONDS.observe(prompt_seconds, stage="prompt_build")
+        timings["prompt_ms"] = prompt_seconds * 1000
 
-        # Формуємо промпт для Ollama
-        prompt = f"Використовуй контекст щоб відповісти на запит:\n\n{context}\n\nЗапит: {request.query}\nВідповідь:"
+        # Чекаємо на вільний слот генерації; під перевантаженням відмовляємо одразу з Retry-After
+        try:
+            slot = await admission.acquire("phi4")
+        except AdmissionRejected as e:
+            return JSONResponse({"detail": f"Agent is overloaded ({e.reason}), retry later"},
+                                status_code=e.status_code,
+                                headers={"Retry-After": str(e.retry_after), "X-Request-ID": request_id})
 
-        # Генеруємо стрімінг відповіді Ollama
-        response_stream: Callable = generate_response_stream("phi4", prompt)
+        # Генеруємо стрімінг відповіді Ollama; першим кадром клієнт отримує джерела з контексту
+        usage = {"context_tokens": packed.tokens}
+        if memory:
+            usage["history_tokens"] = memory.count_tokens(history) if history else 0
 
-        # Повертаємо стрімінгову відповідь
-        return StreamingResponse(response_stream, media_type="text/plain")
+        # Готова відповідь: у кеш відповідей (якщо без історії) і в пам'ять розмови
+        def on_complete(answer):
+            if not history:
+                response_cache.store(query_embedding, context_ids, answer)
+            if memory:
+                conversations.record_turn(memory, request.query, answer, search_text)
+
+        response_stream: Callable = agent_event_stream(
+            protocol, request_id, source_items(packed.results),
+            generate_response_stream(
+                "phi4", prompt,
+                on_complete=on_complete,
+                request_id=request_id, request_start=request_start, slot=slot, usage=usage),
+            usage, timings, request_start)
+
+        # Повертаємо стрімінгову відповідь (з кількістю токенів контексту і часом переранжування).
+        # Server-Timing — час етапів до початку генерації
+        headers = {
+            "X-Request-ID": request_id,
+            "X-Context-Tokens": str(packed.tokens),
+            "Server-Timing": f"retrieval;dur={(retrieval_done - request_start) * 1000:.1f}, "
+                             f"prompt;dur={prompt_seconds * 1000:.1f}",
+        }
+        if reranked is not None:
+            headers["X-Rerank-Ms"] = f"{reranked.seconds * 1000:.1f}"
+            headers["X-Rerank-Timed-Out"] = str(reranked.timed_out).lower()
+        # Фонове завдання звільняє слот, навіть якщо стрім так і не почався
+        return StreamingResponse(response_stream, media_type=media_type, headers=headers,
+                                 background=BackgroundTask(slot.release))
 
     except Exception as e:
         # Відправляємо повідомлення про помилку у стрімінговому вигляді
-        return StreamingResponse(iter([f"Error: {str(e)}"]), media_type="text/plain")
\ No newline at end of file
+        ERRORS.inc(stage="agent")
+        return StreamingResponse(iter([encode_frame(protocol, "error", {"message": str(e)})]), media_type=media_type,
+                                 headers={"X-Request-ID": request_id})
+
+
+# FastAPI маршрут: Метрики мікробатчингу та кешу пошуку
+@app.get("/stats/retrieval", dependencies=[Depends(require_ready)])
+async def retrieval_stats():
+    return {"batching": retriever.stats(), "cache": retrieval_cache.stats()}
+
+
+# FastAPI маршрут: Метрики семантичного кешу відповідей
+@app.get("/stats/responses", dependencies=[Depends(require_ready)])
+async def response_cache_stats():
+    return response_cache.stats()
+
+
+# FastAPI маршрут: Час переранжування та кількість перевищень бюджету
+@app.get("/stats/rerank", dependencies=[Depends(require_ready)])
+async def rerank_stats():
+    return reranker.stats() if reranker else {"enabled": False}
+
+
+# FastAPI маршрут: Черги генерації за моделями (активні, в черзі, відмови, середнє очікування)
+@app.get("/stats/admission")
+async def admission_stats():
+    return admission.stats()
+
+
+# FastAPI маршрут: Стан бекендів Ollama (незавершені запити, виключені хости, повтори)
+@app.get("/stats/ollama")
+async def ollama_stats():
+    if isinstance(ollama_client, OllamaRouter):
+        return ollama_client.stats()
+    return {"retries": 0, "backends": [{"url": ollama_client.api_url}]}
+
+
+# FastAPI маршрут: Токени контексту в промптах і відкинуті пасажі
+@app.get("/stats/context")
+async def context_stats():
+    return context_packer.stats()
+
+
+# FastAPI маршрут: Кількість розмов у пам'яті та згортань старих реплік у підсумок
+@app.get("/stats/conversations")
+async def conversation_stats():
+    return conversations.stats()
+
+
+# FastAPI маршрут: Корпуси, доступні для пошуку, з їхніми версіями та кількістю документів
+@app.get("/corpora", dependencies=[Depends(require_ready)])
+async def corpora_status():
+    return corpora.stats()
+
+
+# FastAPI маршрут: Активна версія індексу корпусу (за замовчуванням першого) та час її завантаження
+@app.get("/admin/index", dependencies=[Depends(require_ready)])
+async def index_status(corpus: str = None):
+    try:
+        name = corpora.select([corpus] if corpus else None)[0]
+    except UnknownCorpus as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return corpora.holders[name].stats()
+
+
+# FastAPI маршрут: Метрики у форматі Prometheus (гістограми етапів, кеші, помилки, активні стріми)
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# FastAPI маршрут: Процес живий (для перезапуску зависших воркерів)
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# FastAPI маршрут: Компоненти завантажені, воркер готовий приймати запити; час старту за компонентами
+@app.get("/readyz")
+async def readyz():
+    return JSONResponse(startup.status(), status_code=200 if startup.ready else 503)
@@ -0,0 +1,52 @@
+import math
+import os
+
+from src.agent.text_normalization import extract_identifiers
+
+# Параметри гібридного пошуку (можна перевизначити через змінні оточення)
+HYBRID_RRF_K = int(os.environ.get("HYBRID_RRF_K", "60"))
+HYBRID_LEXICAL_K = int(os.environ.get("HYBRID_LEXICAL_K", "20"))
+# Частка k для векторного пошуку, коли лексичний індекс уже знайшов достатньо кандидатів
+HYBRID_DENSE_RATIO = float(os.environ.get("HYBRID_DENSE_RATIO", "0.6"))
+
+
+# Терміни запиту для лексичного індексу: нормалізований запит і ідентифікатори з оригіналу
+def query_terms(query, normalized_query):
+    return normalized_query.split() + extract_identifiers(query).split()
+
+
+# Скільки кандидатів брати з FAISS: менше, якщо лексичний пошук знайшов не менше k документів
+def dense_k(k, lexical_hits):
+    if lexical_hits >= k:
+        return max(1, math.ceil(k * HYBRID_DENSE_RATIO))
+    return k
+
+
+# Reciprocal rank fusion: документ отримує суму 1 / (rrf_k + ранг) за кожним ранжуванням.
+# Повертає [(id, оцінка)], найкращі першими; id < 0 (порожні місця FAISS) пропускаються
+def reciprocal_rank_fusion(rankings, rrf_k=HYBRID_RRF_K, limit=None):
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            doc_id = int(doc_id)
+            if doc_id < 0:
+                continue
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit] if limit is not None else fused
+
+
+# Кандидати з лексичного індексу (порожньо, якщо для версії індекс не побудовано)
+def lexical_candidates(lexical, terms, k=HYBRID_LEXICAL_K):
+    if lexical is None or not terms:
+        return []
+    _, doc_ids = lexical.search(terms, k)
+    return [int(doc_id) for doc_id in doc_ids]
+
+
+# Злиття векторних і лексичних кандидатів у результати для агентів. distance — відстань FAISS
+# (None, якщо документ знайдено лише лексично), score — оцінка RRF
+def fuse_results(texts, dense_indices, dense_distances, lexical_ids, k):
+    distances = {int(idx): float(distance) for idx, distance in zip(dense_indices, dense_distances) if idx >= 0}
+    return [{"id": doc_id, "text": texts[doc_id], "distance": distances.get(doc_id), "score": score}
+            for doc_id, score in reciprocal_rank_fusion([dense_indices, lexical_ids], limit=k)]
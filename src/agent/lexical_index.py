@@ -0,0 +1,93 @@
+import json
+import math
+import os
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Компактний інвертований індекс BM25 поруч із FAISS-індексом: словник термінів у JSON,
+# списки входжень і довжини документів у .npy (відображаються в пам'ять, як і корпус).
+# id документів збігаються з id у FAISS-індексі
+VOCAB_FILE = "lexical_vocab.json"
+OFFSETS_FILE = "lexical_offsets.npy"
+POSTINGS_FILE = "lexical_postings.npy"
+FREQUENCIES_FILE = "lexical_tf.npy"
+LENGTHS_FILE = "lexical_doc_lengths.npy"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+# Терміни документа: леми processed_text і ідентифікатори, які clean_text вилучив
+def lexical_terms(record):
+    return (record.get("processed_text") or "").split() + (record.get("identifiers") or "").split()
+
+
+# records — записи корпусу за id (None на місці видалених документів)
+def build_lexical_index(records, output_dir):
+    postings = defaultdict(list)
+    lengths = []
+    for doc_id, record in enumerate(records):
+        terms = lexical_terms(record) if record else []
+        lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            postings[term].append((doc_id, tf))
+
+    vocab = sorted(postings)
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    doc_ids, frequencies = [], []
+    for i, term in enumerate(vocab):
+        offsets[i + 1] = offsets[i] + len(postings[term])
+        for doc_id, tf in postings[term]:
+            doc_ids.append(doc_id)
+            frequencies.append(min(tf, np.iinfo(np.uint16).max))
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, VOCAB_FILE), "w", encoding="utf-8") as file:
+        json.dump(vocab, file, ensure_ascii=False)
+    np.save(os.path.join(output_dir, OFFSETS_FILE), offsets)
+    np.save(os.path.join(output_dir, POSTINGS_FILE), np.asarray(doc_ids, dtype=np.uint32))
+    np.save(os.path.join(output_dir, FREQUENCIES_FILE), np.asarray(frequencies, dtype=np.uint16))
+    np.save(os.path.join(output_dir, LENGTHS_FILE), np.asarray(lengths, dtype=np.uint32))
+
+
+def lexical_index_exists(directory):
+    return os.path.exists(os.path.join(directory, VOCAB_FILE))
+
+
+class LexicalIndex:
+    def __init__(self, directory, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        with open(os.path.join(directory, VOCAB_FILE), "r", encoding="utf-8") as file:
+            self._terms = {term: i for i, term in enumerate(json.load(file))}
+        self._offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        self._postings = np.load(os.path.join(directory, POSTINGS_FILE), mmap_mode="r")
+        self._frequencies = np.load(os.path.join(directory, FREQUENCIES_FILE), mmap_mode="r")
+        self._lengths = np.load(os.path.join(directory, LENGTHS_FILE), mmap_mode="r")
+        live = self._lengths[self._lengths > 0]
+        self.num_docs = len(live)
+        self.avg_length = float(live.mean()) if len(live) else 0.0
+
+    # Пошук за термінами запиту: повертає (оцінки BM25, id документів), найкращі першими
+    def search(self, terms, k=10):
+        doc_ids, scores = [], []
+        for term in dict.fromkeys(terms):
+            i = self._terms.get(term)
+            if i is None:
+                continue
+            start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+            docs = np.asarray(self._postings[start:end], dtype=np.int64)
+            tf = np.asarray(self._frequencies[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[docs] / self.avg_length)
+            doc_ids.append(docs)
+            scores.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        if not doc_ids:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        unique, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        top = np.argsort(-totals, kind="stable")[:k]
+        return totals[top].astype(np.float32), unique[top]
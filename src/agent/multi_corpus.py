@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.agent.hybrid import dense_k, fuse_results, lexical_candidates, query_terms
+from src.agent.metrics import CACHE_LOOKUPS, STAGE_SECONDS
+
+# Корпуси агента: "назва=каталог" через кому, напр. "wiki=Data/processed/wiki,big=Data/processed/big".
+# Модель ембеддингів одна на всі корпуси, тож їх мають векторизувати тією самою моделлю
+AGENT_CORPORA = os.environ.get("AGENT_CORPORA", "")
+
+
+def parse_corpora(spec):
+    corpora = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, corpus_dir = item.partition("=")
+        if not corpus_dir:
+            raise ValueError(f"Corpus must be given as name=directory, got: {item}")
+        corpora[name.strip()] = corpus_dir.strip()
+    return corpora
+
+
+class UnknownCorpus(ValueError):
+    pass
+
+
+# Набір іменованих корпусів, кожен зі своїм тримачем ресурсів (FAISS-індекс, тексти, BM25).
+# Запит кодується один раз, а пошук у вибраних корпусах іде паралельно в окремих потоках
+class CorpusSet:
+    def __init__(self, holders, max_workers=None):
+        self.holders = dict(holders)
+        if not self.holders:
+            raise ValueError("At least one corpus is required")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.holders),
+                                            thread_name_prefix="corpus-search")
+
+    @property
+    def names(self):
+        return list(self.holders)
+
+    # Назви корпусів для запиту: усі, якщо не вказано, інакше перевірені на існування
+    def select(self, names=None):
+        if not names:
+            return self.names
+        unknown = [name for name in names if name not in self.holders]
+        if unknown:
+            raise UnknownCorpus(f"Unknown corpora: {', '.join(unknown)}; available: {', '.join(self.names)}")
+        return list(dict.fromkeys(names))
+
+    # Знімки поточних версій усіх корпусів (запит працює з ними до кінця)
+    def snapshot(self):
+        return {name: holder.current for name, holder in self.holders.items()}
+
+    # Відбиток версій для кешу пошуку: змінюється, коли оновлюється будь-який корпус
+    def version(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        return ",".join(f"{name}={resources.version}" for name, resources in snapshot.items())
+
+    def on_swap(self, callback):
+        for holder in self.holders.values():
+            holder.on_swap.append(callback)
+
+    def start_watching(self):
+        for holder in self.holders.values():
+            holder.start_watching()
+
+    def stop_watching(self):
+        for holder in self.holders.values():
+            holder.stop_watching()
+
+    # Пошук одного ембеддингу в кількох індексах; searches — назва -> (знімок, k).
+    # FAISS відпускає GIL, тож індекси шукаються справді паралельно
+    def _submit(self, embedding, searches):
+        query = embedding.reshape(1, -1)
+        return {name: self._executor.submit(resources.index.search, query, k)
+                for name, (resources, k) in searches.items()}
+
+    @staticmethod
+    def _first_rows(results):
+        return {name: (distances[0], indices[0]) for name, (distances, indices) in results.items()}
+
+    def search(self, embedding, searches):
+        start = time.perf_counter()
+        futures = self._submit(embedding, searches)
+        results = self._first_rows({name: future.result() for name, future in futures.items()})
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="search")
+        return results
+
+    async def asearch(self, embedding, searches):
+        start = time.perf_counter()
+        futures = self._submit(embedding, searches)
+        values = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures.values()))
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="search")
+        return self._first_rows(dict(zip(futures, values)))
+
+    def stats(self):
+        return {name: holder.stats() for name, holder in self.holders.items()}
+
+
+# Завантаження корпусів зі специфікації; старий JSON з текстами шукається поруч як <назва>_processed_results.json
+def load_corpus_set(spec):
+    from src.agent.resource_holder import ResourceHolder
+
+    holders = {}
+    for name, corpus_dir in parse_corpora(spec).items():
+        legacy_json_path = os.path.join(os.path.dirname(corpus_dir), f"{name}_processed_results.json")
+        holders[name] = ResourceHolder(corpus_dir, legacy_json_path)
+    return CorpusSet(holders)
+
+
+# Шлях до спільної моделі ембеддингів — модель першого корпусу
+def shared_model_path(spec):
+    return os.path.join(next(iter(parse_corpora(spec).values())), "sentence_transformer_model")
+
+
+# Злиття результатів кількох корпусів. Оцінки RRF різних корпусів не порівнювані, тож у межах
+# корпусу оцінка ділиться на найкращу, а потім множиться на вагу корпусу: наскільки його найближчий
+# документ близький до запиту порівняно з найближчим серед усіх корпусів (модель спільна, тож
+# відстані FAISS порівнювані). Корпус без релевантних документів опускається вниз, а не ділить топ порівну
+def merge_results(per_corpus, k):
+    closeness = {name: max((1.0 / (1.0 + result["distance"]) for result in results
+                            if result["distance"] is not None), default=0.0)
+                 for name, results in per_corpus.items()}
+    best = max(closeness.values(), default=0.0)
+
+    merged = []
+    for name, results in per_corpus.items():
+        if not results:
+            continue
+        top = max(result["score"] for result in results) or 1.0
+        weight = closeness[name] / best if best > 0 else 1.0
+        merged.extend(dict(result, corpus=name, score=result["score"] / top * weight) for result in results)
+    merged.sort(key=lambda result: result["score"], reverse=True)
+    return merged[:k]
+
+
+# Гібридний пошук у вибраних корпусах: BM25 і FAISS у кожному корпусі, злиття RRF, потім злиття
+# корпусів за нормованою оцінкою. encode — корутина, що повертає ембеддинг запиту; вона викликається
+# лише тоді, коли хоча б одного корпусу немає в кеші. Повертає (ембеддинг запиту, k результатів)
+async def search_corpora(corpora, query, search_query, k, encode, retrieval_cache, corpus_names=None):
+    # Увесь запит працює з однією версією кожного індексу, навіть якщо тим часом завантажиться нова
+    snapshot = corpora.snapshot()
+    version = corpora.version(snapshot)
+    terms = query_terms(query, search_query)
+
+    lexical_ids, searches, found = {}, {}, {}
+    for name in corpora.select(corpus_names):
+        # Лексичний пошук BM25 (точні збіги абревіатур та ідентифікаторів); якщо він знайшов
+        # достатньо кандидатів, з FAISS беремо менше
+        lexical_ids[name] = lexical_candidates(snapshot[name].lexical, terms)
+        vector_k = dense_k(k, len(lexical_ids[name]))
+
+        # Повторювані запити беремо з кешу (окремо для кожного корпусу)
+        cached = retrieval_cache.get(f"{name}:{search_query}", vector_k, version)
+        CACHE_LOOKUPS.inc(cache="retrieval", result="miss" if cached is None else "hit")
+        if cached is None:
+            searches[name] = (snapshot[name], vector_k)
+        else:
+            found[name] = cached
+
+    query_embedding = next(iter(found.values()))[0] if found else None
+    if searches:
+        # Ембеддинг генерується один раз, пошук у корпусах — паралельно
+        if query_embedding is None:
+            query_embedding = await encode(search_query)
+        for name, (distances, indices) in (await corpora.asearch(query_embedding, searches)).items():
+            found[name] = (query_embedding, distances, indices)
+            retrieval_cache.set(f"{name}:{search_query}", searches[name][1], found[name], version)
+
+    per_corpus = {name: fuse_results(snapshot[name].texts, found[name][2], found[name][1], lexical_ids[name], k)
+                  for name in lexical_ids}
+    return query_embedding, merge_results(per_corpus, k)
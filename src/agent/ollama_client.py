@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import threading
+import weakref
+
+import httpx
+
+# Налаштування API Ollama (можна перевизначити через змінні оточення)
+OLLAMA_API_URL = os.environ.get("OLLAMA_API_URL", "http://127.0.0.1:11434/api/generate")
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "32"))
+OLLAMA_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE", "16"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "120"))
+OLLAMA_MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "16"))
+
+
+class OllamaError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"{status_code} {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+# Асинхронний клієнт Ollama зі спільним пулом з'єднань (keep-alive)
+class OllamaClient:
+    def __init__(self, api_url=OLLAMA_API_URL, max_connections=OLLAMA_MAX_CONNECTIONS,
+                 max_keepalive=OLLAMA_MAX_KEEPALIVE, keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+                 connect_timeout=OLLAMA_CONNECT_TIMEOUT, read_timeout=OLLAMA_READ_TIMEOUT,
+                 max_concurrency=OLLAMA_MAX_CONCURRENCY):
+        self.api_url = api_url
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        # Пул з'єднань і семафор прив'язані до event loop, тож у кожного циклу свої; запис зникає
+        # разом із циклом. Потоки з різними циклами (сесії Streamlit) не підміняють чужий пул
+        self._clients = weakref.WeakKeyDictionary()  # loop -> (httpx.AsyncClient, Semaphore)
+        self._lock = threading.Lock()
+
+    def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = (httpx.AsyncClient(limits=self.limits, timeout=self.timeout),
+                          asyncio.Semaphore(self.max_concurrency))
+                self._clients[loop] = client
+        return client
+
+    # Стрімінг відповіді: повертає частини тексту по мірі генерації.
+    # headers — додаткові заголовки HTTP (наприклад, X-Request-ID для трасування)
+    async def stream(self, model_name: str, prompt: str, headers=None, **options):
+        http, semaphore = self._ensure_client()
+        data = {"model": model_name, "prompt": prompt, **options}
+
+        async with semaphore:
+            async with http.stream("POST", self.api_url, json=data, headers=headers) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise OllamaError(response.status_code, body.decode("utf-8", errors="replace"))
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk_data = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Ігноруємо некоректні фрагменти
+                        continue
+                    if chunk_data.get("response"):
+                        yield chunk_data["response"]
+                    if chunk_data.get("done"):
+                        break
+
+    # Повна відповідь одним рядком
+    async def generate(self, model_name: str, prompt: str, headers=None, **options):
+        parts = []
+        async for part in self.stream(model_name, prompt, headers=headers, **options):
+            parts.append(part)
+        return "".join(parts)
+
+    # Закриває пул поточного event loop
+    async def aclose(self):
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client[0].aclose()
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from src.agent.metrics import Counter, Gauge
+from src.agent.ollama_client import OLLAMA_API_URL, OllamaClient, OllamaError
+
+# Кілька Ollama-сумісних ендпоінтів через кому (за замовчуванням — один OLLAMA_API_URL)
+OLLAMA_API_URLS = os.environ.get("OLLAMA_API_URLS", OLLAMA_API_URL)
+# Після скількох помилок поспіль бекенд виключається і на скільки секунд
+OLLAMA_MAX_FAILURES = int(os.environ.get("OLLAMA_MAX_FAILURES", "3"))
+OLLAMA_EJECT_SECONDS = float(os.environ.get("OLLAMA_EJECT_SECONDS", "30"))
+OLLAMA_HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "10"))
+OLLAMA_HEALTH_TIMEOUT = float(os.environ.get("OLLAMA_HEALTH_TIMEOUT", "2"))
+
+BACKEND_OUTSTANDING = Gauge("agent_ollama_outstanding", "Generations in progress per Ollama backend", ("backend",))
+BACKEND_REQUESTS = Counter("agent_ollama_requests_total", "Generations per Ollama backend by result",
+                           ("backend", "result"))
+
+
+# Помилки, після яких генерацію можна повторити на іншому бекенді (якщо ще не було жодного токена)
+def is_retryable(error):
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, OllamaError) and (error.status_code >= 500 or error.status_code in (404, 429))
+
+
+class OllamaBackend:
+    def __init__(self, api_url, **client_options):
+        self.api_url = api_url
+        self.health_url = api_url.rsplit("/api/", 1)[0] + "/api/tags"
+        self.client = OllamaClient(api_url=api_url, **client_options)
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    # Виключений бекенд знову отримує пробний запит, коли минув час виключення
+    def available(self, now):
+        return now >= self.ejected_until
+
+    def record_success(self):
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def record_failure(self, max_failures, eject_seconds):
+        self.failures += 1
+        self.errors += 1
+        if self.failures >= max_failures:
+            self.ejected_until = time.monotonic() + eject_seconds
+
+    def stats(self, now):
+        return {
+            "url": self.api_url,
+            "outstanding": self.outstanding,
+            "healthy": self.available(now),
+            "consecutive_failures": self.failures,
+            "ejected_for_seconds": max(0.0, self.ejected_until - now),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+# Маршрутизатор генерації між кількома Ollama: бекенд з найменшою кількістю незавершених запитів,
+# виключення бекендів, що падають, і повтор на іншому бекенді, якщо помилка сталася до першого токена.
+# Інтерфейс той самий, що в OllamaClient (stream, generate, aclose)
+class OllamaRouter:
+    def __init__(self, api_urls, max_failures=OLLAMA_MAX_FAILURES, eject_seconds=OLLAMA_EJECT_SECONDS,
+                 health_timeout=OLLAMA_HEALTH_TIMEOUT, **client_options):
+        self.backends = [OllamaBackend(url, **client_options) for url in api_urls]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.health_timeout = health_timeout
+        self.retries = 0
+        self._health_task = None
+
+    def _pick(self, tried):
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b not in tried and b.available(now)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda backend: backend.outstanding)
+
+    async def stream(self, model_name: str, prompt: str, headers=None, **options):
+        tried = set()
+        last_error = None
+        while True:
+            backend = self._pick(tried)
+            if backend is None:
+                if isinstance(last_error, OllamaError):
+                    raise last_error
+                raise OllamaError(503, f"No healthy Ollama backend: {last_error or 'all backends ejected'}")
+            tried.add(backend)
+            if last_error is not None:
+                self.retries += 1
+
+            started = False
+            backend.outstanding += 1
+            backend.requests += 1
+            BACKEND_OUTSTANDING.inc(backend=backend.api_url)
+            try:
+                async for part in backend.client.stream(model_name, prompt, headers=headers, **options):
+                    started = True
+                    yield part
+                backend.record_success()
+                BACKEND_REQUESTS.inc(backend=backend.api_url, result="ok")
+                return
+            except (OllamaError, httpx.TransportError) as e:
+                BACKEND_REQUESTS.inc(backend=backend.api_url, result="error")
+                if not is_retryable(e):
+                    raise
+                backend.record_failure(self.max_failures, self.eject_seconds)
+                if started:
+                    # Частину відповіді вже віддано користувачу, повторювати не можна
+                    raise e if isinstance(e, OllamaError) else OllamaError(502, str(e))
+                print(f"Ollama backend {backend.api_url} failed before the first token: {e}")
+                last_error = e
+            finally:
+                backend.outstanding -= 1
+                BACKEND_OUTSTANDING.dec(backend=backend.api_url)
+
+    async def generate(self, model_name: str, prompt: str, headers=None, **options):
+        parts = []
+        async for part in self.stream(model_name, prompt, headers=headers, **options):
+            parts.append(part)
+        return "".join(parts)
+
+    # Перевірка всіх бекендів через /api/tags: живий бекенд повертається, мертвий виключається
+    async def check_health(self):
+        async with httpx.AsyncClient(timeout=self.health_timeout) as http:
+            async def check(backend):
+                try:
+                    response = await http.get(backend.health_url)
+                    healthy = response.status_code == 200
+                except httpx.HTTPError:
+                    healthy = False
+                if healthy:
+                    backend.record_success()
+                elif backend.available(time.monotonic()):
+                    backend.failures = self.max_failures
+                    backend.ejected_until = time.monotonic() + self.eject_seconds
+                return healthy
+
+            return await asyncio.gather(*(check(backend) for backend in self.backends))
+
+    async def _health_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"Ollama health check failed: {e}")
+
+    # Періодичні перевірки в поточному event loop (наприклад, з lifespan FastAPI)
+    def start_health_checks(self, interval=OLLAMA_HEALTH_INTERVAL):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop(interval))
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for backend in self.backends:
+            await backend.client.aclose()
+
+    def stats(self):
+        now = time.monotonic()
+        return {"retries": self.retries, "backends": [backend.stats(now) for backend in self.backends]}
+
+
+# Клієнт генерації: OllamaClient для одного ендпоінта, маршрутизатор — для кількох
+def create_ollama_client(api_urls=OLLAMA_API_URLS, **options):
+    urls = [url.strip() for url in api_urls.split(",") if url.strip()] if isinstance(api_urls, str) else api_urls
+    if len(urls) == 1:
+        return OllamaClient(api_url=urls[0], **options)
+    return OllamaRouter(urls, **options)
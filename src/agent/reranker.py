@@ -0,0 +1,134 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+
+from src.agent.chunking import passage_text
+
+# Модель cross-encoder для переранжування (порожньо — етап вимкнено)
+RERANKER_MODEL = os.environ.get("RERANKER_MODEL", "")
+# Скільки кандидатів пошуку переранжовувати, жорсткий бюджет часу та розмір батчу моделі
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.environ.get("RERANK_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.environ.get("RERANK_BATCH_SIZE", "16"))
+
+
+# Оцінювач пар (запит, пасаж) моделлю cross-encoder з sentence_transformers
+class CrossEncoderScorer:
+    def __init__(self, model_name=RERANKER_MODEL):
+        from sentence_transformers import CrossEncoder  # Завантажується лише з увімкненим переранжуванням
+
+        self.model = CrossEncoder(model_name)
+
+    def __call__(self, query, passages):
+        return [float(score) for score in self.model.predict([(query, p) for p in passages],
+                                                             batch_size=len(passages))]
+
+
+@dataclass
+class RerankResult:
+    results: list
+    seconds: float
+    timed_out: bool = False
+
+
+# Переранжування кандидатів пошуку в межах бюджету часу. Якщо оцінювач не встигає,
+# повертається початковий порядок (векторний або гібридний), обрізаний до top_n
+class Reranker:
+    def __init__(self, scorer, budget_ms=RERANK_BUDGET_MS, batch_size=RERANK_BATCH_SIZE):
+        self.scorer = scorer
+        self.budget = budget_ms / 1000
+        self.batch_size = batch_size
+        # Один потік: модель не ділиться між паралельними запитами
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.last_error = None
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _score(self, query, passages, deadline):
+        scores = []
+        for start in range(0, len(passages), self.batch_size):
+            # Після вичерпання бюджету не витрачаємо процесор на решту батчів
+            if time.monotonic() > deadline:
+                return None
+            scores.extend(self.scorer(query, passages[start:start + self.batch_size]))
+        return scores
+
+    def _submit(self, query, results):
+        passages = [passage_text(result["text"]) for result in results]
+        return self._executor.submit(self._score, query, passages, time.monotonic() + self.budget)
+
+    def _finish(self, results, scores, top_n, start):
+        seconds = time.perf_counter() - start
+        timed_out = scores is None
+        if timed_out:
+            ranked = results
+        else:
+            order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+            ranked = [dict(results[i], rerank_score=scores[i]) for i in order]
+        self._record(seconds, timed_out)
+        return RerankResult(ranked[:top_n], seconds, timed_out)
+
+    def rerank(self, query, results, top_n):
+        start = time.perf_counter()
+        if not results:
+            return RerankResult([], 0.0)
+        try:
+            scores = self._submit(query, results).result(timeout=self.budget)
+        except FutureTimeoutError:
+            scores = None
+        except Exception as e:
+            self._record_error(e)
+            scores = None
+        return self._finish(results, scores, top_n, start)
+
+    # Те саме для event loop FastAPI: очікування не блокує інші запити
+    async def arerank(self, query, results, top_n):
+        start = time.perf_counter()
+        if not results:
+            return RerankResult([], 0.0)
+        try:
+            scores = await asyncio.wait_for(asyncio.wrap_future(self._submit(query, results)), self.budget)
+        except asyncio.TimeoutError:
+            scores = None
+        except Exception as e:
+            self._record_error(e)
+            scores = None
+        return self._finish(results, scores, top_n, start)
+
+    # Помилка моделі не виводиться на кожен запит, а рахується і видна в stats()
+    def _record_error(self, error):
+        with self._lock:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def _record(self, seconds, timed_out):
+        with self._lock:
+            self.requests += 1
+            self.timeouts += timed_out
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "mean_ms": self.total_seconds / self.requests * 1000 if self.requests else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "budget_ms": self.budget * 1000,
+            "batch_size": self.batch_size,
+        }
+
+
+# Переранжувальник з моделлю RERANKER_MODEL або None, якщо етап вимкнено
+def create_reranker(model_name=RERANKER_MODEL):
+    return Reranker(CrossEncoderScorer(model_name)) if model_name else None
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from src.agent.lexical_index import LexicalIndex, lexical_index_exists
+from src.agent.resources import VERSIONS_DIR, current_version, load_corpus, load_faiss_index
+
+# Як часто перевіряти покажчик CURRENT на нову версію (секунди)
+INDEX_POLL_INTERVAL = float(os.environ.get("INDEX_POLL_INTERVAL", "10"))
+
+
+# Знімок завантажених ресурсів однієї версії: запит бере знімок на початку
+# і користується ним до кінця, навіть якщо тим часом активною стала нова версія
+@dataclass
+class IndexResources:
+    version: str
+    index_dir: str
+    index: object
+    texts: object
+    lexical: object = None  # Інвертований індекс BM25, якщо його побудовано для цієї версії
+    loaded_at: float = field(default_factory=time.time)
+    load_seconds: float = 0.0
+
+
+LEGACY_VERSION_PREFIX = "legacy-"
+
+
+# Ідентифікатор версії: вміст CURRENT, а для старої розкладки без версій — mtime файлу індексу
+def version_id(corpus_dir):
+    version = current_version(corpus_dir)
+    if version:
+        return version
+    try:
+        return f"{LEGACY_VERSION_PREFIX}{os.stat(os.path.join(corpus_dir, 'vector_index.faiss')).st_mtime_ns}"
+    except FileNotFoundError:
+        return f"{LEGACY_VERSION_PREFIX}missing"
+
+
+# Каталог саме цієї версії (CURRENT повторно не читається: він міг змінитися після version_id)
+def version_dir(corpus_dir, version):
+    if version.startswith(LEGACY_VERSION_PREFIX):
+        return corpus_dir
+    return os.path.join(corpus_dir, VERSIONS_DIR, version)
+
+
+# Тримач ресурсів корпусу: стежить за CURRENT, завантажує нову версію у фоні й атомарно підміняє знімок
+class ResourceHolder:
+    def __init__(self, corpus_dir, legacy_json_path=None, poll_interval=INDEX_POLL_INTERVAL, on_swap=()):
+        self.corpus_dir = corpus_dir
+        self.legacy_json_path = legacy_json_path
+        self.poll_interval = poll_interval
+        self.on_swap = list(on_swap)
+        self.reloads = 0
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.current = self._load(version_id(corpus_dir))
+
+    def _load(self, version):
+        start = time.perf_counter()
+        index_dir = version_dir(self.corpus_dir, version)
+        index = load_faiss_index(f"{index_dir}/vector_index.faiss")
+        texts = load_corpus(index_dir, self.legacy_json_path)
+        lexical = LexicalIndex(index_dir) if lexical_index_exists(index_dir) else None
+        return IndexResources(version, index_dir, index, texts, lexical, load_seconds=time.perf_counter() - start)
+
+    # Перевірка нової версії; повертає True, якщо знімок було замінено
+    def check_for_update(self):
+        with self._reload_lock:
+            version = version_id(self.corpus_dir)
+            if version == self.current.version:
+                return False
+            try:
+                resources = self._load(version)
+            except Exception as e:
+                # Залишаємось на попередній версії, спробуємо знову на наступній перевірці
+                self.last_error = f"{version}: {e}"
+                print(f"Failed to load index version {version}: {e}")
+                return False
+
+            # Присвоєння атрибута атомарне; старий знімок живе, доки його використовують запити
+            self.current = resources
+            self.reloads += 1
+            self.last_error = None
+            print(f"Index version {version} loaded in {resources.load_seconds:.2f}s.")
+            for callback in self.on_swap:
+                callback(resources)
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+
+    def start_watching(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="index-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def stats(self):
+        resources = self.current
+        return {
+            "corpus_dir": self.corpus_dir,
+            "version": resources.version,
+            "index_dir": resources.index_dir,
+            "documents": resources.index.ntotal,
+            "lexical_index": resources.lexical is not None,
+            "loaded_at": resources.loaded_at,
+            "load_seconds": resources.load_seconds,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,92 @@
+import json
+import os
+
+import faiss
+
+from src.agent.corpus_store import CorpusStore, corpus_exists
+
+# Файл з типом індексу та його параметрами, який vectorizer.py зберігає поруч з індексом
+INDEX_CONFIG_FILE = "index_config.json"
+
+# Параметри пошуку, які FAISS дозволяє змінювати після завантаження індексу
+SEARCH_PARAMS = ("nprobe", "efSearch")
+
+# Відображення індексу в пам'ять замість копіювання (IFC — також для IndexFlat/HNSW)
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def load_index_config(index_dir):
+    config_path = os.path.join(index_dir, INDEX_CONFIG_FILE)
+    if not os.path.exists(config_path):
+        # Старі індекси без конфігурації — точний IndexFlatL2
+        return {"index_type": "flat", "params": {}}
+    with open(config_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Застосування збережених параметрів пошуку (nprobe для IVF, efSearch для HNSW)
+def apply_search_params(index, params):
+    parameter_space = faiss.ParameterSpace()
+    for name in SEARCH_PARAMS:
+        if name in params:
+            parameter_space.set_index_parameter(index, name, params[name])
+    return index
+
+
+# Завантаження FAISS-індексу разом з параметрами з index_config.json
+def load_faiss_index(index_path, mmap=True):
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(index_path, MMAP_FLAGS)
+        except RuntimeError:
+            # Тип індексу не підтримує mmap — читаємо звичайно
+            index = None
+    if index is None:
+        index = faiss.read_index(index_path)
+    config = load_index_config(os.path.dirname(index_path))
+    return apply_search_params(index, config.get("params", {}))
+
+
+# Завантаження корпусу: компактний формат з таблицею зміщень, якщо він є,
+# інакше старий JSON-список записів
+def load_corpus(index_dir, legacy_json_path=None):
+    if corpus_exists(index_dir) or legacy_json_path is None:
+        return CorpusStore(index_dir)
+    with open(legacy_json_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Версіоновані індекси: Data/processed/<corpus>/versions/<версія>/ і файл CURRENT з назвою активної версії
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def current_version(corpus_dir):
+    try:
+        with open(os.path.join(corpus_dir, CURRENT_FILE), "r", encoding="utf-8") as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Каталог активної версії індексу (або сам каталог корпусу для старої розкладки без версій)
+def resolve_index_dir(corpus_dir):
+    version = current_version(corpus_dir)
+    return os.path.join(corpus_dir, VERSIONS_DIR, version) if version else corpus_dir
+
+
+# Атомарна публікація: готовий каталог переноситься у versions/, потім CURRENT замінюється через os.replace
+def publish_version(corpus_dir, build_dir, version):
+    versions_dir = os.path.join(corpus_dir, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+    version_dir = os.path.join(versions_dir, version)
+    os.rename(build_dir, version_dir)
+
+    tmp_path = os.path.join(corpus_dir, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(version)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, os.path.join(corpus_dir, CURRENT_FILE))
+    return version_dir
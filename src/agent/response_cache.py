@@ -0,0 +1,92 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Налаштування семантичного кешу відповідей (можна перевизначити через змінні оточення)
+RESPONSE_CACHE_THRESHOLD = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "1800"))
+
+
+# Семантичний кеш відповідей LLM: запит, близький за косинусною подібністю до вже
+# відповіденого і з тими самими знайденими контекстами, отримує збережену відповідь
+class SemanticResponseCache:
+    def __init__(self, threshold=RESPONSE_CACHE_THRESHOLD, max_size=RESPONSE_CACHE_SIZE,
+                 ttl=RESPONSE_CACHE_TTL):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        # id запису -> (ключ контекстів, нормований ембеддинг, відповідь, час завершення)
+        self._entries = OrderedDict()
+        # ключ контекстів -> id записів; порівнюємо ембеддинги лише в межах однакових контекстів
+        self._by_context = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype="float32").ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # context_ids — номери документів або "корпус:номер", коли агент шукає в кількох корпусах
+    def lookup(self, embedding, context_ids):
+        context_key = tuple(str(i) for i in context_ids)
+        vector = self._unit(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_context.get(context_key, ())):
+                _, cached_vector, _, expires_at = self._entries[entry_id]
+                if expires_at < now:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(vector, cached_vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][2]
+
+    def store(self, embedding, context_ids, answer):
+        context_key = tuple(str(i) for i in context_ids)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (context_key, self._unit(embedding), answer, time.monotonic() + self.ttl)
+            self._by_context.setdefault(context_key, set()).add(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    # Після заміни версії індексу id контекстів можуть означати інші документи
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    def _remove(self, entry_id):
+        context_key = self._entries.pop(entry_id)[0]
+        ids = self._by_context[context_key]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_context[context_key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.agent.metrics import STAGE_SECONDS
+
+# Налаштування мікробатчингу (можна перевизначити через змінні оточення)
+RETRIEVAL_BATCH_WINDOW_MS = float(os.environ.get("RETRIEVAL_BATCH_WINDOW_MS", "5"))
+RETRIEVAL_MAX_BATCH_SIZE = int(os.environ.get("RETRIEVAL_MAX_BATCH_SIZE", "32"))
+
+
+# Воркер пошуку: збирає паралельні запити за коротке вікно, кодує їх одним батчем
+# і виконує один пакетний index.search поза event loop
+class BatchingRetriever:
+    def __init__(self, model, index, batch_window_ms=RETRIEVAL_BATCH_WINDOW_MS,
+                 max_batch_size=RETRIEVAL_MAX_BATCH_SIZE):
+        self.model = model
+        self.index = index
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        # Один потік: батчі виконуються послідовно, а event loop лишається вільним
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval")
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+        # Метрики розмірів батчів
+        self.batches = 0
+        self.queries = 0
+        self.batch_sizes = Counter()
+        self.busy_time = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._loop is not loop or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._worker = loop.create_task(self._run())
+
+    # Пошук k найближчих текстів: повертає (ембеддинг запиту, відстані, індекси).
+    # index дозволяє шукати в конкретній версії індексу (під час гарячого перезавантаження)
+    async def search(self, query: str, k: int = 5, index=None):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((query, k, index if index is not None else self.index, future))
+        return await future
+
+    # Лише ембеддинг запиту (в тому ж батчі, що й пошуки); пошук виконує викликач,
+    # наприклад в кількох корпусах одночасно
+    async def encode(self, query: str):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((query, 0, None, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await self._loop.run_in_executor(self._executor, self._encode_and_search, batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, k, index, future), (embedding, distances, indices) in zip(batch, results):
+                if not future.done():
+                    future.set_result(embedding if index is None else (embedding, distances[:k], indices[:k]))
+
+    def _encode_and_search(self, batch):
+        start = time.perf_counter()
+        queries = [query for query, *_ in batch]
+        embeddings = np.asarray(self.model.encode(queries), dtype="float32")
+        encoded = time.perf_counter()
+        STAGE_SECONDS.observe(encoded - start, stage="embed")
+
+        # Один index.search на кожну версію індексу в батчі (зазвичай одна)
+        groups = {}
+        for i, (_, k, index, _) in enumerate(batch):
+            if index is not None:
+                groups.setdefault(id(index), (index, []))[1].append(i)
+        results = [(embedding, None, None) for embedding in embeddings]
+        for index, positions in groups.values():
+            max_k = max(batch[i][1] for i in positions)
+            distances, indices = index.search(embeddings[positions], max_k)
+            for row, i in enumerate(positions):
+                results[i] = (embeddings[i], distances[row], indices[row])
+        if groups:
+            STAGE_SECONDS.observe(time.perf_counter() - encoded, stage="search")
+
+        self.busy_time += time.perf_counter() - start
+        self.batches += 1
+        self.queries += len(queries)
+        self.batch_sizes[len(queries)] += 1
+        return results
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "max_batch_size": max(self.batch_sizes, default=0),
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "busy_seconds": self.busy_time,
+            "batch_window_ms": self.batch_window * 1000,
+            "max_batch_limit": self.max_batch_size,
+        }
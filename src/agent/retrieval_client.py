@@ -0,0 +1,46 @@
+import io
+import os
+
+import httpx
+
+# Адреса окремого сервісу пошуку (порожньо — агент шукає у власному процесі)
+RETRIEVAL_SERVICE_URL = os.environ.get("RETRIEVAL_SERVICE_URL", "")
+RETRIEVAL_SERVICE_TIMEOUT = float(os.environ.get("RETRIEVAL_SERVICE_TIMEOUT", "10"))
+
+
+# Розбір пакетної відповіді .npz: embeddings (n, dim), ids, scores, distances і corpora (n, k)
+def decode_npz(content):
+    import numpy as np
+
+    with np.load(io.BytesIO(content)) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+# Синхронний клієнт сервісу пошуку зі спільним пулом з'єднань (для Streamlit і офлайн-оцінки)
+class RetrievalServiceClient:
+    def __init__(self, base_url=RETRIEVAL_SERVICE_URL, timeout=RETRIEVAL_SERVICE_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self._http = httpx.Client(base_url=self.base_url, timeout=timeout)
+
+    def _post(self, path, body):
+        response = self._http.post(path, json=body)
+        response.raise_for_status()
+        return response
+
+    def corpora(self):
+        response = self._http.get("/corpora")
+        response.raise_for_status()
+        return list(response.json())
+
+    # Результати у тому ж вигляді, що й локальний пошук; з include_text поле text — повний запис документа
+    def search(self, query, k=5, corpora=None, include_text=False):
+        body = {"query": query, "k": k, "corpora": corpora, "include_text": include_text}
+        return self._post("/search", body).json()["results"]
+
+    def search_batch(self, queries, k=5, corpora=None, include_text=False, format="json"):
+        body = {"queries": list(queries), "k": k, "corpora": corpora, "include_text": include_text, "format": format}
+        response = self._post("/search/batch", body)
+        return decode_npz(response.content) if format == "npz" else response.json()["results"]
+
+    def close(self):
+        self._http.close()
@@ -0,0 +1,208 @@
+import asyncio
+import io
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+
+# Легкі модулі; torch, sentence_transformers, faiss і numpy імпортуються під час завантаження у фоні
+from src.agent.cache import create_retrieval_cache
+from src.agent.chunking import passage_text
+from src.agent.metrics import REGISTRY, STAGE_SECONDS
+from src.agent.multi_corpus import AGENT_CORPORA, UnknownCorpus, search_corpora, shared_model_path
+from src.agent.startup import Startup
+from src.agent.text_normalization import LemmaCache, load_stopwords, normalize_for_search
+
+# Окремий сервіс пошуку: один теплий процес з моделлю та індексами для обох агентів і офлайн-оцінки.
+# Запуск: uvicorn src.agent.retrieval_service:app --port 8001
+CORPORA = AGENT_CORPORA or "wiki=Data/processed/wiki,big=Data/processed/big"
+# Довжина уривку тексту в результатах і найбільша кількість запитів в одному /search/batch
+SEARCH_SNIPPET_CHARS = int(os.environ.get("SEARCH_SNIPPET_CHARS", "300"))
+SEARCH_MAX_BATCH = int(os.environ.get("SEARCH_MAX_BATCH", "256"))
+NPZ_MEDIA_TYPE = "application/x-npz"
+
+model = corpora = retriever = retrieval_cache = stopwords = lemma_cache = None
+startup = Startup()
+
+
+def load_model():
+    from src.agent.embedding_backend import load_embedding_model
+
+    return load_embedding_model(shared_model_path(CORPORA))
+
+
+def load_index():
+    from src.agent.multi_corpus import load_corpus_set
+
+    return load_corpus_set(CORPORA)
+
+
+def load_normalization():
+    return load_stopwords("Data/stopwords_ua.txt"), LemmaCache.load(preload_morph=True)
+
+
+async def load_components():
+    global model, corpora, retriever, retrieval_cache, stopwords, lemma_cache
+
+    try:
+        loaded = await startup.load(model=load_model, index=load_index, normalization=load_normalization)
+    except Exception:
+        return
+    from src.agent.retrieval import BatchingRetriever
+
+    model, corpora = loaded["model"], loaded["index"]
+    stopwords, lemma_cache = loaded["normalization"]
+    # Запити з /search/batch і паралельних /search кодуються спільними батчами
+    retriever = BatchingRetriever(model, None)
+    retrieval_cache = create_retrieval_cache(fingerprint=corpora.version)
+    corpora.start_watching()
+    startup.mark_ready()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loading = asyncio.create_task(load_components())
+    yield
+    loading.cancel()
+    if corpora is not None:
+        corpora.stop_watching()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def require_ready():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail="Retrieval service is starting up")
+
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = 5
+    corpora: Optional[List[str]] = None  # Корпуси для пошуку (за замовчуванням усі)
+    include_text: bool = False  # Повний запис документа, а не лише уривок
+    include_embedding: bool = False  # Ембеддинг запиту (список float)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    k: int = 5
+    corpora: Optional[List[str]] = None
+    include_text: bool = False
+    # "json" або "npz": ембеддинги, id, оцінки та відстані масивами NumPy без JSON-серіалізації
+    format: str = "json"
+
+
+def select_corpora(names):
+    try:
+        return corpora.select(names)
+    except UnknownCorpus as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def search_one(query, k, corpus_names):
+    # Лематизований запит відповідає формі processed_text у корпусі
+    search_query = normalize_for_search(query, lemma_cache, stopwords) or query
+    return await search_corpora(corpora, query, search_query, k, retriever.encode, retrieval_cache, corpus_names)
+
+
+# Результат для клієнта: корпус, id, оцінки та уривок (або повний запис з include_text)
+def hit(result, include_text):
+    item = {
+        "corpus": result["corpus"],
+        "id": result["id"],
+        "score": result["score"],
+        "distance": result["distance"],
+        "snippet": passage_text(result["text"], SEARCH_SNIPPET_CHARS)[:SEARCH_SNIPPET_CHARS],
+    }
+    if include_text:
+        item["text"] = result["text"]
+    return item
+
+
+# Масиви .npz для пакетних відповідей; порожні місця (менше ніж k результатів) — id -1 і відстань NaN
+def encode_npz(found, k):
+    import numpy as np
+
+    shape = (len(found), k)
+    ids = np.full(shape, -1, dtype="int64")
+    scores = np.zeros(shape, dtype="float32")
+    distances = np.full(shape, np.nan, dtype="float32")
+    corpus_names = np.full(shape, "", dtype=object)
+    for row, (_, results) in enumerate(found):
+        for column, result in enumerate(results[:k]):
+            ids[row, column] = result["id"]
+            scores[row, column] = result["score"]
+            if result["distance"] is not None:
+                distances[row, column] = result["distance"]
+            corpus_names[row, column] = result["corpus"]
+
+    buffer = io.BytesIO()
+    np.savez(buffer, embeddings=np.stack([np.asarray(embedding, dtype="float32") for embedding, _ in found]),
+             ids=ids, scores=scores, distances=distances, corpora=corpus_names.astype(str))
+    return buffer.getvalue()
+
+
+def timing_headers(start):
+    return {"Server-Timing": f"search;dur={(time.perf_counter() - start) * 1000:.1f}"}
+
+
+@app.post("/search", dependencies=[Depends(require_ready)])
+async def search(request: SearchRequest):
+    start = time.perf_counter()
+    corpus_names = select_corpora(request.corpora)
+    embedding, results = await search_one(request.query, request.k, corpus_names)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="retrieval")
+    body = {"results": [hit(result, request.include_text) for result in results]}
+    if request.include_embedding:
+        body["embedding"] = [float(value) for value in embedding]
+    return JSONResponse(body, headers=timing_headers(start))
+
+
+# Пакетний пошук: усі запити кодуються разом (мікробатчинг) і шукаються паралельно
+@app.post("/search/batch", dependencies=[Depends(require_ready)])
+async def search_batch(request: BatchSearchRequest):
+    start = time.perf_counter()
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    if len(request.queries) > SEARCH_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {SEARCH_MAX_BATCH} queries per batch")
+    if request.format not in ("json", "npz"):
+        raise HTTPException(status_code=400, detail="format must be json or npz")
+    corpus_names = select_corpora(request.corpora)
+    found = await asyncio.gather(*(search_one(query, request.k, corpus_names) for query in request.queries))
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="retrieval")
+
+    if request.format == "npz":
+        return Response(encode_npz(found, request.k), media_type=NPZ_MEDIA_TYPE, headers=timing_headers(start))
+    return JSONResponse({"results": [[hit(result, request.include_text) for result in results]
+                                     for _, results in found]}, headers=timing_headers(start))
+
+
+@app.get("/corpora", dependencies=[Depends(require_ready)])
+async def corpora_status():
+    return corpora.stats()
+
+
+@app.get("/stats/retrieval", dependencies=[Depends(require_ready)])
+async def retrieval_stats():
+    return {"batching": retriever.stats(), "cache": retrieval_cache.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    return JSONResponse(startup.status(), status_code=200 if startup.ready else 503)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+
+# Стан запуску агента: компоненти завантажуються паралельно в потоках, час кожного
+# записується окремо, а готовність віддається зонду /readyz балансувальника
+class Startup:
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready = False
+        self.error = None
+        self.timings = {}
+        self.total_seconds = None
+        self._start = time.perf_counter()
+
+    async def _timed(self, name, loader):
+        start = time.perf_counter()
+        try:
+            return await asyncio.to_thread(loader)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    # loaders — назва компонента -> функція завантаження; повертає назва -> результат.
+    # Важкі імпорти (torch, faiss) виконуються всередині функцій і входять у їхній час
+    async def load(self, **loaders):
+        try:
+            values = await asyncio.gather(*(self._timed(name, loader) for name, loader in loaders.items()))
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"Startup failed: {self.error}")
+            raise
+        return dict(zip(loaders, values))
+
+    def mark_ready(self):
+        self.total_seconds = time.perf_counter() - self._start
+        self.ready = True
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+        print(f"Startup: {breakdown}; ready in {self.total_seconds:.2f}s")
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "started_at": self.started_at,
+            "total_seconds": self.total_seconds,
+            "components": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+        }
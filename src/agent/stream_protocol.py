@@ -0,0 +1,59 @@
+import json
+
+from src.agent.chunking import passage_text
+
+# Протокол стрімінгу /agent. Клієнт обирає формат заголовком Accept:
+#   application/x-ndjson — один JSON-кадр на рядок;
+#   text/event-stream    — Server-Sent Events (event: <тип>, data: <JSON>);
+#   інакше               — text/plain, лише текст відповіді (як раніше).
+# Кадри: sources (джерела до першого токена), delta (частина відповіді), done (час і використання), error
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+TEXT_MEDIA_TYPE = "text/plain"
+MEDIA_TYPES = {"ndjson": NDJSON_MEDIA_TYPE, "sse": SSE_MEDIA_TYPE, "text": TEXT_MEDIA_TYPE}
+SOURCE_SNIPPET_CHARS = 200
+
+
+def negotiate_protocol(accept):
+    accept = (accept or "").lower()
+    if NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    if SSE_MEDIA_TYPE in accept:
+        return "sse"
+    return "text"
+
+
+# Кадр у вибраному форматі; для text/plain лишаються тільки текст відповіді та помилки
+def encode_frame(protocol, event, payload):
+    if protocol == "text":
+        if event == "delta":
+            return payload["text"]
+        if event == "error":
+            return f"Error: {payload['message']}"
+        return ""
+    data = json.dumps({"type": event, **payload}, ensure_ascii=False)
+    if protocol == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+# Джерела відповіді для клієнта: корпус, id, адреса, оцінка і короткий уривок
+def source_items(results, snippet_chars=SOURCE_SNIPPET_CHARS):
+    items = []
+    for result in results:
+        record = result["text"]
+        items.append({
+            "corpus": result.get("corpus"),
+            "id": result["id"],
+            "url": record.get("url") if isinstance(record, dict) else None,
+            "score": result.get("score"),
+            "snippet": passage_text(record, snippet_chars)[:snippet_chars] if isinstance(record, dict) else "",
+        })
+    return items
+
+
+# Розбір кадрів NDJSON з рядків відповіді (для клієнтів, напр. web_agent.py); порожні рядки пропускаються
+def iter_frames(lines):
+    for line in lines:
+        if line and line.strip():
+            yield json.loads(line)
@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Спільна нормалізація тексту для обробки корпусу (data_proc.py) і запитів у агентах,
+# щоб запити приводились до того ж вигляду, що й processed_text
+LEMMA_CACHE_PATH = "Data/processed/lemma_cache.json"
+LEMMA_CACHE_SIZE = int(os.environ.get("LEMMA_CACHE_SIZE", "500000"))
+
+
+# Завантаженн стоп
+def load_stopwords(filepath):
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return set(word.strip() for word in file.readlines())
+
+
+# Очищення тексту
+def clean_text(text):
+    text = text.lower()
+    text = re.sub(r'[^а-яєґіїї\s]', '', text)  # Залишаємо тільки літери та пробіли
+    return text
+
+
+# Ідентифікатори, які clean_text вилучає: латиниця та цифри (JetIQ, коди курсів, роки).
+# Потрібні лексичному індексу для точних збігів; повертаються без повторів у порядку появи
+def extract_identifiers(text):
+    tokens = re.findall(r"[\w-]*[a-z0-9][\w-]*", text.lower())
+    return ' '.join(dict.fromkeys(token.strip('-_') for token in tokens if token.strip('-_')))
+
+
+# Швидка токенізація очищеного тексту: після clean_text лишаються тільки літери та пробіли,
+# тож слова збігаються з токенами stanza без запуску нейромережі
+def fast_tokenize(text):
+    return re.findall(r'\S+', text)
+
+
+# Видалення стоп-слів
+def remove_stopwords(tokens, stopwords):
+    return [token for token in tokens if token not in stopwords]
+
+
+# Обмежений LRU-кеш лем pymorphy2: кожна словоформа аналізується один раз
+class LemmaCache:
+    def __init__(self, morph=None, max_size=LEMMA_CACHE_SIZE, lemmas=None):
+        self._morph = morph
+        self.max_size = max_size
+        self._lemmas = OrderedDict(lemmas or {})
+        self._new = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._drained_hits = 0
+        self._drained_misses = 0
+
+    @property
+    def morph(self):
+        if self._morph is None:
+            import pymorphy2  # Потрібен лише для словоформ, яких ще немає в кеші
+
+            self._morph = pymorphy2.MorphAnalyzer(lang='uk')
+        return self._morph
+
+    def lemmatize(self, token):
+        with self._lock:
+            lemma = self._lemmas.get(token)
+            if lemma is not None:
+                self.hits += 1
+                self._lemmas.move_to_end(token)
+                return lemma
+            self.misses += 1
+
+        lemma = self.morph.parse(token)[0].normal_form
+        with self._lock:
+            self._lemmas[token] = lemma
+            self._new[token] = lemma
+            while len(self._lemmas) > self.max_size:
+                self._lemmas.popitem(last=False)
+        return lemma
+
+    def lemmatize_tokens(self, tokens):
+        return [self.lemmatize(token) for token in tokens]
+
+    # Нові леми та лічильники з моменту попереднього виклику (для злиття кешів воркерів)
+    def drain(self):
+        with self._lock:
+            new, self._new = self._new, {}
+            hits, misses = self.hits - self._drained_hits, self.misses - self._drained_misses
+            self._drained_hits, self._drained_misses = self.hits, self.misses
+        return new, hits, misses
+
+    def merge(self, lemmas, hits=0, misses=0):
+        with self._lock:
+            self._lemmas.update(lemmas)
+            while len(self._lemmas) > self.max_size:
+                self._lemmas.popitem(last=False)
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._lemmas)}
+
+    def save(self, path=LEMMA_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock:
+            lemmas = dict(self._lemmas)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(lemmas, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # preload_morph — створити аналізатор pymorphy2 одразу (під час старту сервісу, у потоці завантаження),
+    # а не при першій невідомій словоформі всередині обробника запиту
+    @classmethod
+    def load(cls, path=LEMMA_CACHE_PATH, morph=None, max_size=LEMMA_CACHE_SIZE, preload_morph=False):
+        lemmas = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                lemmas = json.load(file)
+        cache = cls(morph=morph, max_size=max_size, lemmas=lemmas)
+        if preload_morph:
+            cache.morph
+        return cache
+
+
+# Нормалізація запиту так само, як process_text обробляє корпус
+def normalize_for_search(text, lemmas, stopwords):
+    tokens = remove_stopwords(fast_tokenize(clean_text(text)), stopwords)
+    return ' '.join(lemmas.lemmatize_tokens(tokens))
@@ -0,0 +1,73 @@
+import os
+import time
+
+# Найбільша частота перемальовування поточного абзацу (кадрів за секунду); 0 — без обмеження
+RENDER_FPS = float(os.environ.get("RENDER_FPS", "10"))
+
+
+# Поступовий рендер стрімінгової відповіді в Streamlit. Елемент Streamlit не можна доповнити,
+# лише перемалювати цілком, тож завершені абзаци стають окремими статичними елементами,
+# а на кожну частину перемальовується тільки поточний абзац: робота на частину не росте з довжиною відповіді.
+# Поточний абзац перемальовується не частіше за fps; решту дорисовує flush() наприкінці
+class IncrementalRenderer:
+    def __init__(self, container, render=None, fps=RENDER_FPS, clock=time.monotonic):
+        self.container = container  # st або st.container(): елементи додаються по черзі
+        self.render = render or (lambda placeholder, text: placeholder.markdown(text))
+        self.min_interval = 1.0 / fps if fps > 0 else 0.0
+        self.clock = clock
+        self.parts = []
+        self.length = 0  # Довжина відповіді без повторного склеювання частин
+        self.renders = 0
+        self._paragraph = ""
+        self._placeholder = None
+        self._last_draw = None
+        self._pending = False
+
+    def _draw(self, text):
+        if self._placeholder is None:
+            self._placeholder = self.container.empty()
+        self.render(self._placeholder, text)
+        self.renders += 1
+        self._last_draw = self.clock()
+        self._pending = False
+
+    def append(self, delta):
+        if not delta:
+            return
+        self.parts.append(delta)
+        self.length += len(delta)
+        # Роздільник абзаців може прийти частинами в різних дельтах, тож ділимо поточний абзац разом з дельтою
+        *finished, tail = (self._paragraph + delta).split("\n\n")
+        for paragraph in finished:
+            # Абзац завершено: малюємо його востаннє, наступний піде в новий елемент
+            self._draw(paragraph)
+            self._placeholder = None
+        self._paragraph = tail
+        if not tail:
+            return
+        if self._last_draw is None or self.clock() - self._last_draw >= self.min_interval:
+            self._draw(tail)
+        else:
+            self._pending = True
+
+    # Дорисувати останній кадр (після кінця стріму)
+    def flush(self):
+        if self._pending and self._paragraph:
+            self._draw(self._paragraph)
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+# Історія чату одним елементом за перезапуск скрипта; HTML кожного повідомлення готується
+# один раз і зберігається в самому повідомленні (у st.session_state)
+def render_history(container, messages, to_html):
+    if not messages:
+        return
+    parts = []
+    for message in messages:
+        if "html" not in message:
+            message["html"] = to_html(message)
+        parts.append(message["html"])
+    container.markdown("\n".join(parts), unsafe_allow_html=True)
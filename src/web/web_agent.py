@@ -1,6 +1,12 @@
+import html
+import uuid
+
 import streamlit as st
 import requests
 
+from src.agent.stream_protocol import NDJSON_MEDIA_TYPE, iter_frames
+from src.web.stream_renderer import IncrementalRenderer, render_history
+
 # URL вашого аге
 AGENT_API_URL = "http://127.0.0.1:8000/agent"
 
@@ -29,47 +35,69 @@ st.markdown("""
 # Ініціалізуємо сесію для збереження повідомлень
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# ID розмови: агент пам'ятає попередні репліки сесії (див. src/agent/conversation.py)
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = uuid.uuid4().hex
+
 
+# HTML повідомлення чату (готується один раз на повідомлення)
+def message_html(message):
+    css_class = "user-message" if message["role"] == "user" else "message"
+    return f"<div class='{css_class}'>{html.escape(message['content'])}</div>"
 
-# Функція для рендерингу чату
-def render_chat():
-    for message in st.session_state.messages:
-        if message["role"] == "user":
-            st.markdown(f"<div class='user-message'>{message['content']}</div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div class='message'>{message['content']}</div>", unsafe_allow_html=True)
 
+def add_message(role, content):
+    message = {"role": role, "content": content}
+    message["html"] = message_html(message)
+    st.session_state.messages.append(message)
+    return message
 
-# Рендер чату
-render_chat()
 
-# Поле для вводу користувача
-user_input = st.text_input("Введіть своє повідомлення:")
+# Рендер чату один раз за перезапуск скрипта
+render_history(st, st.session_state.messages, message_html)
+
+# Поле для вводу користувача (повертає повідомлення лише один раз, без повторного надсилання при перезапуску)
+user_input = st.chat_input("Введіть своє повідомлення:")
 
 # Якщо є вхід від користувача
 if user_input:
-    # Додавання повідомлення користувача до сесії
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    # Порожній контейнер для стрімінгової відповіді
-    placeholder = st.empty()
+    # Додавання повідомлення користувача до сесії; показуємо лише нове повідомлення
+    st.markdown(add_message("user", user_input)["html"], unsafe_allow_html=True)
+    # Контейнер для джерел: вони приходять першим кадром, ще до першого токена
+    sources_placeholder = st.empty()
+    # Відповідь дописується по абзацах, а не перемальовується цілком на кожен токен
+    renderer = IncrementalRenderer(st.container())
+
+    # Кадри NDJSON: sources — джерела, delta — наступна частина відповіді, done — час і токени, error — помилка
+    def response_deltas(frames):
+        for frame in frames:
+            if frame["type"] == "sources" and frame["sources"]:
+                sources_placeholder.caption("Джерела: " + ", ".join(
+                    source["url"] or f"{source['corpus']}:{source['id']}" for source in frame["sources"]))
+            elif frame["type"] == "delta":
+                yield frame["text"]
+            elif frame["type"] == "error":
+                st.error(f"Помилка агента: {frame['message']}")
+            elif frame["type"] == "done":
+                timings = frame["timings"]
+                st.caption(f"Перший токен: {timings.get('ttft_ms', 0):.0f} мс, усього: {timings['total_ms']:.0f} мс, "
+                           f"токенів: {frame['usage'].get('completion_tokens', 0)}")
 
     # Надсилаємо запит до агента
     try:
-        with requests.post(AGENT_API_URL, json={"query": user_input, "num_results": 5}, stream=True) as response:
+        with requests.post(AGENT_API_URL, json={"query": user_input, "num_results": 5,
+                                                 "conversation_id": st.session_state.conversation_id},
+                           headers={"Accept": NDJSON_MEDIA_TYPE}, stream=True) as response:
             if response.status_code == 200:
-                agent_response = ""
-                for chunk in response.iter_lines(decode_unicode=True):
-                    if chunk:
-                        # Декодуємо та додаємо наступну частину
-                        agent_response += chunk
-                        placeholder.markdown(f"<div class='message'>{agent_response}</div>", unsafe_allow_html=True)
+                # chunk_size=None — рядки віддаються одразу, як приходять, без очікування заповнення буфера
+                frames = iter_frames(response.iter_lines(chunk_size=None, decode_unicode=True))
+                for delta in response_deltas(frames):
+                    renderer.append(delta)
             else:
                 st.error(f"Помилка агента: {response.status_code} {response.text}")
     except Exception as e:
         st.error(f"Помилка зв'язку з агентом: {e}")
 
-    # Додаємо фінальну відповідь до чату
-    st.session_state.messages.append({"role": "agent", "content": agent_response})
-
-    # Оновлюємо чат
-    render_chat()
+    renderer.flush()
+    # Додаємо фінальну відповідь до чату (вона вже на екрані, весь чат не перемальовуємо)
+    add_message("agent", renderer.text)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.agent.admission import AdmissionControl, AdmissionLimiter, AdmissionRejected, parse_model_limits
+
+
+def test_slots_are_handed_out_in_arrival_order():
+    async def run():
+        limiter = AdmissionLimiter("phi4", max_concurrency=1, max_queue=5, max_wait=5)
+        first = await limiter.acquire()
+        order = []
+
+        async def request(name):
+            slot = await limiter.acquire()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            slot.release()
+
+        waiting = [asyncio.create_task(request(name)) for name in ("b", "c", "d")]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queued"] == 3
+        first.release()
+        first.release()  # повторне звільнення нічого не змінює
+        await asyncio.gather(*waiting)
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["b", "c", "d"]
+    assert stats["active"] == 0 and stats["admitted"] == 4
+
+
+def test_full_queue_is_rejected_with_429():
+    async def run():
+        limiter = AdmissionLimiter("phi4", max_concurrency=1, max_queue=0, max_wait=5)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return rejected.value, limiter
+
+    rejected, limiter = asyncio.run(run())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+    assert limiter.stats()["rejected"]["queue_full"] == 1
+
+
+def test_queue_wait_is_limited():
+    async def run():
+        limiter = AdmissionLimiter("phi4", max_concurrency=1, max_queue=5, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return rejected.value, limiter
+
+    rejected, limiter = asyncio.run(run())
+    assert rejected.status_code == 503 and rejected.reason == "timeout"
+    assert limiter.stats()["queued"] == 0
+
+
+def test_overload_is_rejected_without_waiting():
+    async def run():
+        limiter = AdmissionLimiter("phi4", max_concurrency=1, max_queue=5, max_wait=1)
+        limiter.mean_service = 5.0  # генерації тривають довше, ніж дозволено чекати
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.reason == "overloaded"
+    assert rejected.retry_after == 5
+
+
+def test_limits_per_model():
+    assert parse_model_limits("phi4=2/16/30, llama3=4/32/20") == {"phi4": (2, 16, 30.0), "llama3": (4, 32, 20.0)}
+    control = AdmissionControl("phi4=2/16/30")
+    assert control.limiter("phi4").max_concurrency == 2
+    assert control.limiter("llama3").max_concurrency == AdmissionLimiter("x").max_concurrency
@@ -0,0 +1,91 @@
+import os
+import pickle
+import time
+
+import numpy as np
+
+from src.agent.cache import LRUTTLCache, RedisCache, RetrievalCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Як створити   акаунт JetIQ? ") == "як створити акаунт jetiq?"
+
+
+def test_lru_eviction_and_ttl():
+    cache = LRUTTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" стає найсвіжішим
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    expiring = LRUTTLCache(max_size=2, ttl=0.01)
+    expiring.set("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+
+
+def test_retrieval_cache_counts_and_invalidates_on_index_change(tmp_path):
+    index_path = tmp_path / "vector_index.faiss"
+    index_path.write_bytes(b"v1")
+    cache = RetrievalCache(LRUTTLCache(), str(index_path))
+
+    assert cache.get("Вступ 2025", 5) is None
+    cache.set("Вступ 2025", 5, "result")
+    assert cache.get("  вступ   2025 ", 5) == "result"
+    assert cache.get("вступ 2025", 3) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    # Новий індекс — кеш автоматично скидається
+    index_path.write_bytes(b"version 2")
+    os.utime(index_path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    assert cache.get("вступ 2025", 5) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+class FakeRedis(dict):
+    def set(self, key, value, ex=None):
+        self[key] = value
+
+    def scan_iter(self, match, count=None):
+        return [key for key in list(self) if key.startswith(match.rstrip("*"))]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.pop(key, None)
+
+
+# Записи Redis — лише числові масиви без pickle; чужий або пошкоджений запис вважається промахом
+def test_redis_cache_roundtrip_without_pickle():
+    cache = RedisCache.__new__(RedisCache)
+    cache.client, cache.ttl, cache.prefix = FakeRedis(), 60, "test"
+    value = (np.arange(8, dtype="float32").reshape(1, 8), np.array([[0.5, 1.5]], dtype="float32"),
+             np.array([[3, 7]], dtype="int64"))
+    cache.set("q", value)
+    restored = cache.get("q")
+    assert [array.dtype for array in restored] == [array.dtype for array in value]
+    assert all(np.array_equal(a, b) for a, b in zip(restored, value))
+
+    cache.client["test:evil"] = pickle.dumps(value)
+    assert cache.get("evil") is None
+    cache.client["test:object"] = b'[{"dtype": "|O", "shape": [1]}]\n' + bytes(8)
+    assert cache.get("object") is None
+    assert cache.get("missing") is None
+
+    # clear() видаляє лише записи свого префікса
+    cache.client["other:q"] = b""
+    cache.clear()
+    assert list(cache.client) == ["other:q"]
+
+
+# Корпуси з різними версіями не скидають записи одне одного
+def test_interleaved_versions_keep_their_entries():
+    cache = RetrievalCache(LRUTTLCache(), fingerprint=lambda: "wiki-v1")
+    cache.set("wiki:вступ", 5, "wiki result", version="wiki-v1")
+    cache.set("big:вступ", 5, "big result", version="big-v7")
+    for _ in range(3):
+        assert cache.get("wiki:вступ", 5, version="wiki-v1") == "wiki result"
+        assert cache.get("big:вступ", 5, version="big-v7") == "big result"
+    assert cache.get("wiki:вступ", 5, version="wiki-v2") is None
+    assert cache.stats()["invalidations"] == 2
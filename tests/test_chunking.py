@@ -0,0 +1,40 @@
+import json
+
+from scripts.data_processing.chunker import chunk_jsonl
+from src.agent.chunking import chunk_record, chunk_text, passage_text
+
+
+def test_chunks_overlap_and_cover_text():
+    text = " ".join(f"слово{i}" for i in range(24))
+    chunks = chunk_text(text, max_tokens=10, overlap=3)
+    words = [passage.split() for _, _, passage in chunks]
+    assert [len(w) for w in words] == [10, 10, 10]
+    assert words[0][-3:] == words[1][:3]
+    assert words[-1][-1] == "слово23"
+    # Зміщення вказують на пасаж у батьківському тексті
+    for start, end, passage in chunks:
+        assert text[start:end] == passage
+
+
+def test_short_and_empty_texts():
+    assert chunk_text("вступ бакалавр", max_tokens=10, overlap=3) == [(0, 14, "вступ бакалавр")]
+    assert chunk_text("   ", max_tokens=10, overlap=3) == []
+
+
+def test_chunk_record_keeps_parent_metadata():
+    record = {"url": "https://vntu.edu.ua/a", "processed_text": "а б в г д"}
+    chunks = list(chunk_record(record, max_tokens=3, overlap=1))
+    assert [c["chunk"] for c in chunks] == [0, 1]
+    assert all(c["parent"] == c["url"] == "https://vntu.edu.ua/a" for c in chunks)
+    assert chunks[1]["processed_text"] == "в г д"
+
+
+def test_passage_text_uses_whole_passage_and_page_prefix():
+    assert passage_text({"processed_text": "а" * 600, "chunk": 0}) == "а" * 600
+    assert passage_text({"processed_text": "а" * 600}) == "а" * 500
+
+
+def test_chunk_jsonl(tmp_path):
+    source = tmp_path / "processed.jsonl"
+    source.write_text("\n".join(json.dumps({"url": f"u{i}", "processed_text": "а б в г д"}) for i in range(2)))
+    assert chunk_jsonl(str(source), str(tmp_path / "chunks.jsonl"), max_tokens=3, overlap=1) == (2, 4)
@@ -0,0 +1,49 @@
+from src.agent.context_packer import ContextPacker
+
+
+# Токен = слово, щоб бюджет у тестах рахувався просто
+def count_words(text):
+    return len(text.split())
+
+
+def result(text, distance=0.0):
+    return {"text": {"processed_text": text, "chunk": 0}, "distance": distance}
+
+
+def test_drops_near_duplicates():
+    packer = ContextPacker(budget=1000, count_tokens=count_words)
+    passage = "вступна кампанія ВНТУ триває з липня по серпень для бакалаврів"
+    packed = packer.pack([result(passage), result(passage + " року"), result("гуртожиток надається студентам")])
+    assert [r["text"]["processed_text"] for r in packed.results] == [passage, "гуртожиток надається студентам"]
+    assert packed.duplicates == 1
+    assert packed.text.startswith("Context 1: вступна")
+    assert "Context 2: гуртожиток" in packed.text
+
+
+def test_fills_budget_by_relevance():
+    packer = ContextPacker(budget=40, count_tokens=count_words)
+    passages = [" ".join(f"{name}{i}" for i in range(20)) for name in ("а", "б", "в")]
+    packed = packer.pack([result(p) for p in passages])
+
+    # Перший пасаж цілий (22 токени), на решту лишилось замало бюджету
+    assert packed.tokens == 22
+    assert [r["text"]["processed_text"] for r in packed.results] == passages[:1]
+    assert packed.over_budget == 2
+
+
+def test_truncates_passage_to_remaining_budget():
+    packer = ContextPacker(budget=80, count_tokens=count_words)
+    passages = [" ".join(f"{name}{i}" for i in range(40)) for name in ("а", "б")]
+    packed = packer.pack([result(p) for p in passages])
+    assert packed.tokens == 80
+    assert packed.text.endswith("б35")
+
+
+def test_stats_report_tokens_per_request():
+    packer = ContextPacker(budget=100, count_tokens=count_words)
+    packer.pack([result("один два три")])
+    packer.pack([result("чотири п'ять")])
+    stats = packer.stats()
+    assert stats["requests"] == 2
+    assert stats["mean_tokens"] == (5 + 4) / 2
+    assert stats["max_tokens"] == 5
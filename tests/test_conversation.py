@@ -0,0 +1,115 @@
+import asyncio
+
+from src.agent.context_packer import estimate_tokens
+from src.agent.conversation import ConversationMemory, ConversationStore, llm_summarizer
+
+
+def answer(turn):
+    return f"Відповідь {turn}. " + "Деталі про вступ, гуртожиток і стипендію. " * 20
+
+
+# Промпт не росте з довжиною розмови: старі репліки згортаються, усе в межах бюджету
+def test_prompt_stays_within_budget():
+    memory = ConversationMemory(budget=300, recent_turns=2, summary_tokens=80)
+    sizes = []
+    for turn in range(50):
+        memory.add_turn(f"Запитання {turn}?", answer(turn))
+        asyncio.run(memory.compact())
+        sizes.append(memory.tokens())
+    assert max(sizes) <= 300
+    assert len(memory.turns) == 2
+    assert memory.summarized_turns == 48
+    # Найновіша репліка — дослівно, а підсумок пам'ятає недавні старі запитання
+    context = memory.prompt_context()
+    assert context.startswith("Підсумок попередньої розмови:")
+    assert "Запитання 49?" in context
+    assert "Запитання 47?" in memory.summary
+
+
+def test_summary_falls_back_when_llm_fails():
+    async def generate(model, prompt):
+        raise RuntimeError("Ollama недоступна")
+
+    memory = ConversationMemory(recent_turns=1, summarize=llm_summarizer(generate, "phi4"))
+    memory.add_turn("Де гуртожиток?", "На вулиці Хмельницьке шосе. Поруч зупинка.")
+    memory.add_turn("А вартість?", "800 грн.")
+    assert asyncio.run(memory.compact())
+    assert memory.summary == "- Де гуртожиток? — На вулиці Хмельницьке шосе."
+
+    calls = []
+
+    async def generate(model, prompt):
+        calls.append(prompt)
+        return " Користувач питав про гуртожиток. "
+
+    memory.summarize = llm_summarizer(generate, "phi4")
+    memory.add_turn("Скільки місць?", "500.")
+    asyncio.run(memory.compact())
+    assert memory.summary == "Користувач питав про гуртожиток."
+    assert "На вулиці Хмельницьке шосе" in calls[0] and "А вартість?" in calls[0]
+
+
+# Уточнювальне запитання доповнюється попереднім запитом, самостійне — без змін
+def test_rewrite_follow_up_query():
+    memory = ConversationMemory()
+    assert memory.rewrite_query("Скільки коштує гуртожиток?") == "Скільки коштує гуртожиток?"
+    memory.add_turn("Де знаходиться гуртожиток ВНТУ?", "На Хмельницькому шосе.")
+    assert memory.rewrite_query("А скільки коштує?") == "Де знаходиться гуртожиток ВНТУ? А скільки коштує?"
+    assert memory.rewrite_query("Як туди доїхати від вокзалу?").startswith("Де знаходиться гуртожиток")
+    assert memory.rewrite_query("Які документи потрібні для вступу на магістратуру?") == \
+        "Які документи потрібні для вступу на магістратуру?"
+    # Сполучник "та" чи займенник у кінці довгого самостійного запитання — не ознака уточнення
+    standalone = "Які документи потрібні для вступу та поселення в гуртожиток?"
+    assert memory.rewrite_query(standalone) == standalone
+    assert memory.rewrite_query("Скільки коштує навчання на кафедрі та хто її очолює?").startswith("Скільки")
+    assert memory.rewrite_query("Розклад пар") == "Розклад пар"
+    assert memory.rewrite_query("Скільки це коштує?").startswith("Де знаходиться гуртожиток")
+
+
+def test_store_evicts_and_compacts_in_background():
+    store = ConversationStore(max_conversations=2)
+    first = store.get("a")
+    store.get("b")
+    assert store.get("a") is first
+    store.get("c")
+    assert store.get("b") is not None and store.stats()["conversations"] == 2
+    assert store.get("a") is not first
+
+    async def conversation():
+        memory = store.get("c")
+        for turn in range(5):
+            store.record_turn(memory, f"Запитання {turn}?", answer(turn))
+        await asyncio.gather(*store._tasks)
+        return memory
+
+    memory = asyncio.run(conversation())
+    assert len(memory.turns) == memory.recent_turns
+    assert memory.summarized_turns == 5 - memory.recent_turns
+    assert estimate_tokens(memory.prompt_context()) <= memory.budget
+
+
+# Репліка, що надійшла під час повільного підсумку, не губиться, а старі репліки видно в промпті до кінця підсумку
+def test_turns_survive_slow_summary():
+    store = ConversationStore()
+
+    async def summarize(summary, turns, max_tokens):
+        await asyncio.sleep(0.05)
+        return " ".join([summary] * bool(summary) + [query for query, _ in turns])
+
+    async def conversation():
+        memory = store.get("slow")
+        memory.summarize = summarize
+        memory.recent_turns = 2
+        for turn in range(4):
+            store.record_turn(memory, f"q{turn}", f"a{turn}")
+        await asyncio.sleep(0.01)
+        assert "q0" in memory.prompt_context()
+        store.record_turn(memory, "q4", "a4")
+        assert len(store._tasks) == 1
+        await asyncio.gather(*store._tasks)
+        return memory
+
+    memory = asyncio.run(conversation())
+    assert memory.summary == "q0 q1 q2"
+    assert memory.summarized_turns == 3
+    assert [turn[0] for turn in memory.turns] == ["q3", "q4"]
@@ -0,0 +1,54 @@
+import json
+
+import faiss
+import numpy as np
+import pytest
+
+from src.agent.corpus_store import CorpusStore, read_records, write_corpus
+from src.agent.resources import load_corpus, load_faiss_index
+
+
+def test_records_round_trip_by_id(tmp_path):
+    records = [{"processed_text": f"вступ {i}"} for i in range(5)] + [{"processed_text": ""}]
+    write_corpus(records, tmp_path)
+
+    store = CorpusStore(tmp_path)
+    assert len(store) == 6
+    assert store[3] == {"processed_text": "вступ 3"}
+    assert store[np.int64(5)] == {"processed_text": ""}
+    # -1 від FAISS ("немає результату") не повертає останній запис
+    with pytest.raises(IndexError):
+        store[np.int64(-1)]
+    assert list(store) == records
+    store.close()
+
+
+# Один зчитувач для всіх етапів конвеєра: JSON Lines (з порожніми рядками) і JSON-масив
+def test_read_records_from_jsonl_and_json(tmp_path):
+    records = [{"url": "a", "processed_text": "вступ"}, {"url": "b", "processed_text": "розклад"}]
+    jsonl = tmp_path / "records.jsonl"
+    jsonl.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n\n",
+                     encoding="utf-8")
+    array = tmp_path / "records.json"
+    array.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    assert list(read_records(str(jsonl))) == records
+    assert list(read_records(str(array))) == records
+
+
+def test_load_corpus_falls_back_to_legacy_json(tmp_path):
+    legacy = tmp_path / "results.json"
+    legacy.write_text(json.dumps([{"processed_text": "jetiq"}]), encoding="utf-8")
+    assert load_corpus(str(tmp_path), str(legacy)) == [{"processed_text": "jetiq"}]
+
+    write_corpus([{"processed_text": "новий"}], tmp_path)
+    assert load_corpus(str(tmp_path), str(legacy))[0] == {"processed_text": "новий"}
+
+
+def test_mmap_index_searches_like_in_memory(tmp_path):
+    vectors = np.random.default_rng(0).random((100, 16), dtype="float32")
+    index = faiss.IndexFlatL2(16)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / "vector_index.faiss"))
+
+    mapped = load_faiss_index(str(tmp_path / "vector_index.faiss"))
+    assert (mapped.search(vectors[:3], 4)[1] == index.search(vectors[:3], 4)[1]).all()
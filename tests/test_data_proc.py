@@ -0,0 +1,113 @@
+import json
+from types import SimpleNamespace
+
+from scripts.data_processing import data_proc
+
+WORDS = ["вступ", "гуртожиток", "стипендія", "кафедра", "розклад", "деканат", "практика"]
+
+
+# Замінник pymorphy2.MorphAnalyzer: лема — слово без закінчення "и"
+class FakeMorph:
+    def __init__(self, lang=None):
+        pass
+
+    def parse(self, token):
+        return [SimpleNamespace(normal_form=token.rstrip("и"))]
+
+
+def write_crawl(path, count):
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(count):
+            text = None if i == 5 else "" if i == 9 else f"{WORDS[i % len(WORDS)]} та {WORDS[(i * 3) % len(WORDS)]} JetIQ-{i}"
+            file.write(json.dumps({"url": f"https://vntu.edu.ua/{i}", "cleaned_main_text": text},
+                                  ensure_ascii=False) + "\n")
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+# Кілька процесів і обмежена черга пакетів: результат у порядку входу і такий самий, як в одному процесі
+def test_parallel_output_keeps_input_order(tmp_path, monkeypatch):
+    # Воркери створюються через fork і успадковують замінник pymorphy2
+    monkeypatch.setattr(data_proc, "pymorphy2", SimpleNamespace(MorphAnalyzer=FakeMorph))
+    crawl = tmp_path / "crawl.jsonl"
+    write_crawl(crawl, 40)
+    stopwords = tmp_path / "stopwords.txt"
+    stopwords.write_text("та\n", encoding="utf-8")
+
+    # Скільки записів прочитано на момент кожного запису результату
+    read_counts, reads = [], [0]
+    read_records = data_proc.read_records
+
+    def counting_read_records(path):
+        for record in read_records(path):
+            reads[0] += 1
+            yield record
+
+    class RecordingProgress(data_proc.ProgressReport):
+        def update(self, read, written):
+            read_counts.append(reads[0])
+            super().update(read, written)
+
+    monkeypatch.setattr(data_proc, "read_records", counting_read_records)
+    monkeypatch.setattr(data_proc, "ProgressReport", RecordingProgress)
+
+    parallel = tmp_path / "parallel.jsonl"
+    data_proc.process_jsonl(str(crawl), str(parallel), str(stopwords), workers=3, chunk_size=3, max_pending=2,
+                            lemma_cache_path="", tokenizer="fast")
+    # Перші пакети записані ще до кінця читання: в обробці не більше max_pending пакетів
+    assert read_counts[0] < 40
+    assert len(read_counts) == 14
+
+    single = tmp_path / "single.jsonl"
+    data_proc.process_jsonl(str(crawl), str(single), str(stopwords), workers=1, chunk_size=40,
+                            lemma_cache_path="", tokenizer="fast")
+
+    records = read_output(parallel)
+    assert records == read_output(single)
+    assert [record["url"] for record in records] == [f"https://vntu.edu.ua/{i}" for i in range(40) if i not in (5, 9)]
+    assert records[0] == {"url": "https://vntu.edu.ua/0", "processed_text": "вступ вступ", "identifiers": "jetiq-0"}
+    assert records[1]["processed_text"] == "гуртожиток кафедра"
+
+
+class FakeDocument:
+    def __init__(self, sentences, text=""):
+        self.text = text
+
+
+# Замінник stanza.Pipeline, що записує кожен виклик
+class FakePipeline:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, docs):
+        self.calls.append(docs)
+        if isinstance(docs, str):
+            return self._tokenize(docs)
+        return [self._tokenize(doc.text) for doc in docs]
+
+    @staticmethod
+    def _tokenize(text):
+        return SimpleNamespace(sentences=[SimpleNamespace(words=[SimpleNamespace(text=word) for word in text.split()])])
+
+
+# Пакет документів іде в stanza одним викликом, порожні тексти пропускаються, токени повертаються на свої місця
+def test_batch_tokenization_maps_back_to_texts(monkeypatch):
+    monkeypatch.setattr(data_proc, "stanza", SimpleNamespace(Document=FakeDocument))
+    nlp = FakePipeline()
+    texts = ["вступ до вну", " ", "гуртожиток", "", "розклад пар кафедри"]
+    assert data_proc.tokenize_texts(texts, nlp, batch_size=8) == [
+        ["вступ", "до", "вну"], [], ["гуртожиток"], [], ["розклад", "пар", "кафедри"]]
+    assert len(nlp.calls) == 1
+    assert [doc.text for doc in nlp.calls[0]] == ["вступ до вну", "гуртожиток", "розклад пар кафедри"]
+
+    # Менший пакет — кілька викликів, а результат той самий, що й по документу (режим stanza)
+    nlp = FakePipeline()
+    assert data_proc.tokenize_texts(texts, nlp, batch_size=2) == [data_proc.tokenize_text(text, FakePipeline())
+                                                                  for text in texts]
+    assert len(nlp.calls) == 2
+    morph, stopwords = FakeMorph(), {"до"}
+    assert data_proc.process_texts(texts, FakePipeline(), morph, stopwords, tokenizer="batch") == \
+        data_proc.process_texts(texts, FakePipeline(), morph, stopwords, tokenizer="stanza")
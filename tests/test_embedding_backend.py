@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.agent.embedding_backend import benchmark_encoder, export_onnx, load_embedding_model, onnx_file, parity_report
+
+
+# Детермінований кодувальник; noise імітує похибку квантизованого бекенду
+class FakeEncoder:
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode(self, texts):
+        vectors = [np.random.default_rng(sum(map(ord, t))).random(16) for t in texts]
+        noise = np.random.default_rng(1).normal(0, self.noise, (len(texts), 16))
+        return np.asarray(vectors) + noise
+
+
+TEXTS = [f"запит про вступ номер {i}" for i in range(50)]
+
+
+def test_identical_backend_has_full_parity():
+    report = parity_report(FakeEncoder(), FakeEncoder(), TEXTS, k=5)
+    assert report["mean_cosine"] == pytest.approx(1.0)
+    assert report["recall@5"] == 1.0
+
+
+def test_noisy_backend_loses_parity():
+    report = parity_report(FakeEncoder(), FakeEncoder(noise=0.5), TEXTS, k=5)
+    assert report["min_cosine"] < report["mean_cosine"] < 0.99
+    assert report["recall@5"] < 1.0
+
+
+def test_benchmark_encoder_reports_latency_and_throughput():
+    stats = benchmark_encoder(FakeEncoder(), TEXTS, batch_size=8)
+    assert stats["single_p50_ms"] <= stats["single_p95_ms"]
+    assert stats["single_qps"] > 0 and stats["batch_qps"] > 0
+
+
+def test_backend_selection(tmp_path):
+    with pytest.raises(ValueError):
+        load_embedding_model(str(tmp_path), "tensorrt")
+    assert onnx_file(str(tmp_path)) == "onnx/model.onnx"
+    with pytest.raises(FileNotFoundError):
+        onnx_file(str(tmp_path), quantized=True)
+    (tmp_path / "onnx").mkdir()
+    (tmp_path / "onnx" / "model_qint8_avx2.onnx").write_bytes(b"")
+    assert onnx_file(str(tmp_path), quantized=True) == "onnx/model_qint8_avx2.onnx"
+
+
+# Експорт ONNX додає файли onnx/ у теку моделі, не перезаписуючи її власні файли
+def test_export_onnx_keeps_source_model_files(tmp_path, monkeypatch):
+    saved, quantized = [], []
+
+    class FakeSentenceTransformer:
+        def __init__(self, model_path, backend=None):
+            self.model_path = model_path
+
+        def save_pretrained(self, path):
+            saved.append(path)
+            (Path(path) / "onnx").mkdir()
+            (Path(path) / "onnx" / "model.onnx").write_text("onnx")
+            (Path(path) / "config.json").write_text("exported")
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", SimpleNamespace(
+        SentenceTransformer=FakeSentenceTransformer,
+        export_dynamic_quantized_onnx_model=lambda model, config, path: quantized.append((config, path))))
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text("original")
+
+    export_onnx(str(model_dir), "avx2")
+    assert saved and saved[0] != str(model_dir)
+    assert (model_dir / "config.json").read_text() == "original"
+    assert (model_dir / "onnx" / "model.onnx").read_text() == "onnx"
+    assert quantized == [("avx2", str(model_dir))]
+
+    # Повторний експорт не зберігає модель знову, лише квантизує
+    export_onnx(str(model_dir), "avx2")
+    assert len(saved) == 1
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+import time
+
+import faiss
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from scripts.benchmarks.fake_ollama import FakeOllamaServer
+from src.agent import first_agent
+from src.agent.admission import AdmissionControl
+from src.agent.corpus_store import write_corpus
+from src.agent.multi_corpus import CorpusSet
+from src.agent.ollama_client import OllamaClient
+from src.agent.resource_holder import ResourceHolder
+from src.agent.startup import Startup
+from src.agent.text_normalization import LemmaCache
+
+
+class FakeModel:
+    def encode(self, texts):
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(8) for t in texts], dtype="float32")
+
+
+# Агент з фейковою моделлю і маленьким корпусом; model_gate затримує завантаження моделі
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    index = faiss.IndexFlatL2(8)
+    index.add(FakeModel().encode(["вступ", "гуртожиток"]))
+    faiss.write_index(index, str(tmp_path / "vector_index.faiss"))
+    write_corpus([{"processed_text": "вступ"}, {"processed_text": "гуртожиток"}], str(tmp_path))
+
+    model_gate = threading.Event()
+
+    def load_model():
+        model_gate.wait(5)
+        return FakeModel()
+
+    monkeypatch.setattr(first_agent, "startup", Startup())
+    monkeypatch.setattr(first_agent, "load_model", load_model)
+    monkeypatch.setattr(first_agent, "load_index", lambda: CorpusSet({"wiki": ResourceHolder(str(tmp_path))}))
+    monkeypatch.setattr(first_agent, "load_normalization", lambda: (set(), LemmaCache(lemmas={"вступ": "вступ"})))
+    return model_gate
+
+
+def wait_ready(client):
+    for _ in range(100):
+        response = client.get("/readyz")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.02)
+    return response
+
+
+# Агент приймає з'єднання одразу, а /readyz стає 200 лише після фонового завантаження
+def test_readiness_follows_background_loading(agent):
+    with TestClient(first_agent.app) as client:
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").status_code == 503
+        assert client.get("/stats/retrieval").status_code == 503
+
+        agent.set()
+        response = wait_ready(client)
+        assert response.status_code == 200
+        assert set(response.json()["components"]) == {"model", "index", "normalization", "reranker"}
+        assert client.get("/admin/index").json()["documents"] == 2
+
+
+def test_request_is_traced_and_measured(agent, monkeypatch):
+    agent.set()
+    with FakeOllamaServer(port=11506, num_tokens=3, token_delay=0) as server:
+        monkeypatch.setattr(first_agent, "ollama_client", OllamaClient(api_url=server.url))
+        with TestClient(first_agent.app) as client:
+            wait_ready(client)
+            response = client.post("/agent", json={"query": "вступ", "num_results": 1},
+                                   headers={"X-Request-ID": "trace-1"})
+            assert response.text == "tok0 tok1 tok2 "
+            assert response.headers["X-Request-ID"] == "trace-1"
+            assert "retrieval;dur=" in response.headers["Server-Timing"]
+            assert server.app.state.request_ids == ["trace-1"]
+
+            metrics = client.get("/metrics").text
+            for stage in ("embed", "search", "retrieval", "prompt_build", "ttft", "generation"):
+                assert f'agent_stage_seconds_count{{stage="{stage}"}}' in metrics
+            assert "agent_in_flight_streams 0.0" in metrics
+            assert "agent_generation_tokens_per_second_count" in metrics
+
+
+def test_saturated_agent_rejects_with_retry_after(agent, monkeypatch):
+    agent.set()
+    monkeypatch.setattr(first_agent, "admission", AdmissionControl({"phi4": (1, 0, 1)}))
+    asyncio.run(first_agent.admission.acquire("phi4"))  # єдиний слот уже зайнято
+
+    with TestClient(first_agent.app) as client:
+        wait_ready(client)
+        response = client.post("/agent", json={"query": "вступ", "num_results": 1})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/stats/admission").json()["phi4"]["rejected"]["queue_full"] == 1
+
+
+# Запит може вибрати корпуси; невідомий корпус — помилка 400
+def test_request_selects_corpora(agent, monkeypatch, tmp_path):
+    big_dir = tmp_path / "big"
+    big_dir.mkdir()
+    index = faiss.IndexFlatL2(8)
+    index.add(FakeModel().encode(["розклад"]))
+    faiss.write_index(index, str(big_dir / "vector_index.faiss"))
+    write_corpus([{"processed_text": "розклад"}], str(big_dir))
+    monkeypatch.setattr(first_agent, "load_index", lambda: CorpusSet({
+        "wiki": ResourceHolder(str(tmp_path)), "big": ResourceHolder(str(big_dir))}))
+    monkeypatch.setattr(first_agent, "load_normalization",
+                        lambda: (set(), LemmaCache(lemmas={"вступ": "вступ", "розклад": "розклад"})))
+    agent.set()
+
+    with FakeOllamaServer(port=11507, num_tokens=1, token_delay=0) as server:
+        monkeypatch.setattr(first_agent, "ollama_client", OllamaClient(api_url=server.url))
+        with TestClient(first_agent.app) as client:
+            wait_ready(client)
+            assert {name: stats["documents"] for name, stats in client.get("/corpora").json().items()} == {
+                "wiki": 2, "big": 1}
+            assert client.get("/admin/index", params={"corpus": "big"}).json()["documents"] == 1
+
+            response = client.post("/agent", json={"query": "розклад", "num_results": 3, "corpora": ["big"]})
+            assert response.status_code == 200
+            assert int(response.headers["X-Context-Tokens"]) > 0
+
+            response = client.post("/agent", json={"query": "розклад", "corpora": ["news"]})
+            assert response.status_code == 400
+
+    # Без вибору шукаються обидва корпуси, результати злиті за нормованою оцінкою
+    async def search_all():
+        return await first_agent.find_similar_texts("розклад", 3)
+
+    _, results, _ = asyncio.run(search_all())
+    assert {result["corpus"] for result in results} == {"wiki", "big"}
+    assert (results[0]["corpus"], results[0]["text"]["processed_text"]) == ("big", "розклад")
+
+
+# NDJSON: джерела першим кадром, далі частини відповіді, наприкінці час і використання токенів
+def test_ndjson_protocol_sends_sources_first(agent, monkeypatch):
+    agent.set()
+    with FakeOllamaServer(port=11508, num_tokens=3, token_delay=0) as server:
+        monkeypatch.setattr(first_agent, "ollama_client", OllamaClient(api_url=server.url))
+        with TestClient(first_agent.app) as client:
+            wait_ready(client)
+            response = client.post("/agent", json={"query": "вступ", "num_results": 1},
+                                   headers={"Accept": "application/x-ndjson"})
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            frames = [json.loads(line) for line in response.text.splitlines()]
+            assert [frame["type"] for frame in frames] == ["sources", "delta", "delta", "delta", "done"]
+            assert [(source["corpus"], source["id"]) for source in frames[0]["sources"]] == [("wiki", 0)]
+            assert "".join(frame["text"] for frame in frames[1:4]) == "tok0 tok1 tok2 "
+            done = frames[-1]
+            assert done["cached"] is False
+            assert done["usage"]["completion_tokens"] == 3
+            assert done["usage"]["context_tokens"] > 0
+            assert {"retrieval_ms", "prompt_ms", "ttft_ms", "generation_ms", "total_ms"} <= set(done["timings"])
+
+            # Повтор того самого запитання — відповідь з кешу, у тому ж протоколі (SSE)
+            response = client.post("/agent", json={"query": "вступ", "num_results": 1},
+                                   headers={"Accept": "text/event-stream"})
+            events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+            assert events == ["event: sources", "event: delta", "event: done"]
+            assert '"cached": true' in response.text
+
+
+# Розмова: друга репліка бачить першу в промпті і не береться з кешу відповідей
+def test_conversation_keeps_history(agent, monkeypatch):
+    agent.set()
+    monkeypatch.setattr(first_agent, "conversations", first_agent.ConversationStore())
+    with FakeOllamaServer(port=11509, num_tokens=3, token_delay=0) as server:
+        monkeypatch.setattr(first_agent, "ollama_client", OllamaClient(api_url=server.url))
+        with TestClient(first_agent.app) as client:
+            wait_ready(client)
+            for turn in range(2):
+                response = client.post("/agent", json={"query": "вступ", "num_results": 1, "conversation_id": "c1"},
+                                       headers={"Accept": "application/x-ndjson"})
+                done = json.loads(response.text.splitlines()[-1])
+                assert done["cached"] is False
+            assert done["usage"]["history_tokens"] > 0
+            memory = first_agent.conversations.get("c1")
+            assert [turn[:2] for turn in memory.turns] == [("вступ", "tok0 tok1 tok2 ")] * 2
+            assert client.get("/stats/conversations").json()["conversations"] == 1
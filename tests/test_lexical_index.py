@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.agent.hybrid import dense_k, fuse_results, lexical_candidates, query_terms, reciprocal_rank_fusion
+from src.agent.lexical_index import LexicalIndex, build_lexical_index
+
+
+def build(tmp_path, records):
+    build_lexical_index(records, str(tmp_path))
+    return LexicalIndex(str(tmp_path))
+
+
+def test_bm25_ranks_exact_matches(tmp_path):
+    index = build(tmp_path, [
+        {"processed_text": "вступ бакалавр документ"},
+        None,  # слот видаленого документа
+        {"processed_text": "фііту факультет інформаційний технологія", "identifiers": "jetiq"},
+        {"processed_text": "факультет факультет гуртожиток"},
+    ])
+    assert index.num_docs == 3
+
+    _, found = index.search(["фііту"], 5)
+    assert found.tolist() == [2]
+    _, found = index.search(["jetiq"], 5)
+    assert found.tolist() == [2]
+    scores, found = index.search(["факультет", "гуртожиток"], 5)
+    assert found.tolist() == [3, 2]
+    assert scores[0] > scores[1]
+
+
+def test_unknown_terms_return_nothing(tmp_path):
+    index = build(tmp_path, [{"processed_text": "вступ"}])
+    scores, found = index.search(["невідомий"], 5)
+    assert len(scores) == len(found) == 0
+    assert lexical_candidates(None, ["вступ"]) == []
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3, -1], [3, 4]], limit=3)
+    assert [doc_id for doc_id, _ in fused] == [3, 1, 2]
+
+
+def test_fuse_results_keeps_dense_distances():
+    texts = [{"processed_text": f"документ {i}"} for i in range(5)]
+    results = fuse_results(texts, np.array([0, 1]), np.array([0.1, 0.2]), [4, 0], k=3)
+    assert [r["id"] for r in results] == [0, 4, 1]
+    assert results[0]["distance"] == 0.1
+    assert results[1]["distance"] is None
+
+
+def test_dense_k_shrinks_with_enough_lexical_hits():
+    assert dense_k(5, 0) == 5
+    assert dense_k(5, 20) == 3
+    assert query_terms("Як увійти в JetIQ?", "увійти") == ["увійти", "jetiq"]
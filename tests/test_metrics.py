@@ -0,0 +1,32 @@
+from src.agent.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counters_and_gauges_render_with_labels():
+    registry = Registry()
+    lookups = Counter("cache_lookups_total", "Cache lookups", ("cache", "result"), registry=registry)
+    streams = Gauge("in_flight_streams", "Streams", registry=registry)
+    lookups.inc(cache="retrieval", result="hit")
+    lookups.inc(2, cache="retrieval", result="miss")
+    streams.inc()
+    streams.inc()
+    streams.dec()
+
+    text = registry.render()
+    assert "# TYPE cache_lookups_total counter" in text
+    assert 'cache_lookups_total{cache="retrieval",result="miss"} 2.0' in text
+    assert "in_flight_streams 1.0" in text
+    assert lookups.value(cache="retrieval", result="hit") == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    stages = Histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 0.7, 3.0):
+        stages.observe(value, stage="embed")
+
+    text = registry.render()
+    assert 'stage_seconds_bucket{stage="embed",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="embed",le="1.0"} 3' in text
+    assert 'stage_seconds_bucket{stage="embed",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="embed"} 4' in text
+    assert stages.summary(stage="embed") == (4, 4.25)
@@ -0,0 +1,94 @@
+import asyncio
+
+import faiss
+import numpy as np
+import pytest
+
+from src.agent.corpus_store import write_corpus
+from src.agent.multi_corpus import CorpusSet, UnknownCorpus, load_corpus_set, merge_results, parse_corpora
+from src.agent.retrieval import BatchingRetriever
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(8) for t in texts], dtype="float32")
+
+
+# Корпус у старій розкладці без версій: індекс і тексти в одній теці
+def build_corpus(corpus_dir, texts):
+    corpus_dir.mkdir()
+    index = faiss.IndexFlatL2(8)
+    index.add(FakeModel().encode(texts))
+    faiss.write_index(index, str(corpus_dir / "vector_index.faiss"))
+    write_corpus([{"processed_text": text} for text in texts], str(corpus_dir))
+    return str(corpus_dir)
+
+
+@pytest.fixture
+def corpora(tmp_path):
+    wiki = build_corpus(tmp_path / "wiki", ["вступ", "гуртожиток", "стипендія"])
+    big = build_corpus(tmp_path / "big", ["розклад", "кафедра"])
+    return load_corpus_set(f"wiki={wiki}, big={big}")
+
+
+def test_parse_corpora():
+    assert parse_corpora("wiki=Data/processed/wiki,big=Data/processed/big") == {
+        "wiki": "Data/processed/wiki", "big": "Data/processed/big"}
+    with pytest.raises(ValueError):
+        parse_corpora("Data/processed/wiki")
+
+
+def test_select_validates_names(corpora):
+    assert corpora.names == ["wiki", "big"]
+    assert corpora.select() == ["wiki", "big"]
+    assert corpora.select(["big", "big"]) == ["big"]
+    with pytest.raises(UnknownCorpus):
+        corpora.select(["news"])
+
+
+# Запит кодується один раз, а кожен корпус повертає власні результати
+def test_one_encoding_searches_every_corpus(corpora):
+    model = FakeModel()
+    retriever = BatchingRetriever(model, None, batch_window_ms=1)
+    snapshot = corpora.snapshot()
+
+    async def run():
+        embedding = await retriever.encode("кафедра")
+        return await corpora.asearch(embedding, {name: (snapshot[name], 2) for name in corpora.names})
+
+    found = asyncio.run(run())
+    assert model.calls == [1]
+    assert found["big"][1][0] == 1
+    assert found["big"][0][0] == pytest.approx(0.0)
+    assert len(found["wiki"][1]) == 2
+
+    # Синхронний варіант (для Streamlit) дає те саме
+    embedding = model.encode(["кафедра"])[0]
+    assert corpora.search(embedding, {"big": (snapshot["big"], 2)})["big"][1].tolist() == found["big"][1].tolist()
+
+
+# Оцінки нормуються в межах корпусу, а корпус з далекими документами отримує меншу вагу
+def test_merge_prefers_the_closer_corpus():
+    per_corpus = {
+        "wiki": [{"id": 0, "text": "a", "distance": 3.0, "score": 0.03}, {"id": 1, "text": "b", "distance": 4.0,
+                                                                        "score": 0.02}],
+        "big": [{"id": 0, "text": "c", "distance": 0.0, "score": 0.01}, {"id": 5, "text": "d", "distance": None,
+                                                                        "score": 0.005}],
+        "empty": [],
+    }
+    merged = merge_results(per_corpus, 3)
+    assert [(result["corpus"], result["id"]) for result in merged] == [("big", 0), ("big", 5), ("wiki", 0)]
+    assert merged[0]["score"] == pytest.approx(1.0)
+    assert merged[2]["score"] == pytest.approx(0.25)
+
+
+def test_version_changes_with_any_corpus(corpora):
+    before = corpora.version()
+    assert before.startswith("wiki=legacy-") and ",big=legacy-" in before
+    assert CorpusSet({"wiki": corpora.holders["wiki"]}).version() != before
+    with pytest.raises(ValueError):
+        CorpusSet({})
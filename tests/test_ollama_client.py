@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scripts.benchmarks.fake_ollama import FakeOllamaServer
+from src.agent.background_loop import BackgroundLoop
+from src.agent.ollama_client import OllamaClient, OllamaError
+
+
+def test_stream_collects_tokens():
+    with FakeOllamaServer(port=11501, num_tokens=5, token_delay=0) as server:
+        client = OllamaClient(api_url=server.url)
+
+        async def run():
+            parts = [part async for part in client.stream("phi4", "Привіт")]
+            await client.aclose()
+            return parts
+
+        parts = asyncio.run(run())
+        assert parts == [f"tok{i} " for i in range(5)]
+
+
+def test_parallel_streams_do_not_block_each_other():
+    with FakeOllamaServer(port=11502, num_tokens=10, token_delay=0.02) as server:
+        client = OllamaClient(api_url=server.url, max_concurrency=8)
+
+        async def run():
+            start = time.perf_counter()
+            answers = await asyncio.gather(*(client.generate("phi4", str(i)) for i in range(8)))
+            await client.aclose()
+            return answers, time.perf_counter() - start
+
+        answers, elapsed = asyncio.run(run())
+        assert len(answers) == 8
+        # Послідовно це зайняло б 8 * 10 * 0.02 = 1.6 с
+        assert elapsed < 1.0
+
+
+def test_client_survives_new_event_loop():
+    with FakeOllamaServer(port=11503, num_tokens=2, token_delay=0) as server:
+        client = OllamaClient(api_url=server.url)
+        # Як у Streamlit: кожен перезапуск скрипта викликає asyncio.run заново
+        assert asyncio.run(client.generate("phi4", "a")) == "tok0 tok1 "
+        assert asyncio.run(client.generate("phi4", "b")) == "tok0 tok1 "
+
+
+def test_error_status_raises():
+    with FakeOllamaServer(port=11504, status_code=500) as server:
+        client = OllamaClient(api_url=server.url)
+        with pytest.raises(OllamaError) as error:
+            asyncio.run(client.generate("phi4", "a"))
+        assert error.value.status_code == 500
+
+
+def test_request_id_is_propagated_to_ollama():
+    with FakeOllamaServer(port=11505, num_tokens=1, token_delay=0) as server:
+        client = OllamaClient(api_url=server.url)
+
+        async def run():
+            await client.generate("phi4", "Привіт", headers={"X-Request-ID": "trace-42"})
+            await client.aclose()
+
+        asyncio.run(run())
+        assert server.app.state.request_ids == ["trace-42"]
+
+
+# Сесії Streamlit у різних потоках зі своїми циклами не підміняють одна одній пул і семафор
+def test_threads_with_own_loops_keep_separate_pools():
+    with FakeOllamaServer(port=11512, num_tokens=5, token_delay=0.01) as server:
+        client = OllamaClient(api_url=server.url, max_concurrency=1)
+        answers = []
+
+        def session(prompt):
+            async def run():
+                answer = await client.generate("phi4", prompt)
+                await client.aclose()
+                return answer
+
+            answers.append(asyncio.run(run()))
+
+        threads = [threading.Thread(target=session, args=(str(i),)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert answers == ["tok0 tok1 tok2 tok3 tok4 "] * 4
+        assert len(client._clients) == 0
+
+
+# Спільний фоновий цикл: один пул на всі запити; перерваний стрім закривається в циклі
+def test_background_loop_reuses_one_pool():
+    with FakeOllamaServer(port=11513, num_tokens=20, token_delay=0) as server:
+        client = OllamaClient(api_url=server.url)
+        loop = BackgroundLoop()
+        try:
+            for _ in range(3):
+                assert loop.run(client.generate("phi4", "a")).startswith("tok0 tok1 ")
+            parts = []
+            for part in loop.iterate(client.stream("phi4", "b")):
+                parts.append(part)
+                if len(parts) == 2:
+                    break
+            assert parts == ["tok0 ", "tok1 "]
+            assert len(client._clients) == 1
+            assert loop.run(client.generate("phi4", "c")).endswith("tok19 ")
+            loop.run(client.aclose())
+        finally:
+            loop.close()
+
+
+# Фонове завдання не блокує потік, що його запустив
+def test_background_loop_submit_does_not_wait():
+    loop = BackgroundLoop()
+    try:
+        started = time.perf_counter()
+        future = loop.submit(asyncio.sleep(0.2, result="done"))
+        assert time.perf_counter() - started < 0.1
+        assert future.result(1) == "done"
+    finally:
+        loop.close()
@@ -0,0 +1,64 @@
+import asyncio
+
+from scripts.benchmarks.fake_ollama import FakeOllamaServer
+from src.agent.ollama_client import OllamaClient
+from src.agent.ollama_router import OllamaRouter, create_ollama_client
+
+
+def test_least_outstanding_spreads_parallel_requests():
+    with FakeOllamaServer(port=11507, num_tokens=5, token_delay=0.01) as first, \
+            FakeOllamaServer(port=11508, num_tokens=5, token_delay=0.01) as second:
+        router = OllamaRouter([first.url, second.url])
+
+        async def run():
+            answers = await asyncio.gather(*(router.generate("phi4", str(i)) for i in range(6)))
+            await router.aclose()
+            return answers
+
+        answers = asyncio.run(run())
+        assert all(answer == "tok0 tok1 tok2 tok3 tok4 " for answer in answers)
+        assert first.app.state.requests_served == second.app.state.requests_served == 3
+
+
+def test_failure_before_first_token_is_retried_and_backend_ejected():
+    with FakeOllamaServer(port=11509, status_code=500) as broken, \
+            FakeOllamaServer(port=11510, num_tokens=2, token_delay=0) as healthy:
+        # Третій бекенд взагалі не запущено: з'єднання відхиляється
+        router = OllamaRouter([broken.url, "http://127.0.0.1:11599/api/generate", healthy.url], max_failures=1)
+
+        async def run():
+            answers = [await router.generate("phi4", str(i)) for i in range(3)]
+            await router.aclose()
+            return answers
+
+        assert asyncio.run(run()) == ["tok0 tok1 "] * 3
+        # Після першої помилки зламані бекенди виключено, решту запитів обслуговує живий
+        assert broken.app.state.requests_served == 1
+        assert healthy.app.state.requests_served == 3
+        stats = router.stats()
+        assert stats["retries"] == 2
+        assert [b["healthy"] for b in stats["backends"]] == [False, False, True]
+
+
+def test_health_checks_eject_and_restore_backends():
+    with FakeOllamaServer(port=11511, num_tokens=1, token_delay=0) as server:
+        router = OllamaRouter([server.url, "http://127.0.0.1:11598/api/generate"])
+
+        async def run():
+            server.app.state.healthy = False
+            unhealthy = await router.check_health()
+            server.app.state.healthy = True
+            restored = await router.check_health()
+            await router.aclose()
+            return unhealthy, restored
+
+        unhealthy, restored = asyncio.run(run())
+        assert unhealthy == [False, False]
+        assert restored == [True, False]
+        assert [b["healthy"] for b in router.stats()["backends"]] == [True, False]
+
+
+def test_single_url_uses_plain_client():
+    assert isinstance(create_ollama_client("http://127.0.0.1:11434/api/generate"), OllamaClient)
+    router = create_ollama_client("http://a:11434/api/generate, http://b:11434/api/generate")
+    assert isinstance(router, OllamaRouter) and len(router.backends) == 2
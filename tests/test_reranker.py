@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from src.agent.reranker import Reranker
+
+
+def candidates(n):
+    return [{"id": i, "text": {"processed_text": f"пасаж {i}", "chunk": 0}} for i in range(n)]
+
+
+# Оцінювач, що віддає перевагу пасажам з більшим номером і запам'ятовує розміри батчів
+class FakeScorer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, query, passages):
+        self.batches.append(len(passages))
+        time.sleep(self.delay)
+        return [float(p.split()[-1]) for p in passages]
+
+
+def test_reranks_in_batches():
+    scorer = FakeScorer()
+    reranker = Reranker(scorer, budget_ms=1000, batch_size=4)
+    result = reranker.rerank("запит", candidates(10), top_n=3)
+    assert [r["id"] for r in result.results] == [9, 8, 7]
+    assert result.results[0]["rerank_score"] == 9.0
+    assert not result.timed_out
+    assert scorer.batches == [4, 4, 2]
+
+
+def test_falls_back_to_original_order_over_budget():
+    scorer = FakeScorer(delay=0.05)
+    reranker = Reranker(scorer, budget_ms=20, batch_size=2)
+    result = reranker.rerank("запит", candidates(10), top_n=3)
+    assert result.timed_out
+    assert [r["id"] for r in result.results] == [0, 1, 2]
+    assert result.seconds < 0.05
+    assert reranker.stats()["timeouts"] == 1
+
+    # Після вичерпання бюджету решта батчів не оцінюється
+    time.sleep(0.1)
+    assert len(scorer.batches) < 5
+
+
+def test_scorer_errors_fall_back():
+    def failing(query, passages):
+        raise RuntimeError("model crashed")
+
+    reranker = Reranker(failing, budget_ms=1000)
+    result = reranker.rerank("запит", candidates(3), top_n=2)
+    assert [r["id"] for r in result.results] == [0, 1]
+    assert reranker.stats()["errors"] == 1
+    assert reranker.stats()["last_error"] == "model crashed"
+
+
+def test_async_rerank():
+    reranker = Reranker(FakeScorer(), budget_ms=1000)
+    result = asyncio.run(reranker.arerank("запит", candidates(5), top_n=2))
+    assert [r["id"] for r in result.results] == [4, 3]
+    assert reranker.stats()["requests"] == 1
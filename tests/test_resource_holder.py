@@ -0,0 +1,69 @@
+import faiss
+import numpy as np
+
+from src.agent.corpus_store import write_corpus
+from src.agent import resource_holder
+from src.agent.resource_holder import ResourceHolder
+from src.agent.resources import publish_version
+
+
+# Публікація версії з n документами: індекс і корпус у тимчасовій теці, потім атомарне перемикання CURRENT
+def publish(corpus_dir, version, n):
+    build_dir = corpus_dir / f".build-{version}"
+    build_dir.mkdir()
+    index = faiss.IndexFlatL2(8)
+    index.add(np.random.default_rng(n).random((n, 8), dtype="float32"))
+    faiss.write_index(index, str(build_dir / "vector_index.faiss"))
+    write_corpus([{"url": f"{version}/{i}", "processed_text": f"{version} {i}"} for i in range(n)], str(build_dir))
+    publish_version(str(corpus_dir), str(build_dir), version)
+
+
+def test_swaps_to_new_version_and_keeps_old_snapshot(tmp_path):
+    publish(tmp_path, "v1", 3)
+    swapped = []
+    holder = ResourceHolder(str(tmp_path), on_swap=[swapped.append])
+    old = holder.current
+    assert old.version == "v1"
+    assert not holder.check_for_update()
+
+    publish(tmp_path, "v2", 5)
+    assert holder.check_for_update()
+    assert holder.current.version == "v2"
+    assert holder.current.index.ntotal == 5
+    assert swapped == [holder.current]
+
+    # Запити, що почались до заміни, дочитують свою версію
+    assert old.index.ntotal == 3
+    assert old.texts[0]["url"] == "v1/0"
+    assert holder.stats()["reloads"] == 1
+
+
+def test_failed_load_keeps_current_version(tmp_path):
+    publish(tmp_path, "v1", 3)
+    holder = ResourceHolder(str(tmp_path))
+
+    # Покажчик на версію без файлів: лишаємось на v1 і запам'ятовуємо помилку
+    (tmp_path / "versions" / "broken").mkdir()
+    (tmp_path / "CURRENT").write_text("broken")
+    assert not holder.check_for_update()
+    assert holder.current.version == "v1"
+    assert holder.stats()["last_error"].startswith("broken")
+
+
+# CURRENT змінився між читанням версії і завантаженням: знімок містить саме ту версію, якою позначений
+def test_snapshot_matches_its_version_when_current_moves(tmp_path, monkeypatch):
+    publish(tmp_path, "v1", 3)
+    holder = ResourceHolder(str(tmp_path))
+    publish(tmp_path, "v2", 5)
+    read_version = resource_holder.version_id
+
+    def version_then_publish(corpus_dir):
+        version = read_version(corpus_dir)
+        publish(tmp_path, "v3", 7)
+        return version
+
+    monkeypatch.setattr(resource_holder, "version_id", version_then_publish)
+    assert holder.check_for_update()
+    assert holder.current.version == "v2"
+    assert holder.current.index.ntotal == 5
+    assert holder.current.texts[0]["url"] == "v2/0"
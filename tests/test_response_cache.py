@@ -0,0 +1,32 @@
+import time
+
+import numpy as np
+
+from src.agent.response_cache import SemanticResponseCache
+
+
+def test_near_duplicate_query_with_same_contexts_hits():
+    cache = SemanticResponseCache(threshold=0.95, max_size=10, ttl=60)
+    embedding = np.array([1.0, 0.0, 0.0])
+    cache.store(embedding, [3, 7, 1], "Відповідь про JetIQ")
+
+    assert cache.lookup(np.array([0.99, 0.05, 0.0]), [3, 7, 1]) == "Відповідь про JetIQ"
+    # Інші контексти або далекий запит — промах
+    assert cache.lookup(embedding, [3, 7, 2]) is None
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), [3, 7, 1]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_size_and_ttl_eviction():
+    cache = SemanticResponseCache(threshold=0.9, max_size=2, ttl=60)
+    for i in range(3):
+        cache.store(np.eye(3)[i], [i], f"answer {i}")
+    assert cache.stats()["size"] == 2
+    assert cache.lookup(np.eye(3)[0], [0]) is None
+    assert cache.lookup(np.eye(3)[2], [2]) == "answer 2"
+
+    expiring = SemanticResponseCache(threshold=0.9, max_size=2, ttl=0.01)
+    expiring.store(np.eye(3)[0], [0], "old")
+    time.sleep(0.02)
+    assert expiring.lookup(np.eye(3)[0], [0]) is None
+    assert expiring.stats()["size"] == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import faiss
+import numpy as np
+
+from src.agent.retrieval import BatchingRetriever
+
+
+# Проста модель-замінник SentenceTransformer: детермінований вектор на кожен текст
+class FakeModel:
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(self.dim) for t in texts], dtype="float32")
+
+
+def build_index(model, corpus):
+    index = faiss.IndexFlatL2(model.dim)
+    index.add(model.encode(corpus))
+    model.calls.clear()
+    return index
+
+
+def test_concurrent_queries_are_batched():
+    model = FakeModel()
+    corpus = [f"текст {i}" for i in range(50)]
+    index = build_index(model, corpus)
+    retriever = BatchingRetriever(model, index, batch_window_ms=20, max_batch_size=16)
+
+    async def run():
+        return await asyncio.gather(*(retriever.search(corpus[i], k=3) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    # Кожен запит знаходить сам себе першим
+    for i, (embedding, distances, indices) in enumerate(results):
+        assert indices[0] == i
+        assert len(distances) == 3
+        assert embedding.shape == (model.dim,)
+
+    assert model.calls == [10]
+    stats = retriever.stats()
+    assert stats["batches"] == 1
+    assert stats["queries"] == 10
+    assert stats["batch_size_histogram"] == {10: 1}
+
+
+def test_max_batch_size_and_mixed_k():
+    model = FakeModel()
+    corpus = [f"документ {i}" for i in range(20)]
+    index = build_index(model, corpus)
+    retriever = BatchingRetriever(model, index, batch_window_ms=20, max_batch_size=4)
+
+    async def run():
+        return await asyncio.gather(*(retriever.search(corpus[i], k=1 + i % 3) for i in range(10)))
+
+    results = asyncio.run(run())
+    assert [len(r[2]) for r in results] == [1 + i % 3 for i in range(10)]
+    assert max(model.calls) <= 4
+    assert retriever.stats()["queries"] == 10
+
+
+def test_encode_errors_reach_callers():
+    class BrokenModel(FakeModel):
+        def encode(self, texts):
+            raise RuntimeError("boom")
+
+    retriever = BatchingRetriever(BrokenModel(), faiss.IndexFlatL2(8))
+
+    async def run():
+        try:
+            await retriever.search("запит")
+        except RuntimeError as e:
+            return str(e)
+
+    assert asyncio.run(run()) == "boom"
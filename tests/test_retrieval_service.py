@@ -0,0 +1,104 @@
+import time
+
+import faiss
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agent import retrieval_service
+from src.agent.corpus_store import write_corpus
+from src.agent.multi_corpus import CorpusSet
+from src.agent.resource_holder import ResourceHolder
+from src.agent.retrieval_client import decode_npz
+from src.agent.startup import Startup
+from src.agent.text_normalization import LemmaCache
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(8) for t in texts], dtype="float32")
+
+
+def build_corpus(corpus_dir, texts):
+    corpus_dir.mkdir()
+    index = faiss.IndexFlatL2(8)
+    index.add(FakeModel().encode(texts))
+    faiss.write_index(index, str(corpus_dir / "vector_index.faiss"))
+    records = [{"url": f"https://vntu.edu.ua/{text}", "processed_text": " ".join([text] * 50)} for text in texts]
+    write_corpus(records, str(corpus_dir))
+    return ResourceHolder(str(corpus_dir))
+
+
+# Сервіс з фейковою моделлю і двома маленькими корпусами
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    model = FakeModel()
+    corpora = CorpusSet({"wiki": build_corpus(tmp_path / "wiki", ["вступ", "гуртожиток", "стипендія"]),
+                         "big": build_corpus(tmp_path / "big", ["розклад", "кафедра"])})
+    monkeypatch.setattr(retrieval_service, "startup", Startup())
+    monkeypatch.setattr(retrieval_service, "load_model", lambda: model)
+    monkeypatch.setattr(retrieval_service, "load_index", lambda: corpora)
+    lemmas = {word: word for word in ("вступ", "гуртожиток", "стипендія", "розклад", "кафедра")}
+    monkeypatch.setattr(retrieval_service, "load_normalization", lambda: (set(), LemmaCache(lemmas=lemmas)))
+    with TestClient(retrieval_service.app) as test_client:
+        for _ in range(100):
+            if test_client.get("/readyz").status_code == 200:
+                break
+            time.sleep(0.02)
+        test_client.model = model
+        yield test_client
+
+
+def test_search_returns_ids_scores_and_snippets(client):
+    response = client.post("/search", json={"query": "кафедра", "k": 3, "include_embedding": True})
+    assert response.status_code == 200
+    assert "search;dur=" in response.headers["Server-Timing"]
+    body = response.json()
+    top = body["results"][0]
+    assert (top["corpus"], top["id"]) == ("big", 1)
+    assert top["distance"] == pytest.approx(0.0)
+    assert len(top["snippet"]) == retrieval_service.SEARCH_SNIPPET_CHARS
+    assert "text" not in top
+    assert len(body["results"]) == 3
+    assert len(body["embedding"]) == 8
+
+    response = client.post("/search", json={"query": "кафедра", "k": 2, "corpora": ["wiki"], "include_text": True})
+    assert {result["corpus"] for result in response.json()["results"]} == {"wiki"}
+    assert response.json()["results"][0]["text"]["url"].startswith("https://vntu.edu.ua/")
+
+    assert client.post("/search", json={"query": "кафедра", "corpora": ["news"]}).status_code == 400
+
+
+# Запити пакета кодуються одним викликом моделі; JSON і npz містять ті самі id
+def test_batch_search_json_and_npz(client):
+    queries = ["вступ", "розклад", "стипендія"]
+    client.model.calls.clear()
+    response = client.post("/search/batch", json={"queries": queries, "k": 2})
+    assert client.model.calls == [3]
+    results = response.json()["results"]
+    assert [hits[0]["id"] for hits in results] == [0, 0, 2]
+
+    response = client.post("/search/batch", json={"queries": queries, "k": 2, "format": "npz"})
+    assert response.headers["content-type"] == retrieval_service.NPZ_MEDIA_TYPE
+    arrays = decode_npz(response.content)
+    assert arrays["embeddings"].shape == (3, 8)
+    assert arrays["ids"].tolist() == [[hit["id"] for hit in hits] for hits in results]
+    assert arrays["corpora"].tolist() == [[hit["corpus"] for hit in hits] for hits in results]
+    assert np.allclose(arrays["scores"], [[hit["score"] for hit in hits] for hits in results])
+
+    assert client.post("/search/batch", json={"queries": queries, "format": "csv"}).status_code == 400
+
+
+def test_batch_size_is_limited(client, monkeypatch):
+    monkeypatch.setattr(retrieval_service, "SEARCH_MAX_BATCH", 2)
+    assert client.post("/search/batch", json={"queries": ["a", "b", "c"]}).status_code == 413
+
+
+def test_empty_batch_is_rejected(client):
+    for format in ("json", "npz"):
+        response = client.post("/search/batch", json={"queries": [], "format": format})
+        assert response.status_code == 400
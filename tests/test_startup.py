@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import pytest
+
+from src.agent.startup import Startup
+
+
+def test_components_load_in_parallel():
+    startup = Startup()
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    start = time.perf_counter()
+    loaded = asyncio.run(startup.load(model=lambda: slow("model"), index=lambda: slow("index")))
+    assert loaded == {"model": "model", "index": "index"}
+    assert time.perf_counter() - start < 0.35
+    assert set(startup.timings) == {"model", "index"}
+
+    startup.mark_ready()
+    assert startup.status()["ready"]
+
+
+def test_failed_component_is_reported():
+    startup = Startup()
+
+    def broken():
+        raise FileNotFoundError("vector_index.faiss")
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(startup.load(index=broken))
+    assert not startup.ready
+    assert "vector_index.faiss" in startup.status()["error"]
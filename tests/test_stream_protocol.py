@@ -0,0 +1,27 @@
+import json
+
+from src.agent.stream_protocol import encode_frame, iter_frames, negotiate_protocol, source_items
+
+
+def test_negotiation_and_frame_formats():
+    assert negotiate_protocol("application/x-ndjson") == "ndjson"
+    assert negotiate_protocol("text/event-stream") == "sse"
+    assert negotiate_protocol("*/*") == negotiate_protocol(None) == "text"
+
+    assert json.loads(encode_frame("ndjson", "delta", {"text": "Привіт"})) == {"type": "delta", "text": "Привіт"}
+    assert encode_frame("sse", "done", {"cached": False}) == 'event: done\ndata: {"type": "done", "cached": false}\n\n'
+    # text/plain лишається сумісним зі старими клієнтами: лише текст відповіді та помилки
+    assert encode_frame("text", "delta", {"text": "tok "}) == "tok "
+    assert encode_frame("text", "sources", {"sources": []}) == ""
+    assert encode_frame("text", "error", {"message": "503 down"}) == "Error: 503 down"
+
+    lines = [encode_frame("ndjson", "delta", {"text": t}).strip() for t in ("a", "b")]
+    assert [frame["text"] for frame in iter_frames(lines + [""])] == ["a", "b"]
+
+
+def test_source_items():
+    results = [{"corpus": "wiki", "id": 3, "score": 0.5,
+                "text": {"url": "https://vntu.edu.ua/jetiq", "processed_text": "jetiq " * 100}}]
+    [source] = source_items(results, snippet_chars=20)
+    assert source == {"corpus": "wiki", "id": 3, "url": "https://vntu.edu.ua/jetiq", "score": 0.5,
+                      "snippet": "jetiq jetiq jetiq je"}
@@ -0,0 +1,86 @@
+from src.web.stream_renderer import IncrementalRenderer, render_history
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.text = None
+        self.sizes = []
+
+    def markdown(self, text):
+        self.text = text
+        self.sizes.append(len(text))
+
+
+class FakeContainer:
+    def __init__(self):
+        self.placeholders = []
+
+    def empty(self):
+        self.placeholders.append(FakePlaceholder())
+        return self.placeholders[-1]
+
+
+# Завершені абзаци стають окремими елементами, а перемальовується лише поточний абзац
+def test_renderer_redraws_only_the_current_paragraph():
+    container = FakeContainer()
+    renderer = IncrementalRenderer(container, fps=0)
+    answer = "".join(f"абзац {p} " + "слово " * 50 + "\n\n" for p in range(20))
+    for i in range(0, len(answer), 7):
+        renderer.append(answer[i:i + 7])
+
+    assert renderer.text == answer
+    assert renderer.length == len(answer)
+    assert [placeholder.text for placeholder in container.placeholders] == answer.split("\n\n")[:-1]
+    # Найбільше перемальоване — один абзац, а не вся відповідь
+    assert max(size for placeholder in container.placeholders for size in placeholder.sizes) < len(answer) / 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# 2 000 токенів по 32 токени/с при 8 кадрах/с: кожен четвертий токен, 500 перемальовувань замість 2 000
+def test_renderer_throttles_updates_to_frame_rate():
+    container, clock = FakeContainer(), FakeClock()
+    renderer = IncrementalRenderer(container, fps=8, clock=clock)
+    for i in range(2002):
+        renderer.append(f"т{i} ")
+        clock.now += 1 / 32
+
+    assert renderer.renders == 501
+    assert container.placeholders[0].text != renderer.text  # останні частини ще не намальовані
+    renderer.flush()
+    assert container.placeholders[0].text == renderer.text
+    assert len(container.placeholders) == 1
+
+
+class FakeStreamlit:
+    def __init__(self):
+        self.calls = []
+
+    def markdown(self, text, unsafe_allow_html=False):
+        self.calls.append(text)
+
+
+# Історія — один елемент за перезапуск, а HTML повідомлення будується лише раз
+def test_history_is_rendered_once_with_cached_html():
+    built = []
+
+    def to_html(message):
+        built.append(message["content"])
+        return f"<p>{message['content']}</p>"
+
+    messages = [{"role": "user", "content": "привіт"}, {"role": "agent", "content": "вітаю"}]
+    for _ in range(3):
+        st = FakeStreamlit()
+        render_history(st, messages, to_html)
+        assert st.calls == ["<p>привіт</p>\n<p>вітаю</p>"]
+    assert built == ["привіт", "вітаю"]
+
+    st = FakeStreamlit()
+    render_history(st, [], to_html)
+    assert st.calls == []
@@ -0,0 +1,81 @@
+import sys
+from types import SimpleNamespace
+
+from src.agent.text_normalization import (
+    LemmaCache, clean_text, extract_identifiers, fast_tokenize, normalize_for_search,
+)
+
+
+# Замінник pymorphy2.MorphAnalyzer, що рахує виклики аналізу
+class FakeMorph:
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, token):
+        self.calls += 1
+        return [SimpleNamespace(normal_form=token.rstrip("иі"))]
+
+
+def test_clean_text_keeps_only_ukrainian_letters():
+    assert clean_text("JetIQ: Вступ-2025!") == " вступ"
+
+
+def test_extract_identifiers_keeps_what_clean_text_drops():
+    assert extract_identifiers("JetIQ: Вступ-2025! Курс ІТ-21, jetiq") == "jetiq вступ-2025 іт-21"
+
+
+def test_fast_tokenize_splits_cleaned_text():
+    assert fast_tokenize(clean_text("Факультет\nінформаційних  технологій")) == ["факультет", "інформаційних", "технологій"]
+
+
+def test_repeated_tokens_are_parsed_once():
+    morph = FakeMorph()
+    lemmas = LemmaCache(morph=morph)
+    assert lemmas.lemmatize_tokens(["студенти", "студенти", "кафедри", "студенти"]) == \
+        ["студент", "студент", "кафедр", "студент"]
+    assert morph.calls == 2
+    assert lemmas.stats()["hits"] == 2 and lemmas.stats()["misses"] == 2
+
+
+def test_bounded_size_and_persistence(tmp_path):
+    lemmas = LemmaCache(morph=FakeMorph(), max_size=2)
+    lemmas.lemmatize_tokens(["а", "б", "в"])
+    assert lemmas.stats()["size"] == 2
+
+    path = str(tmp_path / "lemma_cache.json")
+    lemmas.save(path)
+    morph = FakeMorph()
+    loaded = LemmaCache.load(path, morph=morph)
+    loaded.lemmatize_tokens(["б", "в"])
+    assert morph.calls == 0
+
+
+# Аналізатор створюється під час завантаження, а не при першій невідомій словоформі в обробнику запиту
+def test_load_can_preload_analyzer(tmp_path, monkeypatch):
+    created = []
+    monkeypatch.setitem(sys.modules, "pymorphy2",
+                        SimpleNamespace(MorphAnalyzer=lambda lang: created.append(lang) or FakeMorph()))
+    path = str(tmp_path / "lemma_cache.json")
+    LemmaCache.load(path)
+    assert created == []
+    loaded = LemmaCache.load(path, preload_morph=True)
+    assert created == ["uk"]
+    loaded.lemmatize("студенти")
+    assert created == ["uk"]
+
+
+def test_drain_and_merge_collect_worker_lemmas():
+    worker = LemmaCache(morph=FakeMorph())
+    worker.lemmatize_tokens(["факультети", "факультети"])
+    new, hits, misses = worker.drain()
+    assert new == {"факультети": "факультет"} and (hits, misses) == (1, 1)
+    assert worker.drain() == ({}, 0, 0)
+
+    master = LemmaCache(morph=FakeMorph())
+    master.merge(new, hits, misses)
+    assert master.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+def test_query_is_normalized_like_the_corpus():
+    lemmas = LemmaCache(morph=FakeMorph())
+    assert normalize_for_search("Як вступити на факультети ВНТУ?", lemmas, {"як", "на"}) == "вступит факультет внту"
@@ -0,0 +1,147 @@
+import os
+
+import faiss
+import numpy as np
+import pytest
+
+from scripts.data_processing import vectorizer
+from scripts.data_processing.vectorizer import (
+    INDEX_DEFAULTS, benchmark_indexes, create_faiss_index, resolve_index_params,
+)
+from src.agent.corpus_store import CorpusStore, write_corpus
+from src.agent.lexical_index import LexicalIndex
+from src.agent.resources import INDEX_CONFIG_FILE, current_version, load_faiss_index, resolve_index_dir
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).random((2000, 32), dtype="float32")
+
+
+@pytest.mark.parametrize("index_type", sorted(INDEX_DEFAULTS))
+def test_create_index_types(embeddings, index_type):
+    params = resolve_index_params(index_type, len(embeddings), {"pq_m": 8})
+    index = create_faiss_index(embeddings, index_type, params)
+    assert index.ntotal == len(embeddings)
+    _, found = index.search(embeddings[:5], 1)
+    assert found.shape == (5, 1)
+
+
+def test_nlist_is_clamped_to_data_size():
+    params = resolve_index_params("ivf_flat", 390, {"nlist": 1000, "nprobe": 50})
+    assert params["nlist"] == 10
+    assert params["nprobe"] == 10
+
+
+# IVF-PQ on a corpus smaller than 2**pq_bits: the codebooks shrink instead of FAISS failing to train
+def test_pq_bits_are_clamped_for_small_corpus():
+    small = np.random.default_rng(1).random((200, 32), dtype="float32")
+    params = resolve_index_params("ivf_pq", len(small), {"pq_m": 8})
+    assert params["pq_bits"] == 7
+    index = create_faiss_index(small, "ivf_pq", params)
+    assert index.ntotal == 200
+
+
+def test_search_params_are_restored_on_load(tmp_path, embeddings):
+    params = resolve_index_params("ivf_flat", len(embeddings), {"nprobe": 7})
+    faiss.write_index(create_faiss_index(embeddings, "ivf_flat", params), str(tmp_path / "vector_index.faiss"))
+    (tmp_path / INDEX_CONFIG_FILE).write_text('{"index_type": "ivf_flat", "params": {"nprobe": 3}}')
+
+    index = load_faiss_index(str(tmp_path / "vector_index.faiss"))
+    assert faiss.extract_index_ivf(index).nprobe == 3
+
+
+def test_benchmark_reports_recall_against_flat(embeddings):
+    results = benchmark_indexes(embeddings, ["flat", "hnsw"], k=5, num_queries=50)
+    assert [r["index_type"] for r in results] == ["flat", "hnsw"]
+    assert results[0]["recall@5"] == 1.0
+    assert 0.0 <= results[1]["recall@5"] <= 1.0
+
+
+# Замінник SentenceTransformer: детермінований вектор для кожного тексту, рахує закодовані тексти
+class FakeSentenceTransformer:
+    encoded = []
+
+    def __init__(self, name_or_path):
+        pass
+
+    def encode(self, texts, show_progress_bar=False):
+        FakeSentenceTransformer.encoded.extend(texts)
+        return np.array([np.random.default_rng(sum(map(ord, t))).random(16) for t in texts], dtype="float32")
+
+    def get_sentence_embedding_dimension(self):
+        return 16
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    monkeypatch.setattr(vectorizer, "SentenceTransformer", FakeSentenceTransformer)
+    FakeSentenceTransformer.encoded = []
+    return FakeSentenceTransformer
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_incremental_update_encodes_only_changes(tmp_path, fake_model, index_type):
+    corpus_dir = str(tmp_path)
+    records = [{"url": f"https://vntu.edu.ua/{i}", "processed_text": f"сторінка {i}"} for i in range(5)]
+    vectorizer.update_index(records, corpus_dir, index_type)
+    assert len(fake_model.encoded) == 5
+    first_version = current_version(corpus_dir)
+
+    # Одна сторінка змінилась, одна зникла, одна додалась
+    records[1] = {"url": "https://vntu.edu.ua/1", "processed_text": "оновлена сторінка"}
+    del records[3]
+    records.append({"url": "https://vntu.edu.ua/new", "processed_text": "нова сторінка"})
+    fake_model.encoded = []
+    version_dir = vectorizer.update_index(records, corpus_dir, index_type)
+
+    assert sorted(fake_model.encoded) == ["нова сторінка", "оновлена сторінка"]
+    assert current_version(corpus_dir) != first_version
+    assert version_dir == resolve_index_dir(corpus_dir)
+
+    index = load_faiss_index(f"{version_dir}/vector_index.faiss")
+    texts = CorpusStore(version_dir)
+    assert index.ntotal == 5
+    assert texts[3] is None  # слот видаленої сторінки
+    query = FakeSentenceTransformer("").encode(["оновлена сторінка"])
+    _, found = index.search(query, 1)
+    assert texts[found[0][0]]["processed_text"] == "оновлена сторінка"
+
+
+def test_unchanged_records_keep_current_version(tmp_path, fake_model):
+    records = [{"url": "https://vntu.edu.ua/a", "processed_text": "вступ"}]
+    first = vectorizer.update_index(records, str(tmp_path))
+    fake_model.encoded = []
+    assert vectorizer.update_index(records, str(tmp_path)) == first
+    assert fake_model.encoded == []
+
+
+def test_passages_are_keyed_by_parent_and_position(tmp_path, fake_model):
+    records = [
+        {"url": "https://vntu.edu.ua/a", "parent": "https://vntu.edu.ua/a", "chunk": i, "processed_text": f"пасаж {i}"}
+        for i in range(3)
+    ]
+    version_dir = vectorizer.update_index(records, str(tmp_path))
+    assert vectorizer.load_manifest(version_dir)["documents"].keys() == {
+        "https://vntu.edu.ua/a#0", "https://vntu.edu.ua/a#1", "https://vntu.edu.ua/a#2"}
+
+
+def test_lexical_index_is_built_with_each_version(tmp_path, fake_model):
+    records = [{"url": "https://vntu.edu.ua/a", "processed_text": "вступ", "identifiers": "jetiq"},
+               {"url": "https://vntu.edu.ua/b", "processed_text": "гуртожиток"}]
+    version_dir = vectorizer.update_index(records, str(tmp_path))
+    _, found = LexicalIndex(version_dir).search(["jetiq"])
+    assert CorpusStore(version_dir)[found[0]]["url"] == "https://vntu.edu.ua/a"
+
+
+# k більше, ніж векторів в індексі: FAISS доповнює результат -1, такі id пропускаються
+def test_find_similar_texts_skips_padding(tmp_path):
+    index = faiss.IndexFlatL2(4)
+    index.add(np.eye(4, dtype="float32")[:2])
+    write_corpus([{"processed_text": "вступ"}, {"processed_text": "розклад"}], str(tmp_path))
+    model = type("Model", (), {"encode": lambda self, texts: np.eye(4, dtype="float32")[:1]})()
+    results = vectorizer.find_similar_texts("вступ", model, index, CorpusStore(str(tmp_path)), k=5)
+    assert [text for text, _ in results] == ["вступ", "розклад"]